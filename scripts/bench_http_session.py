@@ -0,0 +1,104 @@
+"""
+Benchmark: ClientSession por chamada x ClientSession compartilhada.
+
+Sobe um servidor aiohttp local que imita a API de produtos e mede a latência
+de um cache miss (chamadas sequenciais) e a vazão com chamadas concorrentes.
+O servidor local não usa TLS, então o ganho real contra a API externa (com
+handshake TLS e DNS) tende a ser maior que o medido aqui.
+
+Uso:
+    poetry run python scripts/bench_http_session.py [--requests 500] [--concurrency 50]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+for name, value in {
+    'DATABASE_URL': 'sqlite+aiosqlite:///:memory:',
+    'SECRET_KEY': 'bench',
+    'ALGORITHM': 'HS256',
+    'ACCESS_TOKEN_EXPIRE_MINUTES': '30',
+    'REDIS_HOST': 'localhost',
+    'REDIS_PORT': '6379',
+    'REDIS_DB': '0',
+    'PRODUCTS_API_URL': 'http://localhost/api/product',
+}.items():
+    os.environ.setdefault(name, value)
+
+from src.core.http import HttpClient  # noqa: E402
+from src.services.product import async_fetch_product  # noqa: E402
+
+PRODUCT = {'id': 1, 'title': 'Bench', 'price': 1.0, 'image': 'http://example.com/1.jpg'}
+
+
+async def per_call_session(url: str):
+    async with aiohttp.ClientSession() as session:
+        await async_fetch_product(url, session)
+
+
+async def measure(label: str, fetch, url: str, requests: int, concurrency: int):
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await fetch(url)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded():
+        async with semaphore:
+            await fetch(url)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f'{label:10} miss p50={statistics.median(latencies):6.2f}ms '
+        f'mean={statistics.mean(latencies):6.2f}ms  throughput={requests / elapsed:8.1f} req/s'
+    )
+
+
+async def main(requests: int, concurrency: int):
+    async def get_product(request):
+        return web.json_response(PRODUCT)
+
+    app = web.Application()
+    app.router.add_get('/api/product/{product_id}/', get_product)
+
+    async with TestServer(app) as server:
+        url = str(server.make_url('/api/product/1/'))
+
+        await measure('per-call', per_call_session, url, requests, concurrency)
+
+        client = HttpClient(limit_per_host=concurrency)
+        await client.start()
+        try:
+            await measure(
+                'shared',
+                lambda url: async_fetch_product(url, client.session),
+                url,
+                requests,
+                concurrency,
+            )
+        finally:
+            await client.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,134 @@
+"""
+Benchmark: latência de GET /wishlists durante uma rajada de logins.
+
+Compara PASSWORD_HASH_EXECUTOR=inline (Argon2 no event loop) com o modo
+em thread pool. Cada modo roda em um subprocesso com banco SQLite temporário.
+
+Uso:
+    poetry run python scripts/bench_login_storm.py [--logins 200] [--concurrency 20]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_mode(logins: int, concurrency: int):
+    import httpx  # noqa: PLC0415
+
+    from src.app import app  # noqa: PLC0415
+    from src.core.db import engine  # noqa: PLC0415
+    from src.core.security import (  # noqa: PLC0415
+        create_access_token,
+        get_password_hash,
+        principal_cache,
+    )
+    from src.models import table_registry  # noqa: PLC0415
+    from src.models.user import User  # noqa: PLC0415
+
+    principal_cache.redis_enabled = False
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(
+            User.__table__.insert().values(
+                username='bench', email='bench@bench.com', password=get_password_hash('secret')
+            )
+        )
+
+    token = create_access_token({'sub': 'bench@bench.com'})
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        headers = {'Authorization': f'Bearer {token}'}
+        await client.get('/wishlists/', headers=headers)
+
+        async def read_loop(samples: list[float], stop: asyncio.Event):
+            while not stop.is_set():
+                start = time.perf_counter()
+                await client.get('/wishlists/', headers=headers)
+                samples.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.005)
+
+        async def login():
+            await client.post(
+                '/auth/token', data={'username': 'bench@bench.com', 'password': 'secret'}
+            )
+
+        baseline: list[float] = []
+        stop = asyncio.Event()
+        reader = asyncio.create_task(read_loop(baseline, stop))
+        await asyncio.sleep(1)
+        stop.set()
+        await reader
+
+        storm: list[float] = []
+        stop = asyncio.Event()
+        reader = asyncio.create_task(read_loop(storm, stop))
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded_login():
+            async with semaphore:
+                await login()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(bounded_login() for _ in range(logins)))
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await reader
+
+    for label, samples in (('idle', baseline), ('storm', storm)):
+        print(
+            f'  {label:5} n={len(samples):4} p50={statistics.median(samples):7.2f}ms '
+            f'p99={percentile(samples, 99):7.2f}ms'
+        )
+    print(f'  logins/s={logins / elapsed:.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--mode')
+    args = parser.parse_args()
+
+    if args.mode:
+        sys.path.insert(0, str(ROOT))
+        asyncio.run(run_mode(args.logins, args.concurrency))
+        return
+
+    for mode in ('inline', 'thread'):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {
+                'SECRET_KEY': 'bench-secret-key-with-enough-length-000',
+                'ALGORITHM': 'HS256',
+                'ACCESS_TOKEN_EXPIRE_MINUTES': '30',
+                'REDIS_HOST': 'localhost',
+                'REDIS_PORT': '6379',
+                'REDIS_DB': '0',
+                'PRODUCTS_API_URL': 'http://localhost/api/product',
+                **os.environ,
+                'DATABASE_URL': f'sqlite+aiosqlite:///{tmp}/bench.db',
+                'PASSWORD_HASH_EXECUTOR': mode,
+            }
+            print(f'PASSWORD_HASH_EXECUTOR={mode}')
+            subprocess.run(
+                [sys.executable, __file__, '--mode', mode, *sys.argv[1:]], env=env, check=True
+            )
+
+
+if __name__ == '__main__':
+    main()
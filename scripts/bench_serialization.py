@@ -0,0 +1,164 @@
+"""
+Benchmark: CPU por requisição de GET /wishlists/ e GET /users/ com listas de
+10, 1k e 10k itens, antes e depois da serialização direta (FastJSONResponse).
+
+"Antes" são rotas registradas só aqui, com o mesmo response_model, que devolvem
+o dict do serviço para o FastAPI validar e serializar com o json da stdlib;
+"depois" são as rotas da aplicação. Ambas fazem a mesma consulta, então a
+diferença é o custo da serialização. O CPU é medido com time.process_time (o
+processo inteiro, inclusive a thread do aiosqlite), em um subprocesso com banco
+SQLite temporário e caches desligados.
+
+Uso:
+    poetry run python scripts/bench_serialization.py [--sizes 10,1000,10000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+async def cpu_per_request(client, url: str, iterations: int, **kwargs) -> float:
+    """Mediana do tempo de CPU (ms) de `iterations` requisições GET sequenciais."""
+    samples = []
+    for _ in range(iterations):
+        start = time.process_time()
+        await client.get(url, **kwargs)
+        samples.append((time.process_time() - start) * 1000)
+    return statistics.median(samples)
+
+
+async def run_benchmark(sizes: list[int], requests_budget: int):
+    from typing import Annotated  # noqa: PLC0415
+
+    import httpx  # noqa: PLC0415
+    from fastapi import APIRouter, Query  # noqa: PLC0415
+
+    from src.app import app  # noqa: PLC0415
+    from src.core.db import engine  # noqa: PLC0415
+    from src.core.security import create_access_token, principal_cache  # noqa: PLC0415
+    from src.models import table_registry  # noqa: PLC0415
+    from src.models.product import Product  # noqa: PLC0415
+    from src.models.user import User  # noqa: PLC0415
+    from src.models.wishlist import Wishlist  # noqa: PLC0415
+    from src.routers.user import ReadSession  # noqa: PLC0415
+    from src.routers.wishlist import CurrentUser  # noqa: PLC0415
+    from src.schemas.common import FilterPage  # noqa: PLC0415
+    from src.schemas.user import UserList  # noqa: PLC0415
+    from src.schemas.wishlist import WishlistList  # noqa: PLC0415
+    from src.services.user import get_users_service  # noqa: PLC0415
+    from src.services.wishlist import query_wishlist_page, wishlist_cache  # noqa: PLC0415
+
+    principal_cache.redis_enabled = False
+    wishlist_cache.enabled = False
+
+    legacy = APIRouter(prefix='/legacy')
+
+    @legacy.get('/wishlists/', response_model=WishlistList)
+    async def legacy_wishlist(
+        session: ReadSession, page: Annotated[FilterPage, Query()], current_user: CurrentUser
+    ):
+        return await query_wishlist_page(session, page, current_user.id)
+
+    @legacy.get('/users/', response_model=UserList)
+    async def legacy_users(session: ReadSession, page: Annotated[FilterPage, Query()]):
+        return await get_users_service(session, page)
+
+    app.include_router(legacy)
+
+    largest = max(sizes)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(
+            User.__table__.insert(),
+            [
+                {'username': f'user{i}', 'email': f'user{i}@bench.com', 'password': 'x'}
+                for i in range(1, largest + 1)
+            ],
+        )
+        await conn.execute(
+            Product.__table__.insert(),
+            [
+                {
+                    'id': i,
+                    'title': f'Produto {i}',
+                    'price': 10.0 + i / 100,
+                    'image': f'http://img/{i}.jpg',
+                    'review_score': 4.5,
+                }
+                for i in range(1, largest + 1)
+            ],
+        )
+        await conn.execute(
+            Wishlist.__table__.insert(),
+            [{'user_id': 1, 'product_id': i} for i in range(1, largest + 1)],
+        )
+
+    headers = {'Authorization': f'Bearer {create_access_token({"sub": "user1@bench.com"})}'}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            for path in ('/wishlists/', '/users/'):
+                print(path)
+                for size in sizes:
+                    params = {'limit': size}
+                    legacy_body = (
+                        await client.get(f'/legacy{path}', headers=headers, params=params)
+                    ).json()
+                    fast_body = (await client.get(path, headers=headers, params=params)).json()
+                    assert legacy_body == fast_body, f'respostas diferentes em {path}'
+
+                    iterations = max(5, requests_budget // size)
+                    before, after = [
+                        await cpu_per_request(
+                            client, url, iterations, headers=headers, params=params
+                        )
+                        for url in (f'/legacy{path}', path)
+                    ]
+                    print(
+                        f'  itens={size:6} antes={before:8.2f}ms depois={after:8.2f}ms '
+                        f'ganho={before / after:5.2f}x'
+                    )
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10,1000,10000')
+    parser.add_argument('--requests', type=int, default=2000, help='itens somados por variante')
+    parser.add_argument('--run', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    if args.run:
+        sys.path.insert(0, str(ROOT))
+        asyncio.run(run_benchmark(sizes, args.requests))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            'SECRET_KEY': 'bench-secret-key-with-enough-length-000',
+            'ALGORITHM': 'HS256',
+            'ACCESS_TOKEN_EXPIRE_MINUTES': '30',
+            'REDIS_HOST': 'localhost',
+            'REDIS_PORT': '6379',
+            'REDIS_DB': '0',
+            'PRODUCTS_API_URL': 'http://localhost/api/product',
+            **os.environ,
+            'DATABASE_URL': f'sqlite+aiosqlite:///{tmp}/bench.db',
+            'REQUEST_TIMEOUT': '120',
+        }
+        subprocess.run([sys.executable, __file__, '--run', *sys.argv[1:]], env=env, check=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,29 @@
+"""
+Compila o catálogo JSON em um snapshot binário para o fallback via mmap.
+
+Uso:
+    python scripts/build_catalog_snapshot.py [mock_products.json] [catalog.snapshot]
+"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.catalog_snapshot import build_snapshot  # noqa: E402
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else 'mock_products.json'
+    target = sys.argv[2] if len(sys.argv) > 2 else 'catalog.snapshot'  # noqa: PLR2004
+
+    with open(source, 'r', encoding='UTF-8') as f:
+        products = json.load(f)
+
+    count = build_snapshot(products, target)
+    print(f'Snapshot do catálogo gerado em {target} com {count} produtos.')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Servidor local que imita a API de produtos a partir de mock_products.json.
+
+Atende a listagem paginada (`/api/product/?page=N`, no formato
+`{"meta": {...}, "products": [...]}`) e a busca por ID (`/api/product/{id}/`),
+permitindo rodar a sincronização do catálogo sem a API externa.
+
+Uso:
+    poetry run python scripts/catalog_stub_server.py [--port 8081] [--page-size 100]
+
+Depois aponte PRODUCTS_API_URL para http://localhost:8081/api/product.
+"""
+
+import argparse
+import json
+from http import HTTPStatus
+
+from aiohttp import web
+
+
+def create_app(products: list, page_size: int) -> web.Application:
+    by_id = {str(product['id']): product for product in products}
+
+    async def list_products(request):
+        try:
+            page = int(request.query.get('page', '1'))
+        except ValueError:
+            return web.json_response({'error': 'invalid page'}, status=HTTPStatus.BAD_REQUEST)
+        start = (page - 1) * page_size
+        return web.json_response({
+            'meta': {'page_number': page, 'page_size': page_size},
+            'products': products[start : start + page_size] if page > 0 else [],
+        })
+
+    async def get_product(request):
+        product = by_id.get(request.match_info['product_id'])
+        if product is None:
+            return web.json_response({}, status=HTTPStatus.NOT_FOUND)
+        return web.json_response(product)
+
+    app = web.Application()
+    app.router.add_get('/api/product/', list_products)
+    app.router.add_get('/api/product/{product_id}/', get_product)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--products', default='mock_products.json')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--page-size', type=int, default=100)
+    args = parser.parse_args()
+
+    with open(args.products, 'r', encoding='UTF-8') as f:
+        products = json.load(f)
+
+    web.run_app(create_app(products, args.page_size), port=args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,51 @@
+import hashlib
 import json
 import os
 import time
 
 import redis
 
+CATALOG_KEY = 'catalog:products'
+CATALOG_VERSION_KEY = 'catalog:version'
+LEGACY_CATALOG_KEY = 'catalog'
+
+
+def catalog_version(products):
+    content = json.dumps(products, sort_keys=True).encode('UTF-8')
+    return hashlib.sha1(content).hexdigest()[:12]
+
+
+def write_catalog(r, products, version):
+    """
+    Grava o catálogo como um campo por produto no hash 'catalog:products'.
+
+    O hash é montado em uma chave temporária e trocado com RENAME junto da chave
+    de versão, para que a aplicação nunca leia um catálogo pela metade.
+    """
+    tmp_key = f'{CATALOG_KEY}:{version}'
+    r.delete(tmp_key)
+    r.hset(tmp_key, mapping={str(p['id']): json.dumps(p) for p in products})
+
+    pipe = r.pipeline(transaction=True)
+    pipe.rename(tmp_key, CATALOG_KEY)
+    pipe.set(CATALOG_VERSION_KEY, version)
+    pipe.delete(LEGACY_CATALOG_KEY)
+    pipe.execute()
+
+
+def load_products(r, json_path):
+    if os.path.exists(json_path):
+        with open(json_path, 'r', encoding='UTF-8') as f:
+            return json.load(f)
+
+    # Migração: reaproveita o catálogo salvo no formato antigo (um único JSON)
+    legacy = r.get(LEGACY_CATALOG_KEY)
+    if legacy:
+        print('Migrando catálogo da chave legada para o formato por produto.')
+        return json.loads(legacy)
+
+    return None
+
 
 def load_catalog_to_redis():
     json_path = '/app/mock_products.json'
@@ -32,15 +74,20 @@ def load_catalog_to_redis():
         return False
 
     try:
-        if r.exists('catalog'):
-            catalog_size = len(json.loads(r.get('catalog')))
+        products = load_products(r, json_path)
+        current_version = r.get(CATALOG_VERSION_KEY)
+        if current_version and (not products or catalog_version(products) == current_version):
+            catalog_size = r.hlen(CATALOG_KEY)
             print(f'Catálogo já existe no Redis com {catalog_size} produtos. Pulando carregamento.')
             return True
 
-        with open(json_path, 'r', encoding='UTF-8') as f:
-            products = json.load(f)
+        if not products:
+            print('Nenhum catálogo encontrado para carregar.')
+            return False
+
+        version = catalog_version(products)
 
-        r.set('catalog', json.dumps(products))
+        write_catalog(r, products, version)
         print(f'Catálogo carregado com sucesso! {len(products)} produtos adicionados.')
         return True
     except Exception as e:
@@ -0,0 +1,46 @@
+"""
+Sincroniza o catálogo de produtos da API externa com o banco de dados.
+
+Executa uma sincronização completa e termina; com --interval, repete a cada N
+segundos (processo dedicado, alternativa a CATALOG_SYNC_INTERVAL na aplicação).
+
+Uso:
+    poetry run python scripts/sync_catalog.py [--interval 300] [--concurrency 4] [--rate 5]
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.core.db import get_session_factory  # noqa: E402
+from src.core.http import http_client  # noqa: E402
+from src.services.catalog_sync import sync_catalog  # noqa: E402
+
+
+async def main(interval: float, concurrency: int, rate: float):
+    await http_client.start()
+    try:
+        while True:
+            result = await sync_catalog(get_session_factory(), concurrency=concurrency, rate=rate)
+            print(
+                f'{result.pages} páginas sincronizadas: {result.inserted} novos, '
+                f'{result.updated} alterados, {result.unchanged} inalterados, '
+                f'{result.failed_pages} páginas com erro.'
+            )
+            if interval <= 0:
+                break
+            await asyncio.sleep(interval)
+    finally:
+        await http_client.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--interval', type=float, default=0)
+    parser.add_argument('--concurrency', type=int, default=None)
+    parser.add_argument('--rate', type=float, default=None)
+    args = parser.parse_args()
+    asyncio.run(main(args.interval, args.concurrency, args.rate))
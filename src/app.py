@@ -1,20 +1,72 @@
 import asyncio
 import sys
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
 
+from .core.cache import cache_invalidations
+from .core.db import QueryStatsMiddleware
+from .core.deadline import DeadlineExceededError, DeadlineMiddleware, deadline_exceeded_response
+from .core.http import http_client
+from .core.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from .core.security import password_executor
+from .core.settings import Settings
 from .routers import auth, user, wishlist
+from .services.catalog_sync import catalog_sync_worker
+from .services.pending_wishlist import pending_wishlist_worker
+from .services.product import cancel_refreshes, catalog_snapshot
 
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await http_client.start()
+    catalog_snapshot.load()
+    cache_invalidations.start()
+    catalog_sync_worker.start()
+    pending_wishlist_worker.start()
+    yield
+    await pending_wishlist_worker.stop()
+    await cache_invalidations.stop()
+    await catalog_sync_worker.stop()
+    await cancel_refreshes()
+    catalog_snapshot.close()
+    await http_client.close()
+    password_executor.shutdown()
+
+
 app = FastAPI(
     title='Wishlist API',
     description='API para controle de produtos favoritos dos clientes.',
     version='1.0.0',
     docs_url='/docs',
     redoc_url='/redoc',
+    lifespan=lifespan,
+)
+
+settings = Settings()
+app.add_middleware(
+    DeadlineMiddleware,
+    default=settings.REQUEST_TIMEOUT,
+    routes=settings.REQUEST_TIMEOUT_ROUTES,
 )
+app.add_middleware(QueryStatsMiddleware)
+# Por fora do DeadlineMiddleware, para medir também as respostas 504
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(DeadlineExceededError)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceededError):
+    return deadline_exceeded_response()
+
+
+@app.get('/metrics', include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
 
 app.include_router(user.router)
 app.include_router(auth.router)
@@ -0,0 +1,120 @@
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional
+
+
+class BulkheadFullError(Exception):
+    pass
+
+
+@dataclass
+class AIMDLimit:
+    """
+    Limite adaptativo (AIMD) guiado pela latência observada.
+
+    Cada chamada rápida com o limite em uso soma 1 ao limite; uma chamada acima
+    de `latency_threshold` segundos (ou que estoure o timeout) o multiplica por
+    `backoff`. O limite fica entre `min_limit` e o máximo do bulkhead.
+    """
+
+    min_limit: int = 1
+    latency_threshold: float = 2.0
+    backoff: float = 0.9
+
+    def update(self, limit: float, max_limit: int, latency: float, in_flight: int) -> float:
+        if latency > self.latency_threshold:
+            return max(self.min_limit, limit * self.backoff)
+        if in_flight * 2 >= limit:
+            return min(max_limit, limit + 1)
+        return limit
+
+
+class Bulkhead:
+    """
+    Limita as chamadas simultâneas a um recurso (ex.: a API de produtos).
+
+    Até `max_concurrent` chamadas executam ao mesmo tempo; as seguintes esperam em
+    uma fila de no máximo `max_queue` posições por até `queue_timeout` segundos.
+    Fila cheia ou espera esgotada falham na hora com BulkheadFullError, para que
+    quem chamou use um fallback em vez de acumular requisições (e conexões).
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 20,
+        max_queue: int = 50,
+        queue_timeout: float = 1.0,
+        adaptive: Optional[AIMDLimit] = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.adaptive = adaptive
+        self._limit = float(max_concurrent)
+        self.in_flight = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        return max(1, int(self._limit))
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def _acquire(self):
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise BulkheadFullError('Limite de chamadas simultâneas atingido')
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # a vaga foi concedida no mesmo instante do timeout/cancelamento
+                self._release()
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+                raise BulkheadFullError('Tempo de espera por uma vaga esgotado') from e
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _release(self):
+        self.in_flight -= 1
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    async def call(self, func: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        await self._acquire()
+        start = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.TimeoutError:
+            self._observe(float('inf'))
+            raise
+        else:
+            self._observe(time.perf_counter() - start)
+            return result
+        finally:
+            self._release()
+
+    def _observe(self, latency: float):
+        if self.adaptive is not None:
+            self._limit = self.adaptive.update(
+                self._limit, self.max_concurrent, latency, self.in_flight
+            )
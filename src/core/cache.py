@@ -0,0 +1,309 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+from .metrics import cache_lookup_seconds
+from .redis import (
+    delete_key,
+    get_json,
+    incr_key,
+    listen,
+    mget_json,
+    publish,
+    run_script,
+    set_json,
+    set_key,
+)
+
+logger = logging.getLogger('uvicorn')
+
+INVALIDATION_CHANNEL = 'cache:invalidate'
+INVALIDATION_RETRY_DELAY = 1.0
+
+
+@dataclass
+class CacheStats:
+    local_hits: int = 0
+    redis_hits: int = 0
+    misses: int = 0
+    # Nome nas métricas (definido por track_cache); sem ele a latência não é exportada
+    name: Optional[str] = None
+
+    @property
+    def hits(self) -> int:
+        return self.local_hits + self.redis_hits
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def observe(self, hit: bool, seconds: float):
+        """Registra a latência de uma leitura atendida pelo cache (hit) ou pela origem."""
+        if self.name is not None:
+            cache_lookup_seconds.observe(seconds, self.name, 'hit' if hit else 'miss')
+
+
+class LocalTTLCache:
+    """Cache LRU em memória com expiração por item."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class CacheInvalidationListener:
+    """
+    Propaga as invalidações dos TieredCache entre os workers (pub/sub do Redis).
+
+    Cada worker assina INVALIDATION_CHANNEL e remove da própria camada local as
+    chaves invalidadas pelos outros. Se a assinatura cair, as mensagens do período
+    se perdem: ao reconectar, as camadas locais registradas são esvaziadas.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.caches: dict[str, 'TieredCache'] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, cache: 'TieredCache'):
+        self.caches[cache.namespace] = cache
+
+    def start(self):
+        if self.enabled and self.caches and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def apply(self, message: str):
+        namespace, key = json.loads(message)
+        cache = self.caches.get(namespace)
+        if cache is not None:
+            cache.local.delete(key)
+
+    def clear_local(self):
+        for cache in self.caches.values():
+            cache.local.clear()
+
+    async def _run(self):
+        while True:
+            try:
+                async for message in listen(INVALIDATION_CHANNEL):
+                    self.apply(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f'Assinatura de invalidações de cache interrompida: {e}')
+            await asyncio.sleep(INVALIDATION_RETRY_DELAY)
+            self.clear_local()
+
+
+cache_invalidations = CacheInvalidationListener()
+
+
+class TieredCache:
+    """
+    Cache em duas camadas: memória local (LRU + TTL curto) na frente do Redis.
+
+    Os valores precisam ser serializáveis em JSON, pois a camada Redis é
+    compartilhada entre os workers. Com `broadcast_invalidations`, invalidate
+    também remove a chave da camada local dos outros workers
+    (CacheInvalidationListener), em vez de esperar o `local_ttl`.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        redis_ttl: int = 300,
+        local_ttl: float = 30,
+        local_maxsize: int = 1024,
+        broadcast_invalidations: bool = False,
+    ):
+        self.namespace = namespace
+        self.redis_ttl = redis_ttl
+        self.redis_enabled = True
+        self.local = LocalTTLCache(maxsize=local_maxsize, ttl=local_ttl)
+        self.stats = CacheStats()
+        self.broadcast_invalidations = broadcast_invalidations
+        if broadcast_invalidations:
+            cache_invalidations.register(self)
+
+    def _redis_key(self, key: str) -> str:
+        return f'{self.namespace}:{key}'
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None:
+            self.stats.local_hits += 1
+            return value
+
+        if self.redis_enabled:
+            value = await get_json(self._redis_key(key))
+            if value is not None:
+                self.stats.redis_hits += 1
+                self.local.set(key, value)
+                return value
+
+        self.stats.misses += 1
+        return None
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Como get para várias chaves: as ausentes da camada local são buscadas no
+        Redis com um único MGET.
+
+        Returns:
+            dict: Valores encontrados, por chave; chaves ausentes ficam de fora
+        """
+        found = {}
+        pending = []
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                pending.append(key)
+        self.stats.local_hits += len(found)
+
+        from_redis = {}
+        if pending and self.redis_enabled:
+            values = await mget_json([self._redis_key(key) for key in pending])
+            from_redis = {
+                key: values[self._redis_key(key)]
+                for key in pending
+                if values.get(self._redis_key(key)) is not None
+            }
+            for key, value in from_redis.items():
+                self.local.set(key, value)
+        self.stats.redis_hits += len(from_redis)
+        self.stats.misses += len(pending) - len(from_redis)
+
+        found.update(from_redis)
+        return found
+
+    async def set(self, key: str, value: Any) -> None:
+        self.local.set(key, value)
+        if self.redis_enabled:
+            await set_json(self._redis_key(key), value, self.redis_ttl)
+
+    async def invalidate(self, key: str) -> None:
+        self.local.delete(key)
+        if self.redis_enabled:
+            await delete_key(self._redis_key(key))
+            if self.broadcast_invalidations:
+                await publish(INVALIDATION_CHANNEL, json.dumps([self.namespace, key]))
+
+
+# Lê a versão do dono e a página daquela versão em uma única ida ao Redis
+VERSIONED_GET_SCRIPT = """
+local version = redis.call('get', KEYS[1]) or '0'
+return {version, redis.call('get', KEYS[2] .. ':v' .. version .. ':' .. ARGV[1])}
+"""
+
+
+class VersionedCache:
+    """
+    Cache no Redis de respostas por dono (ex.: usuário), invalidado por versão.
+
+    Cada escrita incrementa a versão do dono; as leituras só procuram entradas da
+    versão atual, então nenhuma página anterior à escrita volta a ser servida. As
+    entradas antigas expiram pelo TTL.
+    """
+
+    def __init__(self, namespace: str, ttl: int = 60):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.enabled = True
+        self.stats = CacheStats()
+
+    def _version_key(self, owner: Any) -> str:
+        return f'{self.namespace}:ver:{owner}'
+
+    def _entry_prefix(self, owner: Any) -> str:
+        return f'{self.namespace}:{owner}'
+
+    async def get(self, owner: Any, key: str) -> tuple[Optional[Any], Optional[str]]:
+        """
+        Returns:
+            tuple: (valor em cache ou None, versão atual do dono ou None se o
+            Redis estiver indisponível)
+        """
+        data, version = await self.get_raw(owner, key)
+        return (json.loads(data) if data is not None else None), version
+
+    async def get_raw(self, owner: Any, key: str) -> tuple[Optional[str], Optional[str]]:
+        """Como get, mas devolve o JSON guardado sem desserializar."""
+        if not self.enabled:
+            return None, None
+
+        result = await run_script(
+            VERSIONED_GET_SCRIPT, [self._version_key(owner), self._entry_prefix(owner)], [key]
+        )
+        if not result:
+            return None, None
+
+        version, data = (result + [None])[:2]
+        if data is None:
+            self.stats.misses += 1
+            return None, version
+
+        self.stats.redis_hits += 1
+        return data, version
+
+    async def set(self, owner: Any, version: Optional[str], key: str, value: Any) -> None:
+        if not self.enabled or version is None:
+            return
+        await set_json(f'{self._entry_prefix(owner)}:v{version}:{key}', value, self.ttl)
+
+    async def set_raw(self, owner: Any, version: Optional[str], key: str, data: str) -> None:
+        """Como set, para um valor já serializado em JSON."""
+        if not self.enabled or version is None:
+            return
+        await set_key(f'{self._entry_prefix(owner)}:v{version}:{key}', data, self.ttl)
+
+    async def bump(self, owner: Any) -> None:
+        """Invalida todas as entradas do dono (chamar após cada escrita)."""
+        if self.enabled:
+            await incr_key(self._version_key(owner))
@@ -0,0 +1,168 @@
+"""
+Snapshot binário do catálogo de produtos, lido via mmap.
+
+Formato (little-endian):
+
+    cabeçalho   magic (4s) | versão (I) | quantidade (I) | offset do heap (Q)
+    registros   quantidade x registro de tamanho fixo, ordenados por id
+    heap        textos UTF-8 (título, imagem, marca) referenciados por offset/tamanho
+
+Cada registro guarda id (q), price (d), review_score (d, NaN quando ausente) e
+pares offset/tamanho (I, I) de título, imagem e marca. A busca é binária sobre o
+id, lendo direto do mmap: os workers compartilham o page cache do arquivo em vez
+de manter cada um uma cópia do JSON em memória.
+"""
+
+import logging
+import math
+import mmap
+import struct
+from typing import Any, Dict, Iterable, Optional
+
+logger = logging.getLogger('uvicorn')
+
+MAGIC = b'WLCS'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIIQ')
+RECORD = struct.Struct('<qddIIIIII')
+ID = struct.Struct('<q')
+
+
+def record_offset(index: int) -> int:
+    return HEADER.size + index * RECORD.size
+
+
+def build_snapshot(products: Iterable[Dict[str, Any]], path: str) -> int:
+    """
+    Compila o catálogo (formato de mock_products.json) em um snapshot binário.
+
+    Returns:
+        int: Quantidade de produtos gravados
+    """
+    heap = bytearray()
+    strings: Dict[str, tuple[int, int]] = {}
+
+    def intern(value: Optional[str]) -> tuple[int, int]:
+        value = value or ''
+        if value not in strings:
+            encoded = value.encode('UTF-8')
+            strings[value] = (len(heap), len(encoded))
+            heap.extend(encoded)
+        return strings[value]
+
+    by_id = {product['id']: product for product in products}
+    records = bytearray()
+    for product_id in sorted(by_id):
+        product = by_id[product_id]
+        review_score = product.get('reviewScore')
+        records.extend(
+            RECORD.pack(
+                product_id,
+                product['price'],
+                math.nan if review_score is None else review_score,
+                *intern(product['title']),
+                *intern(product['image']),
+                *intern(product.get('brand')),
+            )
+        )
+
+    heap_offset = HEADER.size + len(records)
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(by_id), heap_offset))
+        f.write(records)
+        f.write(heap)
+
+    return len(by_id)
+
+
+class CatalogSnapshot:
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < HEADER.size:
+            self._mmap.close()
+            raise ValueError(f'Snapshot de catálogo inválido: {path}')
+
+        magic, version, self.count, self.heap_offset = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mmap.close()
+            raise ValueError(f'Snapshot de catálogo inválido: {path}')
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _string(self, offset: int, length: int) -> str:
+        start = self.heap_offset + offset
+        return self._mmap[start : start + length].decode('UTF-8')
+
+    def get(self, product_id: int) -> Optional[Dict[str, Any]]:
+        """Busca binária pelo id. Retorna o produto no formato do catálogo ou None."""
+        low, high = 0, self.count - 1
+        while low <= high:
+            mid = (low + high) // 2
+            (current,) = ID.unpack_from(self._mmap, record_offset(mid))
+            if current < product_id:
+                low = mid + 1
+            elif current > product_id:
+                high = mid - 1
+            else:
+                return self._read(mid)
+        return None
+
+    def _read(self, index: int) -> Dict[str, Any]:
+        (
+            product_id,
+            price,
+            review_score,
+            title_offset,
+            title_length,
+            image_offset,
+            image_length,
+            brand_offset,
+            brand_length,
+        ) = RECORD.unpack_from(self._mmap, record_offset(index))
+        return {
+            'id': product_id,
+            'title': self._string(title_offset, title_length),
+            'price': price,
+            'image': self._string(image_offset, image_length),
+            'brand': self._string(brand_offset, brand_length) or None,
+            'reviewScore': None if math.isnan(review_score) else review_score,
+        }
+
+    def close(self):
+        self._mmap.close()
+
+
+class CatalogSnapshotStore:
+    """Abre o snapshot sob demanda; se o arquivo não existir, o fallback fica desativado."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._loaded = False
+
+    def load(self) -> Optional[CatalogSnapshot]:
+        self._loaded = True
+        try:
+            self._snapshot = CatalogSnapshot(self.path)
+            logger.info(f'Snapshot do catálogo carregado com {len(self._snapshot)} produtos')
+        except FileNotFoundError:
+            logger.warning(f'Snapshot do catálogo não encontrado em {self.path}')
+        except ValueError as e:
+            logger.error(str(e))
+        return self._snapshot
+
+    def get(self, product_id: int) -> Optional[Dict[str, Any]]:
+        if not self._loaded:
+            self.load()
+        if self._snapshot is None:
+            return None
+        return self._snapshot.get(product_id)
+
+    def close(self):
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._snapshot = None
+        self._loaded = False
@@ -1,41 +1,373 @@
+"""
+Circuit breaker assíncrono com estado local ou compartilhado via Redis.
+
+Estados:
+
+    closed      as chamadas passam; falhas e chamadas entram numa janela deslizante
+                de `window` segundos (em `buckets` fatias). O circuito abre quando a
+                janela tem ao menos `fail_max` falhas e taxa de falha >= `failure_rate`.
+    open        as chamadas são rejeitadas até `open_until`. O tempo de abertura
+                dobra a cada reabertura seguida (reset_timeout * 2^n, limitado a
+                max_reset_timeout).
+    half_open   no máximo `half_open_probes` chamadas de teste simultâneas. Se
+                todas tiverem sucesso o circuito fecha; qualquer falha o reabre.
+                Uma sonda cancelada (ex.: prazo da requisição) devolve a vaga sem
+                contar como sucesso nem falha.
+
+No modo compartilhado o estado fica no hash breaker:{nome} e é alterado por
+scripts Lua (atômicos no servidor), com a mesma lógica de LocalBreakerState.
+"""
+
+import asyncio
 import logging
+import math
 import time
-from typing import Any, Callable
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
 
 import pybreaker
 
+from .deadline import deadline_var
+from .redis import run_script
+
 logger = logging.getLogger('uvicorn')
 
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+ALLOW, PROBE, REJECT = 'allow', 'probe', 'reject'
+
+# Tempo sem consultar o Redis depois de uma falha de conexão (só estado local)
+REDIS_RETRY_INTERVAL = 5
+SHARED_STATE_TTL = 3600
+
+
+@dataclass(frozen=True)
+class CircuitBreakerPolicy:
+    fail_max: int = 3
+    failure_rate: float = 0.5
+    window: float = 30
+    buckets: int = 10
+    reset_timeout: float = 10
+    max_reset_timeout: float = 300
+    half_open_probes: int = 1
+
+    def open_timeout(self, trips: int) -> float:
+        """Tempo de abertura após `trips` reaberturas seguidas (backoff exponencial)."""
+        return min(self.reset_timeout * 2**trips, self.max_reset_timeout)
+
+    def bucket(self, now: float) -> int:
+        return math.floor(now / (self.window / self.buckets))
+
+
+@dataclass
+class CircuitBreakerMetrics:
+    calls: int = 0
+    failures: int = 0
+    rejected: int = 0
+    probes: int = 0
+    transitions: Counter = field(default_factory=Counter)
+
+
+# ARGV: agora, half_open_probes, validade de uma sonda (s)
+ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local data = redis.call('hmget', KEYS[1], 'state', 'open_until', 'probes', 'probe_expires')
+local state = data[1] or 'closed'
+local open_until = data[2] or '0'
+local probes = tonumber(data[3] or '0')
+if state == 'closed' then
+    return {'allow', state, open_until}
+end
+if state == 'open' then
+    if now < tonumber(open_until) then
+        return {'reject', state, open_until}
+    end
+    state = 'half_open'
+    probes = 0
+    redis.call('hset', KEYS[1], 'state', state, 'probes', 0, 'probe_ok', 0)
+end
+if probes >= tonumber(ARGV[2]) then
+    if now < tonumber(data[4] or '0') then
+        return {'reject', state, open_until}
+    end
+    -- sondas expiradas (processo encerrado no meio da chamada): libera as vagas
+    probes = 0
+    redis.call('hset', KEYS[1], 'probe_ok', 0)
+end
+redis.call('hset', KEYS[1], 'probes', probes + 1, 'probe_expires', now + tonumber(ARGV[3]))
+return {'probe', state, open_until}
+"""
+
+# ARGV: agora, sucesso (1/0), sonda (1/0), half_open_probes, fail_max, failure_rate,
+#       bucket atual, buckets, reset_timeout, max_reset_timeout, ttl da chave
+RECORD_SCRIPT = """
+local now = tonumber(ARGV[1])
+local success = ARGV[2] == '1'
+local probe = ARGV[3] == '1'
+local buckets = tonumber(ARGV[8])
+local data = redis.call('hmget', KEYS[1], 'state', 'open_until', 'trips')
+local state = data[1] or 'closed'
+local open_until = data[2] or '0'
+
+local function trip(trips)
+    local timeout = math.min(tonumber(ARGV[9]) * 2 ^ trips, tonumber(ARGV[10]))
+    state = 'open'
+    open_until = tostring(now + timeout)
+    redis.call('hset', KEYS[1], 'state', state, 'open_until', open_until, 'trips', trips)
+end
+
+if probe then
+    if state == 'half_open' then
+        if not success then
+            trip(tonumber(data[3] or '0') + 1)
+        elseif redis.call('hincrby', KEYS[1], 'probe_ok', 1) >= tonumber(ARGV[4]) then
+            state = 'closed'
+            redis.call('hset', KEYS[1], 'state', state, 'trips', 0, 'probes', 0, 'probe_ok', 0)
+            for i = 0, buckets - 1 do
+                redis.call('hdel', KEYS[1], 't' .. i, 'c' .. i, 'f' .. i)
+            end
+        end
+    end
+elseif state == 'closed' then
+    local bucket = tonumber(ARGV[7])
+    local i = bucket % buckets
+    if redis.call('hget', KEYS[1], 't' .. i) ~= tostring(bucket) then
+        redis.call('hset', KEYS[1], 't' .. i, bucket, 'c' .. i, 0, 'f' .. i, 0)
+    end
+    redis.call('hincrby', KEYS[1], 'c' .. i, 1)
+    if not success then
+        redis.call('hincrby', KEYS[1], 'f' .. i, 1)
+        local calls, failures = 0, 0
+        for j = 0, buckets - 1 do
+            local ring = redis.call('hmget', KEYS[1], 't' .. j, 'c' .. j, 'f' .. j)
+            if ring[1] and bucket - tonumber(ring[1]) < buckets then
+                calls = calls + tonumber(ring[2])
+                failures = failures + tonumber(ring[3])
+            end
+        end
+        if failures >= tonumber(ARGV[5]) and failures / calls >= tonumber(ARGV[6]) then
+            trip(0)
+        end
+    end
+end
+redis.call('expire', KEYS[1], ARGV[11])
+return {state, open_until}
+"""
+
+RELEASE_PROBE_SCRIPT = """
+local data = redis.call('hmget', KEYS[1], 'state', 'probes')
+if data[1] == 'half_open' and tonumber(data[2] or '0') > 0 then
+    redis.call('hincrby', KEYS[1], 'probes', -1)
+end
+return 1
+"""
+
+
+class LocalBreakerState:
+    """Estado do breaker em memória, usado sem Redis (ou com o Redis inacessível)."""
+
+    def __init__(self, policy: CircuitBreakerPolicy):
+        self.policy = policy
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.trips = 0
+        self.probes = 0
+        self.probe_ok = 0
+        self.probe_expires = 0.0
+        self.ring: dict[int, tuple[int, int, int]] = {}
+
+    def acquire(self, now: float) -> tuple[str, str, float]:
+        if self.state == CLOSED:
+            return ALLOW, self.state, self.open_until
+        if self.state == OPEN:
+            if now < self.open_until:
+                return REJECT, self.state, self.open_until
+            self.state = HALF_OPEN
+            self.probes = self.probe_ok = 0
+        if self.probes >= self.policy.half_open_probes:
+            if now < self.probe_expires:
+                return REJECT, self.state, self.open_until
+            self.probes = self.probe_ok = 0
+        self.probes += 1
+        self.probe_expires = now + self.policy.reset_timeout
+        return PROBE, self.state, self.open_until
+
+    def release_probe(self):
+        if self.state == HALF_OPEN and self.probes > 0:
+            self.probes -= 1
+
+    def _trip(self, now: float, trips: int):
+        self.state = OPEN
+        self.trips = trips
+        self.open_until = now + self.policy.open_timeout(trips)
+
+    def record(self, now: float, success: bool, probe: bool) -> tuple[str, float]:
+        policy = self.policy
+        if probe:
+            if self.state == HALF_OPEN:
+                if not success:
+                    self._trip(now, self.trips + 1)
+                else:
+                    self.probe_ok += 1
+                    if self.probe_ok >= policy.half_open_probes:
+                        self.state = CLOSED
+                        self.trips = self.probes = self.probe_ok = 0
+                        self.ring.clear()
+        elif self.state == CLOSED:
+            bucket = policy.bucket(now)
+            index = bucket % policy.buckets
+            stamp, calls, failures = self.ring.get(index, (bucket, 0, 0))
+            if stamp != bucket:
+                calls = failures = 0
+            self.ring[index] = (bucket, calls + 1, failures + (not success))
+            if not success:
+                window = [item for item in self.ring.values() if bucket - item[0] < policy.buckets]
+                calls = sum(item[1] for item in window)
+                failures = sum(item[2] for item in window)
+                if failures >= policy.fail_max and failures / calls >= policy.failure_rate:
+                    self._trip(now, 0)
+        return self.state, self.open_until
+
 
 class AsyncCircuitBreaker:
-    def __init__(self, fail_max: int = 3, reset_timeout: int = 10):
-        self.fail_max = fail_max
-        self.reset_timeout = reset_timeout
-        self.failure_count = 0
-        self.last_failure_time = 0
-        self.state = 'closed'  # closed, open
+    """
+    Circuit breaker para chamadas assíncronas.
+
+    Com `name`, o estado é compartilhado entre todos os processos via Redis:
+    poucas falhas em qualquer worker abrem o circuito para a frota inteira. Se o
+    Redis estiver inacessível, o breaker segue com o estado local deste processo e
+    volta a consultar o Redis após REDIS_RETRY_INTERVAL.
+
+    As transições de estado observadas por este processo são contadas em
+    `metrics` e repassadas aos listeners, chamados com (nome, anterior, novo).
+
+    Exceções em `exclude` (ex.: produto inexistente) são erros do chamador, não da
+    API: são repassadas sem contar como falha.
+    """
+
+    def __init__(
+        self,
+        policy: Optional[CircuitBreakerPolicy] = None,
+        name: Optional[str] = None,
+        shared: bool = True,
+        exclude: tuple[type[Exception], ...] = (),
+    ):
+        self.policy = policy or CircuitBreakerPolicy()
+        self.name = name or 'default'
+        self.redis_key = f'breaker:{name}' if name else None
+        self.shared = shared and name is not None
+        self.exclude = exclude
+        self.local = LocalBreakerState(self.policy)
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.metrics = CircuitBreakerMetrics()
+        self.listeners: list[Callable[[str, str, str], None]] = []
+        self.clock: Callable[[], float] = time.time
+        self._redis_retry_at = 0.0
+
+    @property
+    def fail_max(self) -> int:
+        return self.policy.fail_max
+
+    @property
+    def reset_timeout(self) -> float:
+        return self.policy.reset_timeout
+
+    def add_listener(self, listener: Callable[[str, str, str], None]):
+        self.listeners.append(listener)
+
+    async def _run_shared(self, script: str, *args) -> Optional[list]:
+        if not self.shared or self.redis_key is None or time.monotonic() < self._redis_retry_at:
+            return None
+
+        result = await run_script(script, [self.redis_key], list(args))
+        if not result:
+            self._redis_retry_at = time.monotonic() + REDIS_RETRY_INTERVAL
+            logger.warning('Circuit breaker: Redis indisponível, usando estado local')
+            return None
+        return result
+
+    def _observe(self, state: str, open_until: Any):
+        self.open_until = float(open_until)
+        if state == self.state:
+            return
+
+        previous, self.state = self.state, state
+        self.metrics.transitions[f'{previous}->{state}'] += 1
+        if state == OPEN:
+            logger.warning(
+                f'Circuit breaker {self.name}: {previous} -> open por '
+                f'{self.open_until - self.clock():.0f}s'
+            )
+        else:
+            logger.info(f'Circuit breaker {self.name}: {previous} -> {state}')
+
+        for listener in self.listeners:
+            try:
+                listener(self.name, previous, state)
+            except Exception as e:
+                logger.error(f'Erro no listener do circuit breaker {self.name}: {e}')
+
+    async def _acquire(self, now: float) -> str:
+        result = await self._run_shared(
+            ACQUIRE_SCRIPT, now, self.policy.half_open_probes, self.policy.reset_timeout
+        )
+        decision, state, open_until = result or self.local.acquire(now)
+        self._observe(state, open_until)
+        return decision
+
+    async def _record(self, success: bool, probe: bool):
+        now = self.clock()
+        policy = self.policy
+        result = await self._run_shared(
+            RECORD_SCRIPT,
+            now,
+            int(success),
+            int(probe),
+            policy.half_open_probes,
+            policy.fail_max,
+            policy.failure_rate,
+            policy.bucket(now),
+            policy.buckets,
+            policy.reset_timeout,
+            policy.max_reset_timeout,
+            SHARED_STATE_TTL,
+        )
+        state, open_until = result or self.local.record(now, success, probe)
+        self._observe(state, open_until)
+
+    async def _release_probe(self):
+        # Sem o prazo da requisição: a sonda pode ter sido cancelada justamente por ele
+        token = deadline_var.set(None)
+        try:
+            if await self._run_shared(RELEASE_PROBE_SCRIPT) is None:
+                self.local.release_probe()
+        finally:
+            deadline_var.reset(token)
 
     async def call(self, func: Callable, *args, **kwargs) -> Any:
-        if self.state == 'open':
-            current_time = time.time()
-            if current_time - self.last_failure_time >= self.reset_timeout:
-                logger.info('Circuit breaker: tempo de reset atingido, tentando fechar')
-                self.state = 'closed'
-                self.failure_count = 0
-            else:
-                logger.info(f'Circuit breaker aberto! Aguardando {self.reset_timeout}s para reset')
-                raise pybreaker.CircuitBreakerError('Circuit breaker está aberto')
+        decision = await self._acquire(self.clock())
+        if decision == REJECT:
+            self.metrics.rejected += 1
+            logger.debug(f'Circuit breaker {self.name} aberto; chamada rejeitada')
+            raise pybreaker.CircuitBreakerError('Circuit breaker está aberto')
 
+        probe = decision == PROBE
+        self.metrics.calls += 1
+        self.metrics.probes += probe
         try:
             result = await func(*args, **kwargs)
-            self.failure_count = 0
-            return result
+        except self.exclude:
+            await self._record(success=True, probe=probe)
+            raise
         except Exception as e:
-            self.failure_count += 1
-            self.last_failure_time = time.time()
-
-            if self.failure_count >= self.fail_max:
-                self.state = 'open'
-                logger.warning(f'Circuit breaker aberto após {self.failure_count} falhas')
-
+            self.metrics.failures += 1
+            await self._record(success=False, probe=probe)
             raise e
+        except asyncio.CancelledError:
+            if probe:
+                await self._release_probe()
+            raise
+
+        await self._record(success=True, probe=probe)
+        return result
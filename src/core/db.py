@@ -1,10 +1,322 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import itertools
+import logging
+import math
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
 
+from sqlalchemy import event, make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .cache import TieredCache
+from .deadline import DeadlineExceededError, deadline_var, remaining
+from .metrics import (
+    UNMATCHED_ROUTE,
+    db_n_plus_one_suspects,
+    db_pool,
+    db_pool_wait_seconds,
+    db_queries_per_request,
+    db_query_seconds,
+    registry,
+    sql_operation,
+)
 from .settings import Settings
 
-engine = create_async_engine(Settings().DATABASE_URL)
+logger = logging.getLogger('uvicorn')
+
+settings = Settings()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Pool padrão do engine assíncrono que mede a espera por uma conexão livre."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_wait_seconds.observe(time.perf_counter() - start)
+
+
+def engine_options(database_url: str) -> dict:
+    """
+    Opções do engine vindas de Settings (DB_POOL_*, DB_PREPARE_THRESHOLD).
+
+    O SQLite (testes, benchmarks locais) mantém o pool padrão do SQLAlchemy.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite':
+        return {}
+
+    options = {
+        'poolclass': TimedQueuePool,
+        'pool_size': settings.DB_POOL_SIZE,
+        'max_overflow': settings.DB_MAX_OVERFLOW,
+        'pool_timeout': settings.DB_POOL_TIMEOUT,
+        'pool_recycle': settings.DB_POOL_RECYCLE,
+        'pool_pre_ping': settings.DB_POOL_PRE_PING,
+    }
+    if url.get_driver_name() == 'psycopg':
+        # Consultas executadas DB_PREPARE_THRESHOLD vezes na conexão viram prepared
+        # statements no servidor; negativo desativa (ex.: PgBouncer antigo em modo
+        # transaction)
+        threshold = settings.DB_PREPARE_THRESHOLD
+        options['connect_args'] = {'prepare_threshold': threshold if threshold >= 0 else None}
+    return options
+
+
+engine = create_async_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL))
+# Réplicas de leitura (READ_REPLICA_URLS); sem réplicas, tudo vai ao primário
+replica_engines = [
+    create_async_engine(url, **engine_options(url)) for url in settings.READ_REPLICA_URLS
+]
+
+
+def pool_status(async_engine=engine) -> dict:
+    """Ocupação do pool de conexões: tamanho, em uso, overflow e livres."""
+    pool = async_engine.pool
+    status = {}
+    for name in ('size', 'checkedout', 'overflow', 'checkedin'):
+        method = getattr(pool, name, None)
+        if method is not None:
+            status[name] = method()
+    return status
+
+
+@registry.on_collect
+def collect_pool_metrics():
+    for name, value in pool_status().items():
+        db_pool.set(value, name)
+
+
+@dataclass
+class QueryStats:
+    """Consultas executadas em um escopo (uma requisição HTTP, um teste...)."""
+
+    count: int = 0
+    seconds: float = 0.0
+    statements: Counter = field(default_factory=Counter)
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Consultas idênticas executadas ao menos `threshold` vezes (suspeitas de N+1)."""
+        return [(stmt, count) for stmt, count in self.statements.items() if count >= threshold]
+
+
+query_stats_var: ContextVar[Optional[QueryStats]] = ContextVar('query_stats', default=None)
+
+
+@contextmanager
+def track_queries():
+    """Conta as consultas executadas dentro do bloco (inclusive em tarefas filhas)."""
+    stats = QueryStats()
+    token = query_stats_var.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats_var.reset(token)
+
+
+def parameters_shape(parameters: Any) -> str:
+    """Tipos dos parâmetros de uma consulta, sem os valores (que podem ter dados pessoais)."""
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f'{k}: {type(v).__name__}' for k, v in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return f'{len(parameters)} x {parameters_shape(parameters[0])}'
+        return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+    return type(parameters).__name__
+
+
+# Opção de execução dos comandos da própria infraestrutura (ex.: SET LOCAL
+# statement_timeout), que não contam como consultas da aplicação
+INTERNAL_QUERY = 'internal_query'
+# SQLSTATE do PostgreSQL para consulta cancelada (statement_timeout)
+QUERY_CANCELED = '57014'
+
+
+def is_internal_query(context) -> bool:
+    return context is not None and bool(context.execution_options.get(INTERNAL_QUERY))
+
+
+def apply_statement_timeout(conn):
+    """
+    Limita as consultas da transação ao prazo restante da requisição.
+
+    No PostgreSQL vira um SET LOCAL statement_timeout (vale só para a transação);
+    no SQLite o prazo é garantido apenas pelo cancelamento da requisição.
+    """
+    budget = remaining()
+    if budget is not None and conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql(
+            f'SET LOCAL statement_timeout = {max(1, int(budget * 1000))}',
+            execution_options={INTERNAL_QUERY: True},
+        )
+
+
+def raise_deadline_exceeded(context):
+    """Consulta cancelada pelo statement_timeout da requisição: vira DeadlineExceededError."""
+    error = context.original_exception
+    if getattr(error, 'sqlstate', None) == QUERY_CANCELED and deadline_var.get() is not None:
+        raise DeadlineExceededError('Prazo da requisição esgotado no banco') from error
+
+
+def apply_deadlines(async_engine):
+    """
+    Aplica o prazo da requisição às transações do engine (statement_timeout) e
+    converte os cancelamentos em DeadlineExceededError, respondido com 504.
+    """
+    event.listen(async_engine.sync_engine, 'begin', apply_statement_timeout)
+    event.listen(async_engine.sync_engine, 'handle_error', raise_deadline_exceeded)
+
+
+for _engine in (engine, *replica_engines):
+    apply_deadlines(_engine)
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, *args):
+    context._query_start = time.perf_counter()
+
+
+def observe_query_time(conn, cursor, statement, parameters, context, *args):
+    if is_internal_query(context):
+        return
+
+    elapsed = time.perf_counter() - context._query_start
+    db_query_seconds.observe(elapsed, sql_operation(statement))
+
+    stats = query_stats_var.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+        stats.statements[statement] += 1
+
+    if elapsed >= settings.DB_SLOW_QUERY_THRESHOLD:
+        logger.warning(
+            f'Consulta lenta ({elapsed:.3f}s): {statement} | parâmetros: '
+            f'{parameters_shape(parameters)}'
+        )
+
+
+def track_query_times(async_engine):
+    """
+    Mede a duração das consultas do engine (db_query_duration_seconds), soma-as
+    ao QueryStats do escopo corrente e registra as mais lentas que
+    DB_SLOW_QUERY_THRESHOLD.
+    """
+    event.listen(async_engine.sync_engine, 'before_cursor_execute', start_query_timer)
+    event.listen(async_engine.sync_engine, 'after_cursor_execute', observe_query_time)
+
+
+for _engine in (engine, *replica_engines):
+    track_query_times(_engine)
 
 
 async def get_session():
     async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
+
+
+COMMITTED = 'committed'
+
+
+@event.listens_for(Session, 'after_commit')
+def mark_committed(session):
+    """Sinaliza em `session.info` que a sessão gravou algo (ver mark_write)."""
+    session.info[COMMITTED] = True
+
+
+# Quem gravou há pouco lê do primário por READ_YOUR_WRITES_WINDOW segundos, até a
+# réplica alcançá-lo; no Redis para valer em todos os workers
+recent_writers = TieredCache(
+    'recent_write',
+    redis_ttl=math.ceil(settings.READ_YOUR_WRITES_WINDOW),
+    local_ttl=settings.READ_YOUR_WRITES_WINDOW,
+    local_maxsize=10_000,
+)
+_replica_turn = itertools.count()
+
+
+async def mark_write(subject: str):
+    """Leva as próximas leituras de `subject` (email do token) ao primário."""
+    if replica_engines:
+        await recent_writers.set(subject, 1)
+
+
+async def read_engine(subject: Optional[str] = None) -> Optional[AsyncEngine]:
+    """
+    Réplica que atende a próxima leitura, em rodízio.
+
+    Returns:
+        AsyncEngine: A réplica da vez; None para ler do primário (sem réplicas ou
+        `subject` gravou dentro da janela de read-your-writes)
+    """
+    if not replica_engines:
+        return None
+    if subject is not None and await recent_writers.get(subject) is not None:
+        return None
+    return replica_engines[next(_replica_turn) % len(replica_engines)]
+
+
+def get_session_factory() -> async_sessionmaker[AsyncSession]:
+    """
+    Fábrica de sessões para respostas em streaming.
+
+    A sessão de get_session é fechada antes de o corpo de um StreamingResponse ser
+    enviado, então o gerador precisa abrir (e fechar) a própria sessão.
+    """
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+def dialect_insert(session: AsyncSession, table):
+    """
+    INSERT do dialeto em uso (PostgreSQL ou SQLite), que suporta ON CONFLICT.
+    """
+    if session.get_bind().dialect.name == 'sqlite':
+        return sqlite.insert(table)
+    return postgresql.insert(table)
+
+
+class QueryStatsMiddleware:
+    """
+    Middleware ASGI que conta as consultas SQL de cada requisição.
+
+    A contagem vai para db_queries_per_request. Uma mesma consulta repetida ao
+    menos DB_N_PLUS_ONE_THRESHOLD vezes na requisição é registrada como suspeita
+    de N+1 (log e db_n_plus_one_suspects_total).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with track_queries() as stats:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.report(scope, stats)
+
+    @staticmethod
+    def report(scope, stats: QueryStats):
+        path = getattr(scope.get('route'), 'path', UNMATCHED_ROUTE)
+        db_queries_per_request.observe(stats.count, scope['method'], path)
+
+        for statement, count in stats.repeated(settings.DB_N_PLUS_ONE_THRESHOLD):
+            db_n_plus_one_suspects.inc(scope['method'], path)
+            logger.warning(
+                f'Possível N+1 em {scope["method"]} {path}: consulta repetida {count}x: {statement}'
+            )
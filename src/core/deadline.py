@@ -0,0 +1,118 @@
+"""
+Prazo (deadline) por requisição, propagado via contextvar.
+
+O DeadlineMiddleware define o prazo de cada requisição HTTP: o cabeçalho
+X-Request-Timeout (segundos) pode encurtar o orçamento padrão da rota, mas nunca
+estendê-lo. As chamadas ao banco, ao Redis e à API de produtos usam `remaining()`
+para limitar os próprios timeouts ao que sobra do orçamento, e a requisição é
+cancelada com 504 quando o prazo acaba.
+"""
+
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from http import HTTPStatus
+from typing import Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger('uvicorn')
+
+DEADLINE_HEADER = 'x-request-timeout'
+
+# Instante (time.monotonic) em que o orçamento da requisição corrente acaba
+deadline_var: ContextVar[Optional[float]] = ContextVar('deadline', default=None)
+
+
+class DeadlineExceededError(Exception):
+    pass
+
+
+def remaining(cap: Optional[float] = None) -> Optional[float]:
+    """
+    Segundos restantes até o prazo, limitados a `cap`.
+
+    Returns:
+        float: O menor entre o tempo restante e `cap`; `cap` se não houver prazo
+
+    Raises:
+        DeadlineExceededError: O prazo já acabou
+    """
+    deadline = deadline_var.get()
+    if deadline is None:
+        return cap
+
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceededError('Prazo da requisição esgotado')
+    return left if cap is None else min(left, cap)
+
+
+def deadline_exceeded_response() -> JSONResponse:
+    return JSONResponse(
+        {'detail': 'Request deadline exceeded'}, status_code=HTTPStatus.GATEWAY_TIMEOUT
+    )
+
+
+class DeadlineMiddleware:
+    """
+    Middleware ASGI que aplica o prazo da requisição.
+
+    `routes` sobrescreve o orçamento padrão por caminho; 0 desativa o prazo (ex.:
+    respostas em streaming longas).
+    """
+
+    def __init__(self, app, default: float, routes: Optional[Dict[str, float]] = None):
+        self.app = app
+        self.default = default
+        self.routes = routes or {}
+
+    def budget(self, scope) -> Optional[float]:
+        budget = self.routes.get(scope['path'], self.default)
+        if budget <= 0:
+            return None
+
+        for name, value in scope['headers']:
+            if name.decode('latin-1') == DEADLINE_HEADER:
+                try:
+                    requested = float(value)
+                except ValueError:
+                    break
+                if requested > 0:
+                    budget = min(budget, requested)
+                break
+        return budget
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        budget = self.budget(scope)
+        if budget is None:
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+
+        async def send_wrapper(message):
+            nonlocal response_started
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        token = deadline_var.set(time.monotonic() + budget)
+        timeout = asyncio.timeout(budget)
+        try:
+            async with timeout:
+                await self.app(scope, receive, send_wrapper)
+        except TimeoutError:
+            if not timeout.expired():
+                raise
+            logger.warning(f'Prazo de {budget:.2f}s esgotado em {scope["path"]}')
+            if response_started:
+                raise
+            await deadline_exceeded_response()(scope, receive, send)
+        finally:
+            deadline_var.reset(token)
@@ -0,0 +1,62 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Literal, Optional
+
+ExecutorMode = Literal['inline', 'thread', 'process']
+
+
+class ExecutorSaturatedError(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """
+    Executa funções bloqueantes (CPU) fora do event loop.
+
+    O número de tarefas pendentes (em execução + na fila) é limitado por
+    `max_pending`; acima disso a chamada falha imediatamente com
+    ExecutorSaturatedError em vez de acumular fila.
+    """
+
+    def __init__(self, mode: ExecutorMode = 'thread', max_workers: int = 4, max_pending: int = 32):
+        self.mode = mode
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.mode == 'process':
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix='bounded-executor'
+                )
+        return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        if self.mode == 'inline':
+            return func(*args, **kwargs)
+
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorSaturatedError(f'Fila cheia ({self.pending}/{self.max_pending})')
+
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), partial(func, *args, **kwargs))
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,79 @@
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+from .settings import Settings
+
+settings = Settings()
+
+
+class HttpClient:
+    """
+    ClientSession compartilhada pela aplicação.
+
+    Reaproveita conexões (keep-alive) e respostas de DNS entre as chamadas à API
+    de produtos. É aberta e fechada no lifespan do FastAPI; fora dele (scripts,
+    testes) a sessão é criada sob demanda no event loop corrente. Uma sessão
+    aberta pertence ao seu event loop: para usar o cliente em outro, feche-a antes
+    com close().
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 20,
+        keepalive_timeout: float = 30,
+        ttl_dns_cache: int = 300,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+            use_dns_cache=True,
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+            self._loop = loop
+        elif self._loop is not loop:
+            # Substituí-la aqui vazaria a sessão antiga e o seu connector
+            raise RuntimeError('ClientSession aberta em outro event loop; chame close() antes')
+        return self._session
+
+    def set_session(self, session: Optional[aiohttp.ClientSession]):
+        """Substitui a sessão usada pela aplicação (ex.: apontar para um servidor local)."""
+        self._session = session
+        self._loop = asyncio.get_running_loop() if session is not None else None
+
+    async def start(self):
+        await self.close()
+        self._session = self._create_session()
+        self._loop = asyncio.get_running_loop()
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+http_client = HttpClient(
+    limit=settings.HTTP_POOL_LIMIT,
+    limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+    keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+    ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+)
@@ -0,0 +1,338 @@
+"""
+Métricas da aplicação no formato texto do Prometheus, sem dependências externas.
+
+Contadores, gauges e histogramas guardam um valor por combinação de labels em
+um dict comum: a aplicação roda em um único event loop, então o registro é uma
+soma sem lock nem alocação além da tupla de labels. Estado mantido por outros
+objetos (circuit breaker, bulkhead, caches) é copiado para as métricas só na
+hora da coleta, pelos coletores registrados com `registry.on_collect`.
+"""
+
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Iterable
+
+# Latências de 1 ms a 10 s (requisições, consultas SQL e API de produtos)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Comandos do Redis são bem mais rápidos
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = ','.join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return f'{{{pairs}}}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for labels, value in self._values.items():
+            lines.append(
+                f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}'
+            )
+        return lines
+
+    def get(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def clear(self):
+        self._values.clear()
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def set(self, value: float, *labels):
+        """Espelha um contador cumulativo mantido por outro objeto (usar na coleta)."""
+        self._values[labels] = value
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1):
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, *labels):
+        self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        # Por combinação de labels: [contagem por bucket (+Inf no fim), soma]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def sum(self, *labels) -> float:
+        series = self._series.get(labels)
+        return series[1] if series else 0.0
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        names = (*self.labelnames, 'le')
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{_format_labels(names, (*labels, _format_value(bound)))} '
+                    f'{cumulative}'
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f'{self.name}_sum{label_text} {_format_value(total)}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+    def clear(self):
+        self._series.clear()
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+        self._collectors: list[Callable[[], None]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f'Métrica {metric.name} já registrada')
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def on_collect(self, collector: Callable[[], None]):
+        """Registra uma função chamada a cada coleta para atualizar métricas derivadas."""
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+http_request_seconds = registry.histogram(
+    'http_request_duration_seconds',
+    'Duração das requisições HTTP por rota.',
+    ('method', 'route', 'status'),
+)
+http_requests_in_flight = registry.gauge(
+    'http_requests_in_flight', 'Requisições HTTP em andamento por método.', ('method',)
+)
+db_query_seconds = registry.histogram(
+    'db_query_duration_seconds', 'Duração das consultas SQL por operação.', ('operation',)
+)
+db_pool = registry.gauge(
+    'db_pool_connections',
+    'Conexões do pool: size, checkedout (em uso), overflow e checkedin (livres).',
+    ('state',),
+)
+db_pool_wait_seconds = registry.histogram(
+    'db_pool_wait_seconds', 'Espera por uma conexão livre no pool.', (), FAST_BUCKETS
+)
+db_queries_per_request = registry.histogram(
+    'db_queries_per_request',
+    'Consultas SQL executadas por requisição.',
+    ('method', 'route'),
+    (0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+db_n_plus_one_suspects = registry.counter(
+    'db_n_plus_one_suspects_total',
+    'Consultas repetidas na mesma requisição (suspeitas de N+1).',
+    ('method', 'route'),
+)
+redis_command_seconds = registry.histogram(
+    'redis_command_duration_seconds',
+    'Duração dos comandos do Redis por comando e resultado.',
+    ('command', 'outcome'),
+    FAST_BUCKETS,
+)
+
+upstream_request_seconds = registry.histogram(
+    'upstream_request_duration_seconds',
+    'Duração das chamadas à API de produtos por resultado.',
+    ('outcome',),
+)
+cache_hits = registry.counter(
+    'cache_hits_total', 'Leituras atendidas pelo cache, por camada.', ('cache', 'layer')
+)
+cache_misses = registry.counter('cache_misses_total', 'Leituras não atendidas.', ('cache',))
+cache_hit_ratio = registry.gauge('cache_hit_ratio', 'Fração das leituras atendidas.', ('cache',))
+cache_lookup_seconds = registry.histogram(
+    'cache_lookup_duration_seconds',
+    'Duração das leituras por cache e resultado (hit: atendida pelo cache; miss: pela origem).',
+    ('cache', 'result'),
+)
+breaker_state = registry.gauge(
+    'circuit_breaker_state', 'Estado do circuit breaker (0 closed, 1 half_open, 2 open).', ('name',)
+)
+breaker_calls = registry.counter(
+    'circuit_breaker_calls_total', 'Chamadas por resultado no circuit breaker.', ('name', 'result')
+)
+breaker_transitions = registry.counter(
+    'circuit_breaker_transitions_total',
+    'Transições de estado observadas por este processo.',
+    ('name', 'transition'),
+)
+bulkhead_gauge = registry.gauge(
+    'bulkhead', 'Chamadas em andamento, na fila e limite atual.', ('name', 'field')
+)
+bulkhead_rejected = registry.counter(
+    'bulkhead_rejected_total', 'Chamadas recusadas por fila cheia ou espera.', ('name', 'reason')
+)
+
+BREAKER_STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+
+
+def track_cache(name: str, stats):
+    """
+    Exporta um CacheStats: acertos e falhas a cada coleta e, a partir daqui, a
+    latência de cada leitura registrada com `stats.observe` (cache_lookup_duration_seconds).
+    """
+    stats.name = name
+
+    @registry.on_collect
+    def collect():
+        cache_hits.set(stats.local_hits, name, 'local')
+        cache_hits.set(stats.redis_hits, name, 'redis')
+        cache_misses.set(stats.misses, name)
+        cache_hit_ratio.set(stats.hit_ratio, name)
+
+
+def track_circuit_breaker(breaker):
+    """Exporta estado, chamadas e transições de um AsyncCircuitBreaker a cada coleta."""
+
+    @registry.on_collect
+    def collect():
+        metrics = breaker.metrics
+        breaker_state.set(BREAKER_STATES.get(breaker.state, -1), breaker.name)
+        breaker_calls.set(metrics.calls - metrics.failures, breaker.name, 'success')
+        breaker_calls.set(metrics.failures, breaker.name, 'failure')
+        breaker_calls.set(metrics.rejected, breaker.name, 'rejected')
+        for transition, count in metrics.transitions.items():
+            breaker_transitions.set(count, breaker.name, transition)
+
+
+def track_bulkhead(name: str, bulkhead):
+    """Exporta ocupação, fila, limite e recusas de um Bulkhead a cada coleta."""
+
+    @registry.on_collect
+    def collect():
+        bulkhead_gauge.set(bulkhead.in_flight, name, 'in_flight')
+        bulkhead_gauge.set(bulkhead.queued, name, 'queued')
+        bulkhead_gauge.set(bulkhead.limit, name, 'limit')
+        bulkhead_rejected.set(bulkhead.rejected, name, 'queue_full')
+        bulkhead_rejected.set(bulkhead.timeouts, name, 'queue_timeout')
+
+
+UNMATCHED_ROUTE = 'unmatched'
+SQL_OPERATIONS = frozenset({'SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'})
+
+
+def sql_operation(statement: str) -> str:
+    """Primeira palavra da consulta (SELECT, INSERT...), para limitar a cardinalidade."""
+    words = statement[:12].split(None, 1)
+    operation = words[0].upper() if words else ''
+    return operation if operation in SQL_OPERATIONS else 'OTHER'
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede a duração por rota e as requisições em andamento por método.
+
+    A rota é o caminho declarado (ex.: /wishlists/pending/{pending_id}), nunca o
+    caminho da requisição, para que IDs não multipliquem as séries. Ela é lida de
+    scope['route'], preenchido pelo roteador, depois que a requisição termina, sem
+    percorrer as rotas de novo.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get('route'), 'path', UNMATCHED_ROUTE)
+            http_request_seconds.observe(time.perf_counter() - start, method, route, str(status))
+            http_requests_in_flight.dec(method)
@@ -0,0 +1,46 @@
+import base64
+import json
+from datetime import datetime
+from http import HTTPStatus
+from typing import Any, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+
+from ..schemas.common import FilterPage
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    payload = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+
+
+def paginate(query: Select, page: FilterPage, created_at_column: Any, id_column: Any) -> Select:
+    """
+    Aplica ordenação determinística por (created_at, id) e a paginação.
+
+    Com `after`, usa keyset pagination (WHERE (created_at, id) > cursor), cujo
+    custo não cresce com a profundidade da página; sem ele, mantém offset/limit.
+    """
+    query = query.order_by(created_at_column, id_column).limit(page.limit)
+    if page.after:
+        created_at, row_id = decode_cursor(page.after)
+        return query.where(tuple_(created_at_column, id_column) > tuple_(created_at, row_id))
+    return query.offset(page.offset)
+
+
+def next_cursor(rows: Sequence, page: FilterPage) -> Optional[str]:
+    """Cursor da próxima página, a partir do último item (com created_at e id) retornado."""
+    if not rows or len(rows) < page.limit:
+        return None
+    last = rows[-1]
+    return encode_cursor(last.created_at, last.id)
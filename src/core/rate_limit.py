@@ -0,0 +1,25 @@
+import asyncio
+import time
+
+
+class RateLimiter:
+    """
+    Limita a taxa de chamadas a `rate` por segundo, espaçando-as uniformemente.
+
+    Cada acquire() reserva o próximo horário livre e dorme até ele; chamadas
+    concorrentes saem uma a cada 1/rate segundos. Com rate <= 0 não há limite.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self):
+        if not self.interval:
+            return
+
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
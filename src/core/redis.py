@@ -1,21 +1,60 @@
+import asyncio
+import hashlib
 import json
 import logging
-from typing import Any, Dict, List, Optional, Union
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 
 import redis.asyncio as redis
 from redis.asyncio.connection import ConnectionPool
+from redis.exceptions import NoScriptError
 
+from .deadline import remaining
+from .metrics import redis_command_seconds
 from .settings import Settings
 
 logger = logging.getLogger('uvicorn')
 
 # Redis configuration
-REDIS_HOST = Settings().REDIS_HOST
-REDIS_PORT = Settings().REDIS_PORT
-REDIS_DB = Settings().REDIS_DB
+settings = Settings()
+REDIS_HOST = settings.REDIS_HOST
+REDIS_PORT = settings.REDIS_PORT
+REDIS_DB = settings.REDIS_DB
 
 # Initialize Redis connection pool
-redis_pool = ConnectionPool(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
+redis_pool = ConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB,
+    decode_responses=True,
+    socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+)
+
+
+class RedisCommand:
+    """Aplica o timeout do comando e mede sua duração (redis_command_duration_seconds)."""
+
+    __slots__ = ('command', 'start', 'timeout')
+
+    def __init__(self, command: str):
+        self.command = command
+
+    async def __aenter__(self):
+        self.timeout = asyncio.timeout(remaining(settings.REDIS_COMMAND_TIMEOUT))
+        await self.timeout.__aenter__()
+        self.start = time.perf_counter()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        redis_command_seconds.observe(
+            time.perf_counter() - self.start, self.command, 'ok' if exc_type is None else 'error'
+        )
+        return await self.timeout.__aexit__(exc_type, exc, tb)
+
+
+def command_timeout(command: str) -> RedisCommand:
+    """Timeout de um comando: REDIS_COMMAND_TIMEOUT, limitado ao prazo da requisição."""
+    return RedisCommand(command)
 
 
 async def get_redis_client() -> redis.Redis:
@@ -26,8 +65,9 @@ async def get_redis_client() -> redis.Redis:
 async def get_key(key: str) -> Optional[str]:
     """Busca um valor no Redis pelo nome da chave."""
     try:
-        client = await get_redis_client()
-        return await client.get(key)
+        async with command_timeout('get'):
+            client = await get_redis_client()
+            return await client.get(key)
     except Exception as e:
         logger.error(f"Erro ao buscar chave '{key}' no Redis: {e}")
         return None
@@ -46,9 +86,10 @@ async def set_key(key: str, value: str, expiry: Optional[int] = None) -> bool:
         bool: True se a operação foi bem-sucedida, False caso contrário
     """
     try:
-        client = await get_redis_client()
-        await client.set(key, value, ex=expiry)
-        return True
+        async with command_timeout('set'):
+            client = await get_redis_client()
+            await client.set(key, value, ex=expiry)
+            return True
     except Exception as e:
         logger.error(f"Erro ao definir chave '{key}' no Redis: {e}")
         return False
@@ -57,9 +98,10 @@ async def set_key(key: str, value: str, expiry: Optional[int] = None) -> bool:
 async def delete_key(key: str) -> bool:
     """Remove uma chave do Redis."""
     try:
-        client = await get_redis_client()
-        await client.delete(key)
-        return True
+        async with command_timeout('delete'):
+            client = await get_redis_client()
+            await client.delete(key)
+            return True
     except Exception as e:
         logger.error(f"Erro ao excluir chave '{key}' no Redis: {e}")
         return False
@@ -87,11 +129,179 @@ async def get_json(key: str) -> Optional[Any]:
         return None
 
 
+async def key_exists(key: str) -> bool:
+    """Verifica se uma chave existe no Redis."""
+    try:
+        async with command_timeout('exists'):
+            client = await get_redis_client()
+            return bool(await client.exists(key))
+    except Exception as e:
+        logger.error(f"Erro ao verificar chave '{key}' no Redis: {e}")
+        return False
+
+
+async def hget_json(key: str, field: str) -> Optional[Any]:
+    """Recupera e desserializa um campo JSON de um hash do Redis."""
+    try:
+        async with command_timeout('hget'):
+            client = await get_redis_client()
+            data = await client.hget(key, field)
+            if data:
+                return json.loads(data)
+            return None
+    except Exception as e:
+        logger.error(f"Erro ao recuperar campo '{field}' do hash '{key}': {e}")
+        return None
+
+
+async def hmget_json(key: str, fields: List[str]) -> Dict[str, Any]:
+    """Recupera vários campos JSON de um hash do Redis com um único HMGET."""
+    if not fields:
+        return {}
+    try:
+        async with command_timeout('hmget'):
+            client = await get_redis_client()
+            values = await client.hmget(key, fields)
+            return {field: json.loads(data) for field, data in zip(fields, values) if data}
+    except Exception as e:
+        logger.error(f"Erro ao recuperar campos do hash '{key}': {e}")
+        return {}
+
+
+async def mget_json(keys: List[str]) -> Dict[str, Any]:
+    """Recupera várias chaves JSON do Redis com um único MGET."""
+    if not keys:
+        return {}
+    try:
+        async with command_timeout('mget'):
+            client = await get_redis_client()
+            values = await client.mget(keys)
+            return {key: json.loads(data) for key, data in zip(keys, values) if data}
+    except Exception as e:
+        logger.error(f'Erro ao recuperar {len(keys)} chaves JSON: {e}')
+        return {}
+
+
+async def publish(channel: str, message: str) -> bool:
+    """Publica uma mensagem em um canal de pub/sub."""
+    try:
+        async with command_timeout('publish'):
+            client = await get_redis_client()
+            await client.publish(channel, message)
+            return True
+    except Exception as e:
+        logger.error(f"Erro ao publicar no canal '{channel}': {e}")
+        return False
+
+
+async def listen(channel: str) -> AsyncIterator[str]:
+    """
+    Mensagens publicadas no canal, em uma conexão dedicada do pool.
+
+    Sem timeout: a espera por mensagens é indefinida. Erros de conexão são
+    propagados para quem consome decidir como reconectar.
+    """
+    client = await get_redis_client()
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(channel)
+        async for message in pubsub.listen():
+            yield message['data']
+    finally:
+        await pubsub.aclose()
+
+
+async def incr_key(key: str, expiry: Optional[int] = None) -> Optional[int]:
+    """Incrementa um contador no Redis e, opcionalmente, renova sua expiração."""
+    try:
+        async with command_timeout('incr'):
+            client = await get_redis_client()
+            async with client.pipeline(transaction=True) as pipe:
+                pipe.incr(key)
+                if expiry:
+                    pipe.expire(key, expiry)
+                value, *_ = await pipe.execute()
+            return value
+    except Exception as e:
+        logger.error(f"Erro ao incrementar chave '{key}' no Redis: {e}")
+        return None
+
+
+_script_shas: Dict[str, str] = {}
+
+
+async def eval_script(client: redis.Redis, script: str, keys: List[str], args: List[Any]) -> Any:
+    """
+    Executa o script pelo SHA1 (EVALSHA), sem reenviar o código a cada chamada.
+
+    Se o servidor ainda não conhece o script (NOSCRIPT: primeiro uso, restart ou
+    SCRIPT FLUSH), usa EVAL, que também o deixa em cache para as próximas chamadas.
+    """
+    sha = _script_shas.get(script)
+    if sha is None:
+        sha = _script_shas[script] = hashlib.sha1(script.encode()).hexdigest()
+    try:
+        return await client.evalsha(sha, len(keys), *keys, *args)
+    except NoScriptError:
+        return await client.eval(script, len(keys), *keys, *args)
+
+
+async def run_script(script: str, keys: List[str], args: List[Any]) -> Optional[Any]:
+    """Executa um script Lua no Redis (atômico no servidor)."""
+    try:
+        async with command_timeout('evalsha'):
+            client = await get_redis_client()
+            return await eval_script(client, script, keys, args)
+    except Exception as e:
+        logger.error(f'Erro ao executar script no Redis: {e}')
+        return None
+
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+async def acquire_lock(key: str, ttl: float) -> Optional[str]:
+    """
+    Tenta obter um lock de curta duração (SET NX PX).
+
+    Returns:
+        str: Token do lock, necessário para liberá-lo. Se o Redis estiver
+        indisponível, também retorna um token (fail-open) para não travar a requisição.
+        None: O lock já pertence a outro processo.
+    """
+    token = uuid.uuid4().hex
+    try:
+        async with command_timeout('lock'):
+            client = await get_redis_client()
+            acquired = await client.set(key, token, nx=True, px=int(ttl * 1000))
+            return token if acquired else None
+    except Exception as e:
+        logger.error(f"Erro ao obter lock '{key}' no Redis: {e}")
+        return token
+
+
+async def release_lock(key: str, token: str) -> bool:
+    """Libera o lock somente se ele ainda pertencer ao token informado."""
+    try:
+        async with command_timeout('unlock'):
+            client = await get_redis_client()
+            return bool(await eval_script(client, RELEASE_LOCK_SCRIPT, [key], [token]))
+    except Exception as e:
+        logger.error(f"Erro ao liberar lock '{key}' no Redis: {e}")
+        return False
+
+
 async def health_check() -> bool:
     """Verifica se a conexão com o Redis está funcionando."""
     try:
-        client = await get_redis_client()
-        return await client.ping()
+        async with command_timeout('ping'):
+            client = await get_redis_client()
+            return await client.ping()
     except Exception as e:
         logger.error(f'Erro na verificação de saúde do Redis: {e}')
         return False
@@ -0,0 +1,31 @@
+"""
+Resposta JSON serializada pelo pydantic-core, sem passar pelo response_model.
+
+Quando uma rota devolve dicts, o FastAPI valida o conteúdo contra o
+response_model, converte o resultado para tipos JSON e só então chama o
+json.dumps da stdlib: três passadas sobre cada item. Nas listagens
+(GET /wishlists/, GET /users/) os dicts já saem do banco no formato do modelo, então
+a rota devolve FastJSONResponse e o conteúdo é serializado uma única vez pelo
+`to_json` do pydantic-core (em Rust, sem dependência nova). O response_model da
+rota continua valendo para a documentação.
+"""
+
+from typing import Any
+
+from pydantic_core import to_json
+from starlette.responses import JSONResponse
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse serializada com pydantic_core.to_json.
+
+    `content` em bytes é enviado como está (JSON já serializado, ex.: vindo do
+    cache); o conteúdo não é validado, então precisa ter o formato do response_model.
+    """
+
+    @staticmethod
+    def render(content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return to_json(content)
@@ -1,53 +1,131 @@
 from datetime import datetime, timedelta
 from http import HTTPStatus
+from typing import Optional
 from zoneinfo import ZoneInfo
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
 from pwdlib import PasswordHash
-from sqlalchemy import select
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.user import User
-from .db import get_session
+from ..schemas.auth import Principal
+from .cache import TieredCache
+from .db import COMMITTED, get_session, mark_write, read_engine
+from .executor import BoundedExecutor, ExecutorSaturatedError
+from .metrics import track_cache
 from .settings import Settings
 
 settings = Settings()
 pwd_context = PasswordHash.recommended()
 
+# Argon2 é CPU-bound: hash e verificação rodam fora do event loop
+password_executor = BoundedExecutor(
+    mode=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+# Cache do usuário autenticado, indexado pelo 'sub' do token (email)
+principal_cache = TieredCache(
+    'principal',
+    redis_ttl=settings.PRINCIPAL_CACHE_TTL,
+    local_ttl=settings.PRINCIPAL_CACHE_LOCAL_TTL,
+    local_maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    # Usuário removido ou renomeado sai na hora da camada local de todos os workers
+    broadcast_invalidations=True,
+)
+track_cache('principal', principal_cache.stats)
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
+# Mesmo token, mas opcional: só escolhe a sessão, quem exige login é get_current_user
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token', auto_error=False)
 
 
-async def get_current_user(
+def token_subject(token: Optional[str]) -> Optional[str]:
+    """'sub' (email) de um token válido; None se ausente, inválido ou expirado."""
+    if not token:
+        return None
+    try:
+        payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except (DecodeError, ExpiredSignatureError):
+        return None
+    return payload.get('sub')
+
+
+async def get_read_session(
     session: AsyncSession = Depends(get_session),
-    token: str = Depends(oauth2_scheme),
+    token: Optional[str] = Depends(optional_oauth2_scheme),
+):
+    """
+    Sessão para rotas somente leitura: uma réplica em rodízio, ou o primário se
+    não houver réplicas ou se o dono do token gravou algo há pouco.
+    """
+    replica = await read_engine(token_subject(token))
+    if replica is None:
+        yield session
+        return
+
+    async with AsyncSession(replica, expire_on_commit=False) as replica_session:
+        yield replica_session
+
+
+async def get_write_session(
+    session: AsyncSession = Depends(get_session),
+    token: Optional[str] = Depends(optional_oauth2_scheme),
 ):
+    """
+    Sessão no primário para rotas que gravam; se a requisição fizer commit, as
+    leituras seguintes do dono do token vão ao primário (read-your-writes).
+    """
+    session.info.pop(COMMITTED, None)
+    try:
+        yield session
+    finally:
+        subject = token_subject(token)
+        if subject and session.info.pop(COMMITTED, False):
+            await mark_write(subject)
+
+
+def principal_query(*criteria):
+    """Consulta apenas as colunas do Principal, sem carregar relacionamentos."""
+    return select(User.id, User.email, User.username).where(*criteria)
+
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_read_session),
+    token: str = Depends(oauth2_scheme),
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
 
-    try:
-        payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        subject_email = payload.get('sub')
+    subject_email = token_subject(token)
+    if not subject_email:
+        raise credentials_exception
 
-        if not subject_email:
-            raise credentials_exception
+    cached = await principal_cache.get(subject_email)
+    if cached is not None:
+        return Principal(**cached)
 
-    except DecodeError:
-        raise credentials_exception
+    # Executada a cada requisição com o cache frio: SELECT montado uma vez (lambda_stmt)
+    query = lambda_stmt(lambda: principal_query(User.email == subject_email))
+    row = (await session.execute(query)).first()
 
-    except ExpiredSignatureError:
+    if not row:
         raise credentials_exception
 
-    user = await session.scalar(select(User).where(User.email == subject_email))
+    principal = Principal.model_validate(row)
+    await principal_cache.set(subject_email, principal.model_dump())
+    return principal
 
-    if not user:
-        raise credentials_exception
 
-    return user
+async def invalidate_principal(email: str):
+    await principal_cache.invalidate(email)
 
 
 def create_access_token(data: dict):
@@ -66,3 +144,22 @@ def get_password_hash(password: str):
 
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+async def run_password_task(func, *args):
+    try:
+        return await password_executor.run(func, *args)
+    except ExecutorSaturatedError:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Server busy, try again later',
+            headers={'Retry-After': '1'},
+        )
+
+
+async def async_get_password_hash(password: str):
+    return await run_password_task(get_password_hash, password)
+
+
+async def async_verify_password(plain_password: str, hashed_password: str):
+    return await run_password_task(verify_password, plain_password, hashed_password)
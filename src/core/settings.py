@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,3 +14,75 @@ class Settings(BaseSettings):
     REDIS_PORT: int
     REDIS_DB: int
     PRODUCTS_API_URL: str
+
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_PREPARE_THRESHOLD: int = 5
+
+    READ_REPLICA_URLS: list[str] = []
+    READ_YOUR_WRITES_WINDOW: float = 5
+
+    DB_SLOW_QUERY_THRESHOLD: float = 0.5
+    DB_N_PLUS_ONE_THRESHOLD: int = 10
+
+    REQUEST_TIMEOUT: float = 15
+    REQUEST_TIMEOUT_ROUTES: dict[str, float] = {'/wishlists/export': 0}
+    REDIS_COMMAND_TIMEOUT: float = 1.0
+    REDIS_CONNECT_TIMEOUT: float = 1.0
+
+    PRINCIPAL_CACHE_TTL: int = 300
+    PRINCIPAL_CACHE_LOCAL_TTL: int = 30
+    PRINCIPAL_CACHE_MAXSIZE: int = 10_000
+
+    PASSWORD_HASH_EXECUTOR: Literal['inline', 'thread', 'process'] = 'thread'
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HTTP_KEEPALIVE_TIMEOUT: float = 30
+    HTTP_DNS_CACHE_TTL: int = 300
+
+    PRODUCT_FETCH_LOCK_ENABLED: bool = False
+    PRODUCT_FETCH_LOCK_TTL: float = 5
+
+    PRODUCT_FETCH_CONCURRENCY: int = 10
+    PRODUCT_FRESH_TTL: int = 3600
+    PRODUCT_NOT_FOUND_TTL: int = 60
+    PRODUCT_NOT_FOUND_LOCAL_TTL: float = 10
+    PRODUCT_NOT_FOUND_MAXSIZE: int = 10_000
+
+    UPSTREAM_MAX_CONCURRENCY: int = 20
+    UPSTREAM_MAX_QUEUE: int = 50
+    UPSTREAM_QUEUE_TIMEOUT: float = 1.0
+    UPSTREAM_ADAPTIVE_LIMIT: bool = False
+    UPSTREAM_MIN_CONCURRENCY: int = 2
+    UPSTREAM_LATENCY_THRESHOLD: float = 2.0
+
+    CIRCUIT_BREAKER_SHARED: bool = True
+    CIRCUIT_BREAKER_FAIL_MAX: int = 3
+    CIRCUIT_BREAKER_FAILURE_RATE: float = 0.5
+    CIRCUIT_BREAKER_WINDOW: float = 30
+    CIRCUIT_BREAKER_RESET_TIMEOUT: float = 10
+    CIRCUIT_BREAKER_MAX_RESET_TIMEOUT: float = 300
+    CIRCUIT_BREAKER_HALF_OPEN_PROBES: int = 1
+
+    CATALOG_SNAPSHOT_PATH: str = 'catalog.snapshot'
+
+    WISHLIST_CACHE_TTL: int = 60
+
+    WISHLIST_ASYNC_ADD: bool = False
+    WISHLIST_PENDING_INTERVAL: float = 1.0
+    WISHLIST_PENDING_BATCH_SIZE: int = 100
+    WISHLIST_PENDING_MAX_ATTEMPTS: int = 5
+    WISHLIST_PENDING_LOCK_TTL: float = 30
+    WISHLIST_PENDING_RETRY_BASE: float = 2
+    WISHLIST_PENDING_RETRY_MAX: float = 300
+
+    CATALOG_SYNC_INTERVAL: float = 0
+    CATALOG_SYNC_CONCURRENCY: int = 4
+    CATALOG_SYNC_RATE_LIMIT: float = 5
+    CATALOG_SYNC_MAX_PAGES: int = 10_000
@@ -0,0 +1,52 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from .deadline import DeadlineExceededError
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave em uma única execução.
+
+    A primeira chamada (líder) executa a função; as demais aguardam e recebem
+    o mesmo resultado (ou a mesma exceção). Se o líder for cancelado ou esgotar o
+    prazo da própria requisição (DeadlineExceededError), um dos que estavam
+    aguardando assume a execução: o prazo de um cliente não vale para os outros.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable], *args, **kwargs) -> Any:
+        while (future := self._calls.get(key)) is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if future.cancelled() and not asyncio.current_task().cancelling():
+                    self.coalesced -= 1
+                    continue
+                raise
+
+        future = asyncio.get_running_loop().create_future()
+        self._calls[key] = future
+        self.executions += 1
+        try:
+            result = await func(*args, **kwargs)
+        except (asyncio.CancelledError, DeadlineExceededError):
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # evita o aviso de exceção não recuperada sem espera
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
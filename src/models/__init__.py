@@ -4,6 +4,6 @@ table_registry = registry()
 
 from src.models.product import Product  # noqa: E402
 from src.models.user import User  # noqa: E402
-from src.models.wishlist import Wishlist  # noqa: E402
+from src.models.wishlist import PendingWishlistItem, Wishlist  # noqa: E402
 
-__all__ = ['User', 'Wishlist', 'Product']
+__all__ = ['User', 'Wishlist', 'PendingWishlistItem', 'Product']
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 
 from sqlalchemy import func
 from sqlalchemy.orm import Mapped, mapped_column
@@ -16,3 +17,6 @@ class Product:
     image: Mapped[str] = mapped_column()
     review_score: Mapped[float] = mapped_column(nullable=True)
     created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+    refreshed_at: Mapped[Optional[datetime]] = mapped_column(
+        init=False, nullable=True, server_default=func.now()
+    )
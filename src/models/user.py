@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import func
+from sqlalchemy import Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.models import table_registry
@@ -10,6 +10,7 @@ from src.models.wishlist import Wishlist
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
+    __table_args__ = (Index('ix_users_created_at_id', 'created_at', 'id'),)
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     username: Mapped[str] = mapped_column(unique=True)
@@ -19,5 +20,5 @@ class User:
     wishlists: Mapped[list['Wishlist']] = relationship(
         init=False,
         cascade='all, delete-orphan',
-        lazy='selectin',
+        lazy='raise',
     )
@@ -1,6 +1,7 @@
 from datetime import datetime
+from typing import Optional
 
-from sqlalchemy import ForeignKey, UniqueConstraint, func
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.models import table_registry
@@ -9,9 +10,36 @@ from src.models import table_registry
 @table_registry.mapped_as_dataclass
 class Wishlist:
     __tablename__ = 'wishlists'
-    __table_args__ = (UniqueConstraint('user_id', 'product_id', name='uq_user_product'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'product_id', name='uq_user_product'),
+        Index('ix_wishlists_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     product_id: Mapped[int] = mapped_column(ForeignKey('products.id'))
     created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+
+
+@table_registry.mapped_as_dataclass
+class PendingWishlistItem:
+    """Inclusão aceita com 202 cujo produto ainda está sendo resolvido em segundo plano."""
+
+    __tablename__ = 'pending_wishlist_items'
+    __table_args__ = (
+        UniqueConstraint('user_id', 'product_id', name='uq_pending_user_product'),
+        Index('ix_pending_wishlist_items_status_updated_at', 'status', 'updated_at'),
+    )
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey('users.id', ondelete='CASCADE'))
+    # Sem FK: o produto pode ainda não existir na tabela products
+    product_id: Mapped[int] = mapped_column()
+    status: Mapped[str] = mapped_column(default='pending', server_default='pending')
+    attempts: Mapped[int] = mapped_column(default=0, server_default='0')
+    # Backoff entre tentativas; NULL = pode ser resolvido já
+    next_attempt_at: Mapped[Optional[datetime]] = mapped_column(default=None, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(
+        init=False, server_default=func.now(), onupdate=func.now()
+    )
@@ -5,16 +5,15 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.models.user import User
-
 from ..core.db import get_session
 from ..core.security import get_current_user
-from ..schemas.auth import Token
+from ..schemas.auth import Principal, Token
 from ..services.auth import authenticate_user, generate_access_token
 
 OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
+# Login fica no primário: ainda não há token para o read-your-writes de quem acabou de se cadastrar
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
@@ -4,9 +4,9 @@ from typing import Annotated
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..core.db import get_session
-from ..core.security import get_current_user
-from ..models.user import User
+from ..core.responses import FastJSONResponse
+from ..core.security import get_current_user, get_read_session, get_write_session
+from ..schemas.auth import Principal
 from ..schemas.common import FilterPage, Message
 from ..schemas.user import UserList, UserPublic, UserSchema
 from ..services.user import (
@@ -16,8 +16,9 @@ from ..services.user import (
     update_user_service,
 )
 
-Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+Session = Annotated[AsyncSession, Depends(get_write_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 router = APIRouter(prefix='/users', tags=['users'])
 
 
@@ -27,8 +28,8 @@ async def create_user(user: UserSchema, session: Session):
 
 
 @router.get('/', response_model=UserList)
-async def read_users(session: Session, filter_users: Annotated[FilterPage, Query()]):
-    return await get_users_service(session, filter_users)
+async def read_users(session: ReadSession, filter_users: Annotated[FilterPage, Query()]):
+    return FastJSONResponse(await get_users_service(session, filter_users))
 
 
 @router.put('/{user_id}', response_model=UserPublic)
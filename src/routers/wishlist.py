@@ -1,38 +1,100 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from ..core.db import get_session
-from ..core.security import get_current_user
-from ..models.user import User
+from ..core.db import get_session_factory
+from ..core.responses import FastJSONResponse
+from ..core.security import get_current_user, get_read_session, get_write_session
+from ..core.settings import Settings
+from ..models.wishlist import PendingWishlistItem
+from ..schemas.auth import Principal
 from ..schemas.common import FilterPage, Message
-from ..schemas.wishlist import WishlistList, WishlistPublic, WishlistSchema
+from ..schemas.wishlist import (
+    WishlistBatchResult,
+    WishlistBatchSchema,
+    WishlistList,
+    WishlistPendingPublic,
+    WishlistPublic,
+    WishlistSchema,
+)
+from ..services.pending_wishlist import (
+    create_wishlist_async_service,
+    read_pending_wishlist_service,
+)
 from ..services.wishlist import (
+    batch_wishlist_service,
     create_wishlist_service,
     delete_wishlist_product_service,
     delete_wishlist_service,
+    export_wishlist_service,
     read_wishlist_service,
 )
 
-Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+Session = Annotated[AsyncSession, Depends(get_write_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+SessionFactory = Annotated[async_sessionmaker[AsyncSession], Depends(get_session_factory)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 router = APIRouter(prefix='/wishlists', tags=['wishlists'])
+settings = Settings()
+
+
+@router.post(
+    '/',
+    status_code=HTTPStatus.CREATED,
+    response_model=WishlistPublic,
+    responses={HTTPStatus.ACCEPTED: {'model': WishlistPendingPublic}},
+)
+async def create_wishlist(
+    wishlist: WishlistSchema,
+    session: Session,
+    current_user: CurrentUser,
+    prefer: Annotated[str | None, Header()] = None,
+):
+    if not (settings.WISHLIST_ASYNC_ADD and prefer and 'respond-async' in prefer):
+        return await create_wishlist_service(wishlist, session, current_user.id)
 
+    result = await create_wishlist_async_service(wishlist, session, current_user.id)
+    if not isinstance(result, PendingWishlistItem):
+        return result
 
-@router.post('/', status_code=HTTPStatus.CREATED, response_model=WishlistPublic)
-async def create_wishlist(wishlist: WishlistSchema, session: Session, current_user: CurrentUser):
-    return await create_wishlist_service(wishlist, session, current_user.id)
+    return JSONResponse(
+        WishlistPendingPublic.model_validate(result).model_dump(mode='json'),
+        status_code=HTTPStatus.ACCEPTED,
+        headers={
+            'Location': router.url_path_for('read_pending_wishlist', pending_id=str(result.id)),
+            'Preference-Applied': 'respond-async',
+        },
+    )
+
+
+@router.post('/batch', response_model=WishlistBatchResult)
+async def batch_wishlist(batch: WishlistBatchSchema, session: Session, current_user: CurrentUser):
+    return await batch_wishlist_service(batch, session, current_user.id)
 
 
 @router.get('/', response_model=WishlistList)
 async def read_wishlist(
-    session: Session,
+    session: ReadSession,
     filter_users: Annotated[FilterPage, Query()],
     current_user: CurrentUser,
 ):
-    return await read_wishlist_service(session, filter_users, current_user.id)
+    return FastJSONResponse(await read_wishlist_service(session, filter_users, current_user.id))
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_wishlist(session_factory: SessionFactory, current_user: CurrentUser):
+    return StreamingResponse(
+        export_wishlist_service(session_factory, current_user.id),
+        media_type='application/x-ndjson',
+    )
+
+
+@router.get('/pending/{pending_id}', response_model=WishlistPendingPublic)
+async def read_pending_wishlist(pending_id: int, session: ReadSession, current_user: CurrentUser):
+    return await read_pending_wishlist_service(pending_id, session, current_user.id)
 
 
 @router.delete('/', response_model=Message)
@@ -1,6 +1,13 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+
+
+class Principal(BaseModel):
+    id: int
+    email: str
+    username: str
+    model_config = ConfigDict(from_attributes=True, frozen=True)
@@ -1,9 +1,12 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
 class FilterPage(BaseModel):
     offset: int = 0
     limit: int = 100
+    after: Optional[str] = None
 
 
 class Message(BaseModel):
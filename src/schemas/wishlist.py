@@ -1,4 +1,7 @@
-from pydantic import BaseModel, ConfigDict
+from enum import Enum
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class WishlistSchema(BaseModel):
@@ -26,3 +29,35 @@ class WishlistUserGroup(BaseModel):
 
 class WishlistList(BaseModel):
     wishlists: list[WishlistUserGroup]
+    next_cursor: Optional[str] = None
+
+
+class WishlistBatchSchema(BaseModel):
+    add: list[int] = Field(default_factory=list, max_length=1000)
+    remove: list[int] = Field(default_factory=list, max_length=1000)
+
+
+class WishlistItemStatus(str, Enum):
+    ADDED = 'added'
+    ALREADY_PRESENT = 'already_present'
+    NOT_FOUND = 'not_found'
+    REMOVED = 'removed'
+    PENDING = 'pending'
+    FAILED = 'failed'
+
+
+class WishlistBatchItem(BaseModel):
+    product_id: int
+    status: WishlistItemStatus
+
+
+class WishlistBatchResult(BaseModel):
+    results: list[WishlistBatchItem]
+
+
+class WishlistPendingPublic(BaseModel):
+    id: int
+    user_id: int
+    product_id: int
+    status: WishlistItemStatus
+    model_config = ConfigDict(from_attributes=True)
@@ -1,14 +1,17 @@
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..core.security import create_access_token, verify_password
+from ..core.security import async_verify_password, create_access_token, principal_query
 from ..models.user import User
+from ..schemas.auth import Principal
 
 
-async def authenticate_user(email: str, password: str, session: AsyncSession) -> User | None:
-    user = await session.scalar(select(User).where(User.email == email))
-    if user and verify_password(password, user.password):
-        return user
+async def authenticate_user(email: str, password: str, session: AsyncSession) -> Principal | None:
+    query = principal_query(User.email == email).add_columns(User.password)
+    row = (await session.execute(query)).first()
+    # Encerra a transação de leitura para devolver a conexão ao pool durante o hash
+    await session.commit()
+    if row and await async_verify_password(password, row.password):
+        return Principal.model_validate(row)
     return None
 
 
@@ -0,0 +1,226 @@
+"""
+Sincronização em segundo plano do catálogo de produtos com a API externa.
+
+O catálogo é lido em páginas (`{PRODUCTS_API_URL}/?page=N`, no formato
+`{"meta": {...}, "products": [...]}`), buscadas em janelas de páginas
+concorrentes sob um limite de taxa. Cada página vira um upsert em lote: linhas
+novas ou alteradas são gravadas e todas recebem `refreshed_at`. Com o banco
+espelhando o catálogo, a busca na API durante a requisição passa a ser exceção.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Dict, List, Optional
+
+import aiohttp
+from pydantic import ValidationError
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.db import get_session_factory
+from src.core.http import http_client
+from src.core.rate_limit import RateLimiter
+from src.core.redis import acquire_lock
+from src.core.settings import Settings
+from src.models.product import Product as ProductModel
+from src.schemas.product import Product
+from src.services.product import product_to_row, ssl_context, upsert_products_stmt
+
+logger = logging.getLogger('uvicorn')
+
+settings = Settings()
+SYNC_LOCK_KEY = 'lock:catalog_sync'
+
+
+@dataclass
+class CatalogSyncResult:
+    pages: int = 0
+    failed_pages: int = 0
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+
+
+@dataclass
+class CatalogPage:
+    products: List[Product]
+    # Itens devolvidos pela API, válidos ou não: só uma página sem itens encerra o catálogo
+    received: int
+
+
+async def fetch_catalog_page(
+    page: int,
+    base_url: str,
+    limiter: RateLimiter,
+    http_session: Optional[aiohttp.ClientSession] = None,
+) -> Optional[CatalogPage]:
+    """
+    Busca uma página do catálogo. Itens inválidos são descartados.
+
+    Returns:
+        CatalogPage: Produtos válidos da página e quantidade de itens recebidos
+        (zero indica o fim do catálogo)
+        None: Falha ao buscar a página
+    """
+    session = http_session or http_client.session
+    url = f'{base_url}/?page={page}'
+    await limiter.acquire()
+    try:
+        async with session.get(
+            url, ssl=ssl_context, timeout=aiohttp.ClientTimeout(total=30)
+        ) as response:
+            if response.status == HTTPStatus.NOT_FOUND:
+                return CatalogPage([], 0)
+            if response.status != HTTPStatus.OK or 'text/html' in response.content_type:
+                raise Exception(f'Erro na resposta: {url} ({response.status})')
+            data = await response.json()
+    except Exception as e:
+        logger.error(f'Erro ao buscar a página {page} do catálogo: {e}')
+        return None
+
+    items = (data.get('products') or []) if isinstance(data, dict) else data
+    products = []
+    for item in items:
+        try:
+            products.append(Product(**item))
+        except (TypeError, ValidationError) as e:
+            logger.warning(f'Produto inválido na página {page} do catálogo: {e}')
+    return CatalogPage(products, len(items))
+
+
+async def upsert_products(products: List[Product], session: AsyncSession) -> CatalogSyncResult:
+    """
+    Grava um lote de produtos do catálogo.
+
+    Linhas novas ou com dados diferentes vão em um único INSERT ... ON CONFLICT DO
+    UPDATE; as inalteradas só têm `refreshed_at` atualizado.
+    """
+    rows: Dict[int, Dict] = {product.id: product_to_row(product) for product in products}
+    result = CatalogSyncResult()
+    if not rows:
+        return result
+
+    existing = await session.execute(
+        select(
+            ProductModel.id,
+            ProductModel.title,
+            ProductModel.price,
+            ProductModel.image,
+            ProductModel.review_score,
+        ).where(ProductModel.id.in_(rows))
+    )
+    current = {row.id: row._asdict() for row in existing}
+
+    changed = [row for product_id, row in rows.items() if current.get(product_id) != row]
+    unchanged = [product_id for product_id, row in rows.items() if current.get(product_id) == row]
+
+    if changed:
+        await session.execute(upsert_products_stmt(session, changed))
+
+    if unchanged:
+        await session.execute(
+            update(ProductModel)
+            .where(ProductModel.id.in_(unchanged))
+            .values(refreshed_at=func.now())
+        )
+
+    await session.commit()
+
+    result.inserted = sum(1 for product_id in rows if product_id not in current)
+    result.updated = len(changed) - result.inserted
+    result.unchanged = len(unchanged)
+    return result
+
+
+async def sync_catalog(
+    session_factory: async_sessionmaker[AsyncSession],
+    base_url: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    rate: Optional[float] = None,
+    max_pages: Optional[int] = None,
+) -> CatalogSyncResult:
+    """
+    Espelha o catálogo completo no banco.
+
+    As páginas são buscadas em janelas de `concurrency` páginas simultâneas, com no
+    máximo `rate` requisições por segundo. A sincronização termina na primeira
+    página sem itens (uma página só com itens inválidos não encerra), quando uma
+    janela inteira falha ou ao atingir `max_pages`.
+    """
+    base_url = base_url or settings.PRODUCTS_API_URL
+    concurrency = concurrency or settings.CATALOG_SYNC_CONCURRENCY
+    max_pages = max_pages or settings.CATALOG_SYNC_MAX_PAGES
+    limiter = RateLimiter(settings.CATALOG_SYNC_RATE_LIMIT if rate is None else rate)
+    result = CatalogSyncResult()
+
+    page = 1
+    while page <= max_pages:
+        window = range(page, min(page + concurrency, max_pages + 1))
+        pages = await asyncio.gather(
+            *(fetch_catalog_page(number, base_url, limiter) for number in window)
+        )
+
+        async with session_factory() as session:
+            for catalog_page in pages:
+                if catalog_page is not None and catalog_page.products:
+                    batch = await upsert_products(catalog_page.products, session)
+                    result.pages += 1
+                    result.inserted += batch.inserted
+                    result.updated += batch.updated
+                    result.unchanged += batch.unchanged
+
+        result.failed_pages += sum(1 for catalog_page in pages if catalog_page is None)
+        if all(catalog_page is None for catalog_page in pages) or any(
+            catalog_page is not None and catalog_page.received == 0 for catalog_page in pages
+        ):
+            break
+        page += len(window)
+
+    logger.info(
+        f'Catálogo sincronizado: {result.pages} páginas, {result.inserted} novos, '
+        f'{result.updated} alterados, {result.unchanged} inalterados, '
+        f'{result.failed_pages} páginas com erro'
+    )
+    return result
+
+
+class CatalogSyncWorker:
+    """
+    Executa sync_catalog periodicamente dentro da aplicação.
+
+    Com vários workers do uvicorn, um lock no Redis (mantido pelo intervalo
+    inteiro) garante que apenas um deles sincronize a cada rodada.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            if await acquire_lock(SYNC_LOCK_KEY, self.interval):
+                try:
+                    await sync_catalog(self.session_factory)
+                except Exception as e:
+                    logger.error(f'Erro na sincronização do catálogo: {e}')
+            await asyncio.sleep(self.interval)
+
+
+catalog_sync_worker = CatalogSyncWorker(get_session_factory(), settings.CATALOG_SYNC_INTERVAL)
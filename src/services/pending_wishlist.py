@@ -0,0 +1,254 @@
+"""
+Inclusão assíncrona na wishlist ("aceita agora, resolve depois").
+
+Com WISHLIST_ASYNC_ADD e o cabeçalho `Prefer: respond-async`, um POST /wishlists
+cujo produto ainda não está no banco não espera pela API de produtos: a inclusão
+é gravada em pending_wishlist_items e a resposta é 202, com o endereço para
+acompanhar o item em `Location`. Um worker em segundo plano resolve os produtos
+pendentes em lotes (fetch_products) e finaliza cada item como `added`,
+`already_present`, `not_found` ou, após WISHLIST_PENDING_MAX_ATTEMPTS falhas
+transitórias da API, `failed`.
+
+Entre as tentativas de um item há um backoff exponencial (next_attempt_at). Lotes
+barrados pelo circuit breaker ou pelo bulkhead não consultaram a API e não contam
+como tentativa: durante uma queda da API os itens esperam, em vez de esgotar as
+tentativas em poucos milissegundos.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from typing import Optional, Union
+
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core.db import dialect_insert, get_session_factory, mark_write
+from src.core.redis import acquire_lock, release_lock
+from src.core.settings import Settings
+from src.models.user import User
+from src.models.wishlist import PendingWishlistItem, Wishlist
+from src.schemas.wishlist import WishlistItemStatus, WishlistSchema
+from src.services.product import fetch_products, get_product_from_db, is_missing, missing_ids
+from src.services.wishlist import create_wishlist_service, wishlist_cache
+
+logger = logging.getLogger('uvicorn')
+
+settings = Settings()
+PENDING_LOCK_KEY = 'lock:wishlist_pending'
+
+
+async def create_wishlist_async_service(
+    wishlist: WishlistSchema, session: AsyncSession, user_id: int
+) -> Union[Wishlist, PendingWishlistItem]:
+    """
+    Inclui o produto na hora se ele já for conhecido (no banco ou sabidamente
+    inexistente); caso contrário grava a inclusão pendente e acorda o resolvedor.
+    """
+    product_id = wishlist.product_id
+    if await is_missing(product_id) or await get_product_from_db(product_id, session):
+        return await create_wishlist_service(wishlist, session, user_id)
+
+    stmt = dialect_insert(session, PendingWishlistItem).values(
+        user_id=user_id, product_id=product_id
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PendingWishlistItem.user_id, PendingWishlistItem.product_id],
+        set_={
+            'status': WishlistItemStatus.PENDING.value,
+            'attempts': 0,
+            'next_attempt_at': None,
+            'updated_at': func.now(),
+        },
+    ).returning(PendingWishlistItem)
+    pending = await session.scalar(stmt, execution_options={'populate_existing': True})
+    await session.commit()
+
+    pending_wishlist_worker.notify()
+    return pending
+
+
+async def read_pending_wishlist_service(
+    pending_id: int, session: AsyncSession, user_id: int
+) -> PendingWishlistItem:
+    pending = await session.scalar(
+        select(PendingWishlistItem).where(
+            (PendingWishlistItem.id == pending_id) & (PendingWishlistItem.user_id == user_id)
+        )
+    )
+    if not pending:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Item pendente não encontrado.'
+        )
+    return pending
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Espera antes da próxima tentativa: RETRY_BASE * 2^(tentativas - 1), até RETRY_MAX."""
+    delay = settings.WISHLIST_PENDING_RETRY_BASE * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(delay, settings.WISHLIST_PENDING_RETRY_MAX))
+
+
+async def resolve_pending_items(
+    session_factory: async_sessionmaker[AsyncSession], batch_size: Optional[int] = None
+) -> int:
+    """
+    Resolve um lote de inclusões pendentes cujo backoff já passou, das mais
+    antigas para as mais novas.
+
+    Os produtos do lote são buscados com um único fetch_products e as inclusões
+    encontradas são gravadas com um único INSERT. Produtos que a API respondeu
+    com 404 rejeitam o item; os demais ausentes ficam pendentes até a próxima
+    tentativa (next_attempt_at).
+
+    Returns:
+        int: Quantidade de itens finalizados (que deixaram de ser `pending`)
+    """
+    batch_size = batch_size or settings.WISHLIST_PENDING_BATCH_SIZE
+    # Mesmo relógio (UTC, sem fuso) na gravação e na comparação de next_attempt_at
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    async with session_factory() as session:
+        items = list(
+            await session.scalars(
+                select(PendingWishlistItem)
+                .where(
+                    (PendingWishlistItem.status == WishlistItemStatus.PENDING.value)
+                    & (
+                        PendingWishlistItem.next_attempt_at.is_(None)
+                        | (PendingWishlistItem.next_attempt_at <= now)
+                    )
+                )
+                .order_by(PendingWishlistItem.updated_at, PendingWishlistItem.id)
+                .limit(batch_size)
+            )
+        )
+        if not items:
+            return 0
+
+        rejected: set[int] = set()
+        products = await fetch_products([item.product_id for item in items], session, rejected)
+
+        added = set()
+        found = [
+            {'user_id': item.user_id, 'product_id': item.product_id}
+            for item in items
+            if item.product_id in products
+        ]
+        if found:
+            stmt = (
+                dialect_insert(session, Wishlist)
+                .values(found)
+                .on_conflict_do_nothing()
+                .returning(Wishlist.user_id, Wishlist.product_id)
+            )
+            added = set((await session.execute(stmt)).tuples())
+
+        not_found = await missing_ids(
+            item.product_id for item in items if item.product_id not in products
+        )
+        resolved = 0
+        owners = set()
+        for item in items:
+            if item.product_id in products:
+                item.status = (
+                    WishlistItemStatus.ADDED
+                    if (item.user_id, item.product_id) in added
+                    else WishlistItemStatus.ALREADY_PRESENT
+                ).value
+            elif item.product_id in not_found:
+                item.status = WishlistItemStatus.NOT_FOUND.value
+            elif item.product_id in rejected:
+                # A API não foi chamada (breaker aberto ou bulkhead cheio): só adia
+                item.next_attempt_at = now + retry_delay(item.attempts)
+                continue
+            else:
+                item.attempts += 1
+                if item.attempts < settings.WISHLIST_PENDING_MAX_ATTEMPTS:
+                    item.next_attempt_at = now + retry_delay(item.attempts)
+                    continue
+                item.status = WishlistItemStatus.FAILED.value
+            resolved += 1
+            owners.add(item.user_id)
+
+        emails = []
+        if owners:
+            emails = list(await session.scalars(select(User.email).where(User.id.in_(owners))))
+        await session.commit()
+
+    # Read-your-writes para os donos antes de trocar a versão do cache: uma réplica
+    # atrasada não chega a gravar a página antiga sob a versão nova
+    for email in emails:
+        await mark_write(email)
+    for user_id in {user_id for user_id, _ in added}:
+        await wishlist_cache.bump(user_id)
+
+    logger.info(
+        f'{len(items)} inclusões pendentes processadas '
+        f'({resolved} finalizadas, {len(added)} incluídas)'
+    )
+    return resolved
+
+
+class PendingWishlistWorker:
+    """
+    Executa resolve_pending_items a cada `interval` segundos ou assim que uma
+    inclusão pendente é gravada neste processo.
+
+    Com vários workers do uvicorn, um lock no Redis por lote evita que dois
+    processos resolvam os mesmos itens ao mesmo tempo.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession], interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+
+    def start(self):
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            lock_token = await acquire_lock(PENDING_LOCK_KEY, settings.WISHLIST_PENDING_LOCK_TTL)
+            if lock_token is None:
+                continue
+            try:
+                resolved = await resolve_pending_items(self.session_factory)
+            except Exception as e:
+                logger.error(f'Erro ao resolver inclusões pendentes: {e}')
+                resolved = 0
+            finally:
+                await release_lock(PENDING_LOCK_KEY, lock_token)
+
+            # O lote andou: pode haver mais itens prontos. Sem progresso (API fora),
+            # espera o intervalo em vez de repetir o lote em seguida
+            if resolved:
+                self.notify()
+
+
+pending_wishlist_worker = PendingWishlistWorker(
+    get_session_factory(),
+    settings.WISHLIST_PENDING_INTERVAL if settings.WISHLIST_ASYNC_ADD else 0,
+)
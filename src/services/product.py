@@ -1,23 +1,105 @@
+import asyncio
+import contextvars
 import logging
 import ssl
+import time
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional
 
 import aiohttp
 import pybreaker
-from sqlalchemy import select
+from sqlalchemy import func, lambda_stmt, null, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.core.circuit_breaker import AsyncCircuitBreaker
-from src.core.redis import get_json
+from src.core.bulkhead import AIMDLimit, Bulkhead, BulkheadFullError
+from src.core.cache import TieredCache
+from src.core.catalog_snapshot import CatalogSnapshotStore
+from src.core.circuit_breaker import AsyncCircuitBreaker, CircuitBreakerPolicy
+from src.core.db import dialect_insert, get_session_factory
+from src.core.deadline import DeadlineExceededError, deadline_var, remaining
+from src.core.http import http_client
+from src.core.metrics import (
+    track_bulkhead,
+    track_cache,
+    track_circuit_breaker,
+    upstream_request_seconds,
+)
+from src.core.redis import (
+    acquire_lock,
+    get_json,
+    hget_json,
+    hmget_json,
+    key_exists,
+    release_lock,
+)
 from src.core.settings import Settings
+from src.core.singleflight import SingleFlight
 from src.models.product import Product as ProductModel
 from src.schemas.product import Product
 
 logger = logging.getLogger('uvicorn')
 
+settings = Settings()
 
-circuit_breaker = AsyncCircuitBreaker(fail_max=3, reset_timeout=10)
+
+class ProductNotFoundError(Exception):
+    pass
+
+
+# Estado compartilhado entre os workers via Redis (CIRCUIT_BREAKER_SHARED)
+circuit_breaker = AsyncCircuitBreaker(
+    CircuitBreakerPolicy(
+        fail_max=settings.CIRCUIT_BREAKER_FAIL_MAX,
+        failure_rate=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+        window=settings.CIRCUIT_BREAKER_WINDOW,
+        reset_timeout=settings.CIRCUIT_BREAKER_RESET_TIMEOUT,
+        max_reset_timeout=settings.CIRCUIT_BREAKER_MAX_RESET_TIMEOUT,
+        half_open_probes=settings.CIRCUIT_BREAKER_HALF_OPEN_PROBES,
+    ),
+    name='products',
+    shared=settings.CIRCUIT_BREAKER_SHARED,
+    # 404 é uma resposta válida da API, não uma falha
+    exclude=(ProductNotFoundError,),
+)
+
+# Limita as chamadas simultâneas à API; o excedente vai para o fallback em vez de
+# segurar corrotinas (e conexões do banco) esperando uma API lenta
+upstream_bulkhead = Bulkhead(
+    max_concurrent=settings.UPSTREAM_MAX_CONCURRENCY,
+    max_queue=settings.UPSTREAM_MAX_QUEUE,
+    queue_timeout=settings.UPSTREAM_QUEUE_TIMEOUT,
+    adaptive=AIMDLimit(
+        min_limit=settings.UPSTREAM_MIN_CONCURRENCY,
+        latency_threshold=settings.UPSTREAM_LATENCY_THRESHOLD,
+    )
+    if settings.UPSTREAM_ADAPTIVE_LIMIT
+    else None,
+)
+
+track_circuit_breaker(circuit_breaker)
+track_bulkhead('products', upstream_bulkhead)
+
+# Erros que indicam API indisponível para esta chamada (usar o fallback)
+UPSTREAM_UNAVAILABLE = (pybreaker.CircuitBreakerError, BulkheadFullError)
+
+# IDs que a API respondeu com 404: não voltam ao banco nem à API até o TTL expirar
+missing_products = TieredCache(
+    'product:missing',
+    redis_ttl=settings.PRODUCT_NOT_FOUND_TTL,
+    local_ttl=settings.PRODUCT_NOT_FOUND_LOCAL_TTL,
+    local_maxsize=settings.PRODUCT_NOT_FOUND_MAXSIZE,
+)
+track_cache('product_missing', missing_products.stats)
+
+# Uma única busca externa + inserção por produto ao mesmo tempo neste processo
+product_flights = SingleFlight()
+
+# Revalidações em segundo plano de produtos desatualizados (stale-while-revalidate)
+refresh_flights = SingleFlight()
+refresh_tasks: set[asyncio.Task] = set()
+session_factory = get_session_factory()
 
 # Configuração do SSL para ignorar erros de certificado
 # problema com host 'challenge-api.luizalabs.com'
@@ -25,18 +107,44 @@ ssl_context = ssl.create_default_context()
 ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
 
-PRODUCTS_API_URL = Settings().PRODUCTS_API_URL
+PRODUCTS_API_URL = settings.PRODUCTS_API_URL
+# Espera pelo dono do lock: intervalo inicial, dobrado a cada consulta até o máximo
+LOCK_POLL_INTERVAL = 0.1
+LOCK_POLL_MAX_INTERVAL = 1.0
+
+# Colunas atualizadas quando um produto já existente é revalidado na API
+REFRESHED_COLUMNS = ('title', 'price', 'image', 'review_score')
+
+# Catálogo de fallback no Redis: um campo por produto no hash + chave de versão
+CATALOG_KEY = 'catalog:products'
+CATALOG_VERSION_KEY = 'catalog:version'
+LEGACY_CATALOG_KEY = 'catalog'
+
+# Último fallback, sem rede: snapshot do catálogo mapeado em memória
+catalog_snapshot = CatalogSnapshotStore(settings.CATALOG_SNAPSHOT_PATH)
 
 
 async def get_product_from_db(product_id: int, session: AsyncSession) -> Optional[ProductModel]:
-    """Busca o produto no banco de dados pelo ID."""
-    query = select(ProductModel).where(ProductModel.id == product_id)
+    """
+    Busca o produto no banco de dados pelo ID.
+
+    Consulta mais frequente da aplicação: com lambda_stmt o SELECT é montado e
+    compilado uma vez e reaproveitado do cache, trocando só o parâmetro.
+    """
+    query = lambda_stmt(lambda: select(ProductModel).where(ProductModel.id == product_id))
     result = await session.execute(query)
     return result.scalar_one_or_none()
 
 
-async def save_product_to_db(product: Product, session: AsyncSession) -> ProductModel:
-    """Salva o produto no banco de dados."""
+async def save_product_to_db(
+    product: Product, session: AsyncSession, fresh: bool = True
+) -> ProductModel:
+    """
+    Salva o produto no banco de dados.
+
+    Produtos vindos dos fallbacks (cache, snapshot) são salvos com `fresh=False`:
+    ficam sem `refreshed_at` e são revalidados na API no próximo acesso.
+    """
     db_product = ProductModel(
         id=product.id,
         title=product.title,
@@ -44,73 +152,423 @@ async def save_product_to_db(product: Product, session: AsyncSession) -> Product
         image=product.image,
         review_score=product.reviewScore,
     )
+    if not fresh:
+        # None deixaria a coluna fora do INSERT e o server_default (now()) a marcaria
+        # como atualizada; null() grava NULL de fato
+        db_product.refreshed_at = null()
     session.add(db_product)
-    await session.commit()
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        logger.info(f'Produto {product.id} já foi salvo por outra requisição')
+        return await get_product_from_db(product.id, session)
     await session.refresh(db_product)
     logger.info(f'Produto {product.id} salvo no banco de dados')
     return db_product
 
 
+def product_to_row(product: Product) -> Dict:
+    return {
+        'id': product.id,
+        'title': product.title,
+        'price': product.price,
+        'image': product.image,
+        'review_score': product.reviewScore,
+    }
+
+
+async def save_products_to_db(
+    products: Iterable[Product], session: AsyncSession, stale_ids: Iterable[int] = ()
+) -> None:
+    """
+    Salva vários produtos com um único INSERT, ignorando os que já existem.
+
+    Os IDs em `stale_ids` (vindos dos fallbacks) são salvos sem `refreshed_at`.
+    """
+    stale_ids = set(stale_ids)
+    rows = [
+        product_to_row(product) | {'refreshed_at': None if product.id in stale_ids else func.now()}
+        for product in products
+    ]
+    if not rows:
+        return
+
+    stmt = dialect_insert(session, ProductModel).values(rows).on_conflict_do_nothing()
+    await session.execute(stmt)
+    await session.commit()
+    logger.info(f'{len(rows)} produtos salvos no banco de dados')
+
+
+def upsert_products_stmt(session: AsyncSession, rows: list[Dict]):
+    """INSERT ... ON CONFLICT DO UPDATE que sobrescreve os dados e marca `refreshed_at`."""
+    stmt = dialect_insert(session, ProductModel).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[ProductModel.id],
+        set_={column: stmt.excluded[column] for column in REFRESHED_COLUMNS}
+        | {'refreshed_at': func.now()},
+    )
+
+
+def is_fresh(db_product: ProductModel) -> bool:
+    """Indica se o produto foi atualizado na API há menos de PRODUCT_FRESH_TTL segundos."""
+    if db_product.refreshed_at is None:
+        return False
+    # refreshed_at é gravado pelo banco (now()) em UTC, sem fuso
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now - db_product.refreshed_at <= timedelta(seconds=settings.PRODUCT_FRESH_TTL)
+
+
+async def refresh_product(product_id: int) -> Optional[Product]:
+    """
+    Revalida um produto desatualizado, com uma sessão própria.
+
+    Com PRODUCT_FETCH_LOCK_ENABLED, se outro worker já estiver revalidando o mesmo
+    produto, este não repete a busca. Produtos que a API respondeu com 404 há
+    menos de PRODUCT_NOT_FOUND_TTL não são buscados de novo.
+    """
+    if await is_missing(product_id):
+        return None
+
+    if not settings.PRODUCT_FETCH_LOCK_ENABLED:
+        return await fetch_and_refresh_product(product_id)
+
+    lock_key = f'lock:product_refresh:{product_id}'
+    lock_token = await acquire_lock(lock_key, settings.PRODUCT_FETCH_LOCK_TTL)
+    if lock_token is None:
+        return None
+
+    try:
+        return await fetch_and_refresh_product(product_id)
+    finally:
+        await release_lock(lock_key, lock_token)
+
+
+async def fetch_and_refresh_product(product_id: int) -> Optional[Product]:
+    try:
+        api_product = await call_upstream(product_id)
+    except ProductNotFoundError:
+        logger.warning(f'Produto {product_id} não existe mais na API; mantido no banco')
+        await mark_missing(product_id)
+        # Conta como revalidado: nenhum worker volta à API antes de PRODUCT_FRESH_TTL
+        async with session_factory() as session:
+            await session.execute(
+                update(ProductModel)
+                .where(ProductModel.id == product_id)
+                .values(refreshed_at=func.now())
+            )
+            await session.commit()
+        return None
+    except UPSTREAM_UNAVAILABLE:
+        logger.info(f'API indisponível; produto {product_id} segue desatualizado')
+        return None
+    except Exception as e:
+        logger.error(f'Erro ao revalidar o produto {product_id}: {e}')
+        return None
+
+    async with session_factory() as session:
+        await session.execute(upsert_products_stmt(session, [product_to_row(api_product)]))
+        await session.commit()
+    logger.info(f'Produto {product_id} revalidado na API')
+    return api_product
+
+
+def schedule_refresh(product_id: int) -> None:
+    """Agenda a revalidação do produto em segundo plano, sem duplicar a mesma busca."""
+    # 404 recente conhecido neste processo: nem cria a tarefa (refresh_product
+    # confere também a camada Redis)
+    if refresh_flights.in_flight(product_id) or missing_products.local.get(str(product_id)):
+        return
+
+    # A revalidação não herda o prazo da requisição que a disparou
+    context = contextvars.copy_context()
+    context.run(deadline_var.set, None)
+    task = asyncio.create_task(
+        refresh_flights.do(product_id, refresh_product, product_id), context=context
+    )
+    refresh_tasks.add(task)
+    task.add_done_callback(refresh_tasks.discard)
+
+
+async def cancel_refreshes() -> None:
+    """Cancela as revalidações pendentes (encerramento da aplicação)."""
+    tasks = list(refresh_tasks)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def is_missing(product_id: int) -> bool:
+    """Indica se a API respondeu 404 para o produto há menos de PRODUCT_NOT_FOUND_TTL."""
+    return await missing_products.get(str(product_id)) is not None
+
+
+async def missing_ids(product_ids: Iterable[int]) -> set[int]:
+    """IDs, dentre `product_ids`, que a API respondeu com 404 (um único MGET no Redis)."""
+    found = await missing_products.get_many(str(product_id) for product_id in product_ids)
+    return {int(product_id) for product_id in found}
+
+
+async def mark_missing(product_id: int) -> None:
+    logger.info(f'Produto {product_id} não encontrado na API')
+    await missing_products.set(str(product_id), True)
+
+
+def product_from_model(db_product: ProductModel) -> Product:
+    return Product(
+        id=db_product.id, title=db_product.title, price=db_product.price, image=db_product.image
+    )
+
+
+async def wait_for_product(product_id: int, session: AsyncSession) -> Optional[ProductModel]:
+    """
+    Aguarda outro processo (dono do lock) salvar o produto no banco.
+
+    Consulta o banco e o cache negativo em intervalos crescentes, limitados ao prazo
+    da requisição. Retorna None assim que o dono do lock registra o 404 ou após
+    PRODUCT_FETCH_LOCK_TTL.
+    """
+    give_up_at = time.monotonic() + settings.PRODUCT_FETCH_LOCK_TTL
+    delay = LOCK_POLL_INTERVAL
+    while (left := give_up_at - time.monotonic()) > 0:
+        await asyncio.sleep(remaining(min(delay, left)))
+        db_product = await get_product_from_db(product_id, session)
+        if db_product:
+            return db_product
+        if await is_missing(product_id):
+            return None
+        delay = min(delay * 2, LOCK_POLL_MAX_INTERVAL)
+    return None
+
+
 async def fetch_product(product_id: int, session: AsyncSession) -> Optional[Product]:
     """
     Busca um produto pelo ID seguindo a ordem:
     1. Banco de dados
     2. API externa
     3. Produtos do cache Redis (fallback)
+    4. Snapshot local do catálogo (fallback sem rede)
+
+    Um produto do banco é sempre retornado na hora; se estiver desatualizado
+    (PRODUCT_FRESH_TTL), é revalidado na API em segundo plano. Só produtos
+    ausentes do banco esperam pela API. IDs ausentes do banco que a API respondeu
+    com 404 retornam None sem consultar outra fonte até PRODUCT_NOT_FOUND_TTL expirar.
     """
     db_product = await get_product_from_db(product_id, session)
     if db_product:
         logger.info(f'Produto {product_id} encontrado no banco de dados')
-        return Product(
-            id=db_product.id, title=db_product.title, price=db_product.price, image=db_product.image
-        )
+        if not is_fresh(db_product):
+            schedule_refresh(product_id)
+        return product_from_model(db_product)
+
+    # Cache negativo só depois do banco: produtos existentes não pagam a ida ao Redis
+    if await is_missing(product_id):
+        return None
+
+    return await product_flights.do(product_id, resolve_product, product_id, session)
+
+
+async def resolve_product(product_id: int, session: AsyncSession) -> Optional[Product]:
+    """
+    Resolve um produto ausente do banco (API externa ou cache) e o persiste.
 
-    url = f'{PRODUCTS_API_URL}/{product_id}/'
+    Com PRODUCT_FETCH_LOCK_ENABLED, um lock no Redis coordena os workers: quem
+    não obtém o lock aguarda o produto aparecer no banco em vez de repetir a busca.
+    """
+    if not settings.PRODUCT_FETCH_LOCK_ENABLED:
+        return await fetch_and_save_product(product_id, session)
+
+    lock_key = f'lock:product:{product_id}'
+    lock_token = await acquire_lock(lock_key, settings.PRODUCT_FETCH_LOCK_TTL)
+    if lock_token is None:
+        db_product = await wait_for_product(product_id, session)
+        if db_product:
+            return product_from_model(db_product)
+        if await is_missing(product_id):
+            return None
+        return await fetch_and_save_product(product_id, session)
+
+    try:
+        return await fetch_and_save_product(product_id, session)
+    finally:
+        await release_lock(lock_key, lock_token)
+
+
+async def fetch_and_save_product(product_id: int, session: AsyncSession) -> Optional[Product]:
     logger.info(
         f'Produto não encontrado no banco. Tentando buscar o produto {product_id} na API...'
     )
     try:
-        api_product = await circuit_breaker.call(async_fetch_product, url)
+        api_product = await call_upstream(product_id)
         await save_product_to_db(api_product, session)
         return api_product
-    except pybreaker.CircuitBreakerError:
-        logger.info('Circuit Breaker ativado! Ativando fallback para produtos em cache.')
-        logger.error(
-            f'Circuit Breaker foi acionado após {circuit_breaker.failure_count} falhas consecutivas'
-        )
+    except ProductNotFoundError:
+        await mark_missing(product_id)
+        return None
+    except UPSTREAM_UNAVAILABLE:
+        logger.info('API indisponível! Ativando fallback para produtos em cache.')
 
         product_from_cache = await get_product_from_cache(product_id)
+        if not product_from_cache:
+            product_from_cache = get_product_from_snapshot(product_id)
 
         if product_from_cache:
             logger.info(f'Salvando produto do cache {product_id} no banco...')
-            await save_product_to_db(product_from_cache, session)
+            await save_product_to_db(product_from_cache, session, fresh=False)
 
         return product_from_cache
+    except DeadlineExceededError:
+        raise
     except Exception as e:
         logger.error(f'Erro ao buscar o produto {product_id}: {e}')
         return None
 
 
-async def async_fetch_product(url: str) -> Product:
-    async with aiohttp.ClientSession() as session:
-        async with session.get(
-            url, ssl=ssl_context, timeout=aiohttp.ClientTimeout(total=10)
-        ) as response:
-            if 'text/html' in response.content_type:
-                raise Exception(f'API fora do ar: {url}')
+async def fetch_products(
+    product_ids: Iterable[int], session: AsyncSession, rejected: Optional[set[int]] = None
+) -> Dict[int, Product]:
+    """
+    Resolve vários produtos de uma vez, na mesma ordem de fontes de fetch_product:
+    1. Banco de dados (uma única consulta WHERE id IN (...))
+    2. API externa, com chamadas concorrentes limitadas por PRODUCT_FETCH_CONCURRENCY
+    3. Catálogo do cache Redis e snapshot local, para os produtos barrados pelo
+       circuit breaker ou pelo limite de chamadas simultâneas (bulkhead)
+
+    Os produtos novos são persistidos com um único INSERT multi-linha. IDs ausentes
+    do banco que a API respondeu com 404 não são buscados em nenhuma outra fonte
+    até PRODUCT_NOT_FOUND_TTL.
+
+    Os IDs barrados pelo circuit breaker ou pelo bulkhead e ausentes dos fallbacks
+    são acrescentados a `rejected`, se informado: a API nem chegou a ser consultada.
+
+    Returns:
+        Dict[int, Product]: Produtos encontrados, indexados pelo ID. IDs ausentes
+        do resultado não foram encontrados em nenhuma fonte.
+    """
+    ids = list(dict.fromkeys(product_ids))
+    if not ids:
+        return {}
+
+    result = await session.scalars(select(ProductModel).where(ProductModel.id.in_(ids)))
+    products = {}
+    for db_product in result:
+        products[db_product.id] = product_from_model(db_product)
+        if not is_fresh(db_product):
+            schedule_refresh(db_product.id)
+
+    absent = [product_id for product_id in ids if product_id not in products]
+    # Cache negativo só para os ausentes do banco, em uma única ida ao Redis (MGET)
+    known_missing = await missing_ids(absent)
+    missing = [product_id for product_id in absent if product_id not in known_missing]
+    if not missing:
+        return products
 
-            if response.status == HTTPStatus.NOT_FOUND:
-                raise Exception(f'Produto não encontrado: {url}')
-            elif response.status != HTTPStatus.OK:
-                raise Exception(f'Erro na resposta: {url}')
+    semaphore = asyncio.Semaphore(settings.PRODUCT_FETCH_CONCURRENCY)
+    unavailable: list[int] = []
 
+    async def fetch_from_api(product_id: int) -> Optional[Product]:
+        async with semaphore:
             try:
-                data: Dict = await response.json()
-                if not data or 'id' not in data:
-                    raise Exception('Dados inválidos recebidos')
-                return Product(**data)
-            except aiohttp.ContentTypeError:
-                raise Exception(f'Erro de decodificação: {url}')
+                return await call_upstream(product_id)
+            except ProductNotFoundError:
+                await mark_missing(product_id)
+            except UPSTREAM_UNAVAILABLE:
+                unavailable.append(product_id)
+            except DeadlineExceededError:
+                raise
+            except Exception as e:
+                logger.error(f'Erro ao buscar o produto {product_id}: {e}')
+            return None
+
+    fetched = await asyncio.gather(*(fetch_from_api(product_id) for product_id in missing))
+    new_products = {product.id: product for product in fetched if product}
+
+    fallback_ids = set()
+    if unavailable:
+        logger.info('API indisponível! Ativando fallback para produtos em cache.')
+        from_cache = await get_products_from_cache(unavailable)
+        for product_id in unavailable:
+            product = from_cache.get(product_id) or get_product_from_snapshot(product_id)
+            if product:
+                new_products[product_id] = product
+                fallback_ids.add(product_id)
+            elif rejected is not None:
+                rejected.add(product_id)
+
+    await save_products_to_db(new_products.values(), session, stale_ids=fallback_ids)
+    products.update(new_products)
+    return products
+
+
+async def call_upstream(product_id: int) -> Product:
+    """
+    Busca o produto na API passando pelo bulkhead e pelo circuit breaker.
+
+    A chamada é cancelada quando o prazo da requisição acaba; o cancelamento não
+    conta como falha da API no circuit breaker. Duração e resultado de cada
+    chamada vão para upstream_request_duration_seconds.
+    """
+    outcome = 'error'
+    start = time.perf_counter()
+    timeout = asyncio.timeout(remaining())
+    try:
+        async with timeout:
+            product = await upstream_bulkhead.call(
+                circuit_breaker.call, async_fetch_product, f'{PRODUCTS_API_URL}/{product_id}/'
+            )
+        outcome = 'ok'
+        return product
+    except ProductNotFoundError:
+        outcome = 'not_found'
+        raise
+    except UPSTREAM_UNAVAILABLE:
+        outcome = 'unavailable'
+        raise
+    except TimeoutError as e:
+        if timeout.expired():
+            outcome = 'deadline'
+            raise DeadlineExceededError('Prazo da requisição esgotado') from e
+        outcome = 'timeout'
+        raise
+    finally:
+        upstream_request_seconds.observe(time.perf_counter() - start, outcome)
+
+
+async def async_fetch_product(
+    url: str, http_session: Optional[aiohttp.ClientSession] = None
+) -> Product:
+    session = http_session or http_client.session
+    async with session.get(
+        url, ssl=ssl_context, timeout=aiohttp.ClientTimeout(total=10)
+    ) as response:
+        if 'text/html' in response.content_type:
+            raise Exception(f'API fora do ar: {url}')
+
+        if response.status == HTTPStatus.NOT_FOUND:
+            raise ProductNotFoundError(f'Produto não encontrado: {url}')
+        elif response.status != HTTPStatus.OK:
+            raise Exception(f'Erro na resposta: {url}')
+
+        try:
+            data: Dict = await response.json()
+            if not data or 'id' not in data:
+                raise Exception('Dados inválidos recebidos')
+            return Product(**data)
+        except aiohttp.ContentTypeError:
+            raise Exception(f'Erro de decodificação: {url}')
+
+
+async def get_legacy_catalog() -> Dict[int, Dict]:
+    """
+    Lê o catálogo no formato antigo (um único JSON na chave 'catalog').
+
+    Usado apenas enquanto o Redis não tiver sido migrado por scripts/init_redis.py.
+    """
+    catalog = await get_json(LEGACY_CATALOG_KEY)
+    if not catalog:
+        logger.warning('Catálogo não encontrado no Redis')
+        return {}
+    return {product.get('id'): product for product in catalog}
 
 
 async def get_product_from_cache(product_id: int) -> Optional[Product]:
@@ -124,20 +582,45 @@ async def get_product_from_cache(product_id: int) -> Optional[Product]:
         Product: Instância do modelo Product ou None se não encontrado
     """
     try:
-        catalog = await get_json('catalog')
-        if not catalog:
-            logger.warning('Catálogo não encontrado no Redis')
-            return None
+        product_dict = await hget_json(CATALOG_KEY, str(product_id))
+        if product_dict is None and not await key_exists(CATALOG_VERSION_KEY):
+            product_dict = (await get_legacy_catalog()).get(product_id)
 
-        mock_product_dict = next(
-            (product for product in catalog if product.get('id') == product_id), None
-        )
-
-        if mock_product_dict:
+        if product_dict:
             logger.info(f'Produto {product_id} encontrado no cache Redis')
-            return Product(**mock_product_dict)
+            return Product(**product_dict)
 
         logger.info(f'Produto {product_id} não encontrado no cache Redis')
         return None
     except Exception as e:
         logger.error(f'Erro ao buscar produto {product_id} do cache: {e}')
+
+
+async def get_products_from_cache(product_ids: Iterable[int]) -> Dict[int, Product]:
+    """Busca vários produtos no catálogo do cache Redis com um único HMGET."""
+    try:
+        ids = list(product_ids)
+        found = await hmget_json(CATALOG_KEY, [str(product_id) for product_id in ids])
+        if not found and not await key_exists(CATALOG_VERSION_KEY):
+            legacy = await get_legacy_catalog()
+            found = {
+                str(product_id): legacy[product_id] for product_id in ids if product_id in legacy
+            }
+
+        return {int(product_id): Product(**product) for product_id, product in found.items()}
+    except Exception as e:
+        logger.error(f'Erro ao buscar produtos do cache: {e}')
+        return {}
+
+
+def get_product_from_snapshot(product_id: int) -> Optional[Product]:
+    """Busca um produto no snapshot local do catálogo (sem Redis nem API)."""
+    try:
+        product_dict = catalog_snapshot.get(product_id)
+        if product_dict:
+            logger.info(f'Produto {product_id} encontrado no snapshot do catálogo')
+            return Product(**product_dict)
+        return None
+    except Exception as e:
+        logger.error(f'Erro ao buscar produto {product_id} no snapshot: {e}')
+        return None
@@ -1,15 +1,20 @@
 from http import HTTPStatus
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.schemas.common import FilterPage
 
-from ..core.security import get_password_hash
+from ..core.db import mark_write
+from ..core.pagination import next_cursor, paginate
+from ..core.security import async_get_password_hash, invalidate_principal
 from ..models.user import User
+from ..models.wishlist import Wishlist
+from ..schemas.auth import Principal
 from ..schemas.user import UserSchema
+from .wishlist import wishlist_cache
 
 
 def user_exists(db_user: User, user: UserSchema):
@@ -32,47 +37,79 @@ async def create_user_service(user: UserSchema, session: AsyncSession) -> User:
     )
     user_exists(db_user, user)
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await async_get_password_hash(user.password)
     db_user = User(username=user.username, password=hashed_password, email=user.email)
     session.add(db_user)
     await session.commit()
     await session.refresh(db_user)
+    # O primeiro token do usuário (login) ainda não está na réplica
+    await mark_write(db_user.email)
     return db_user
 
 
-async def get_users_service(session: AsyncSession, filter_users: FilterPage) -> list[User]:
-    query = await session.scalars(
-        select(User).offset(filter_users.offset).limit(filter_users.limit)
+async def get_users_service(session: AsyncSession, filter_users: FilterPage) -> dict:
+    """Página de usuários como dict no formato de UserList (sem validação)."""
+    query = await session.execute(
+        paginate(
+            select(User.id, User.username, User.email, User.created_at),
+            filter_users,
+            User.created_at,
+            User.id,
+        )
     )
-    users = query.all()
+    rows = query.all()
+    users = [{'id': row.id, 'username': row.username, 'email': row.email} for row in rows]
+
+    return {'users': users, 'next_cursor': next_cursor(rows, filter_users)}
 
-    return {'users': users}
+
+async def get_user_or_404(user_id: int, session: AsyncSession) -> User:
+    db_user = await session.get(User, user_id)
+    if not db_user:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='User not found')
+    return db_user
 
 
 async def update_user_service(
-    user_id: int, user: UserSchema, session: AsyncSession, current_user: User
+    user_id: int, user: UserSchema, session: AsyncSession, current_user: Principal
 ) -> User:
     if current_user.id != user_id:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions')
+
+    db_user = await get_user_or_404(user_id, session)
+    hashed_password = await async_get_password_hash(user.password)
     try:
-        current_user.username = user.username
-        current_user.password = get_password_hash(user.password)
-        current_user.email = user.email
+        db_user.username = user.username
+        db_user.password = hashed_password
+        db_user.email = user.email
         await session.commit()
-        await session.refresh(current_user)
-        return current_user
+        await session.refresh(db_user)
     except IntegrityError:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
             detail='Username or Email already exists',
         )
 
+    # Marca antes de invalidar: uma leitura concorrente na réplica defasada
+    # devolveria o principal antigo ao cache. O email novo é o 'sub' dos próximos tokens
+    await mark_write(current_user.email)
+    await mark_write(db_user.email)
+    await invalidate_principal(current_user.email)
+    return db_user
+
 
-async def delete_user_service(user_id: int, session: AsyncSession, current_user: User):
+async def delete_user_service(user_id: int, session: AsyncSession, current_user: Principal):
     if current_user.id != user_id:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions')
 
-    await session.delete(current_user)
+    await session.execute(delete(Wishlist).where(Wishlist.user_id == user_id))
+    result = await session.execute(delete(User).where(User.id == user_id))
+    if not result.rowcount:
+        await session.rollback()
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='User not found')
     await session.commit()
+    await mark_write(current_user.email)
+    await invalidate_principal(current_user.email)
+    await wishlist_cache.bump(user_id)
 
     return {'message': 'User deleted'}
@@ -1,17 +1,38 @@
-from collections import defaultdict
+import json
+import time
 from http import HTTPStatus
+from typing import AsyncIterator
 
 from fastapi import HTTPException
+from pydantic_core import to_json
 from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.models.product import Product
 from src.models.wishlist import Wishlist
 from src.schemas.common import FilterPage, Message
-from src.schemas.wishlist import WishlistList, WishlistPublic, WishlistSchema
+from src.schemas.wishlist import (
+    WishlistBatchResult,
+    WishlistBatchSchema,
+    WishlistItemStatus,
+    WishlistPublic,
+    WishlistSchema,
+)
 
-from ..services.product import fetch_product
+from ..core.cache import VersionedCache
+from ..core.db import dialect_insert
+from ..core.metrics import track_cache
+from ..core.pagination import next_cursor, paginate
+from ..core.settings import Settings
+from ..services.product import fetch_product, fetch_products
+
+# Páginas de GET /wishlists por usuário; toda escrita na wishlist incrementa a versão
+wishlist_cache = VersionedCache('wishlist', ttl=Settings().WISHLIST_CACHE_TTL)
+track_cache('wishlist', wishlist_cache.stats)
+
+# Linhas buscadas por ida ao banco no export em streaming
+EXPORT_BATCH_SIZE = 500
 
 
 async def create_wishlist_service(
@@ -33,42 +54,114 @@ async def create_wishlist_service(
             detail='Este produto já está na sua lista de desejos.',
         )
 
+    await wishlist_cache.bump(user_id)
     return db_wishlist
 
 
 async def read_wishlist_service(
     session: AsyncSession, filter_users: FilterPage, user_id: int
-) -> WishlistList:
+) -> bytes:
+    """
+    Página da wishlist do usuário.
+
+    Returns:
+        bytes: Corpo JSON no formato de WishlistList, para FastJSONResponse; o
+        cache guarda esse mesmo JSON, então um acerto não serializa nada
+    """
+    start = time.perf_counter()
+    page_key = f'{filter_users.offset}:{filter_users.limit}:{filter_users.after or ""}'
+    cached, version = await wishlist_cache.get_raw(user_id, page_key)
+    if cached is not None:
+        wishlist_cache.stats.observe(True, time.perf_counter() - start)
+        return cached.encode()
+
+    body = to_json(await query_wishlist_page(session, filter_users, user_id))
+
+    await wishlist_cache.set_raw(user_id, version, page_key, body.decode())
+    if version is not None:
+        wishlist_cache.stats.observe(False, time.perf_counter() - start)
+    return body
+
+
+async def query_wishlist_page(
+    session: AsyncSession, filter_users: FilterPage, user_id: int
+) -> dict:
+    """Página da wishlist como dict no formato de WishlistList (sem validação)."""
+    # Só as colunas da resposta e do cursor: sem montar objetos do ORM por item
     query = await session.execute(
-        select(Wishlist, Product)
-        .join(Product, Wishlist.product_id == Product.id)
-        .where(Wishlist.user_id == user_id)
-        .offset(filter_users.offset)
-        .limit(filter_users.limit)
+        paginate(
+            select(
+                Wishlist.id,
+                Wishlist.created_at,
+                Product.id.label('product_id'),
+                Product.title,
+                Product.price,
+                Product.image,
+                Product.review_score,
+            )
+            .join(Product, Wishlist.product_id == Product.id)
+            .where(Wishlist.user_id == user_id),
+            filter_users,
+            Wishlist.created_at,
+            Wishlist.id,
+        )
     )
-    results = query.all()
-
-    wishlist_dict = defaultdict(list)
-    for wishlist, product in results:
-        wishlist_dict[wishlist.user_id].append({
-            'product_id': product.id,
-            'title': product.title,
-            'price': product.price,
-            'image': product.image,
-            'review_score': product.review_score,
-        })
-
-    grouped_wishlists = [
-        {'user_id': user_id, 'products': products} for user_id, products in wishlist_dict.items()
+    rows = query.all()
+
+    products = [
+        {
+            'product_id': row.product_id,
+            'title': row.title,
+            'price': row.price,
+            'image': row.image,
+            'review_score': row.review_score,
+        }
+        for row in rows
     ]
-
-    return {'wishlists': grouped_wishlists}
+    grouped_wishlists = [{'user_id': user_id, 'products': products}] if products else []
+
+    return {'wishlists': grouped_wishlists, 'next_cursor': next_cursor(rows, filter_users)}
+
+
+async def export_wishlist_service(
+    session_factory: async_sessionmaker[AsyncSession], user_id: int
+) -> AsyncIterator[bytes]:
+    """
+    Exporta a wishlist completa do usuário em NDJSON (um produto por linha).
+
+    As linhas são lidas do banco em lotes de EXPORT_BATCH_SIZE (yield_per) e
+    enviadas conforme chegam, com memória constante independente do tamanho da lista.
+    """
+    async with session_factory() as session:
+        result = await session.stream(
+            select(Product.id, Product.title, Product.price, Product.image, Product.review_score)
+            .join(Wishlist, Wishlist.product_id == Product.id)
+            .where(Wishlist.user_id == user_id)
+            .order_by(Wishlist.created_at, Wishlist.id)
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for rows in result.partitions():
+            yield b''.join(
+                json.dumps(
+                    {
+                        'product_id': row.id,
+                        'title': row.title,
+                        'price': row.price,
+                        'image': row.image,
+                        'review_score': row.review_score,
+                    },
+                    ensure_ascii=False,
+                ).encode()
+                + b'\n'
+                for row in rows
+            )
 
 
 async def delete_wishlist_service(session: AsyncSession, user_id: int) -> Message:
     stmt = delete(Wishlist).where(Wishlist.user_id == user_id)
     await session.execute(stmt)
     await session.commit()
+    await wishlist_cache.bump(user_id)
     return {'message': 'Wishlist deleted'}
 
 
@@ -78,4 +171,76 @@ async def delete_wishlist_product_service(
     stmt = delete(Wishlist).where((Wishlist.user_id == user_id) & (Wishlist.product_id == prod_id))
     await session.execute(stmt)
     await session.commit()
+    await wishlist_cache.bump(user_id)
     return {'message': 'Product deleted from wishlist'}
+
+
+async def batch_wishlist_service(
+    batch: WishlistBatchSchema, session: AsyncSession, user_id: int
+) -> WishlistBatchResult:
+    """
+    Aplica inclusões e remoções em lote na wishlist do usuário.
+
+    As remoções são aplicadas antes das inclusões. Os produtos novos são resolvidos
+    com fetch_products e as alterações da wishlist são gravadas em uma única
+    transação, com um DELETE e um INSERT para todos os itens.
+    """
+    to_remove = list(dict.fromkeys(batch.remove))
+    to_add = list(dict.fromkeys(batch.add))
+
+    existing = set()
+    if to_add:
+        existing = set(
+            await session.scalars(
+                select(Wishlist.product_id).where(
+                    (Wishlist.user_id == user_id) & Wishlist.product_id.in_(to_add)
+                )
+            )
+        )
+    already_present = existing - set(to_remove)
+    products = await fetch_products(
+        [product_id for product_id in to_add if product_id not in already_present], session
+    )
+
+    removed = set()
+    if to_remove:
+        result = await session.scalars(
+            delete(Wishlist)
+            .where((Wishlist.user_id == user_id) & Wishlist.product_id.in_(to_remove))
+            .returning(Wishlist.product_id)
+        )
+        removed = set(result)
+
+    added = set()
+    if products:
+        stmt = (
+            dialect_insert(session, Wishlist)
+            .values([{'user_id': user_id, 'product_id': product_id} for product_id in products])
+            .on_conflict_do_nothing()
+            .returning(Wishlist.product_id)
+        )
+        added = set(await session.scalars(stmt))
+
+    await session.commit()
+    if removed or added:
+        await wishlist_cache.bump(user_id)
+
+    results = [
+        {
+            'product_id': product_id,
+            'status': WishlistItemStatus.REMOVED
+            if product_id in removed
+            else WishlistItemStatus.NOT_FOUND,
+        }
+        for product_id in to_remove
+    ]
+    for product_id in to_add:
+        if product_id in added:
+            status = WishlistItemStatus.ADDED
+        elif product_id in already_present or product_id in products:
+            status = WishlistItemStatus.ALREADY_PRESENT
+        else:
+            status = WishlistItemStatus.NOT_FOUND
+        results.append({'product_id': product_id, 'status': status})
+
+    return {'results': results}
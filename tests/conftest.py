@@ -1,29 +1,56 @@
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timezone
 
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy import event
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
 from src.app import app
-from src.core.db import get_session
-from src.core.security import get_password_hash
+from src.core.cache import cache_invalidations
+from src.core.db import (
+    apply_deadlines,
+    get_session,
+    get_session_factory,
+    is_internal_query,
+    track_query_times,
+)
+from src.core.security import get_password_hash, principal_cache
 from src.models import table_registry
 from src.models.product import Product as ProductModel
 from src.schemas.product import Product
+from src.services.product import circuit_breaker, missing_products
+from src.services.wishlist import wishlist_cache
 from tests.factories import ProductFactory, UserFactory, WishlistFactory
 
 
+@pytest.fixture(autouse=True)
+def reset_caches(monkeypatch):
+    monkeypatch.setattr(principal_cache, 'redis_enabled', False)
+    monkeypatch.setattr(cache_invalidations, 'enabled', False)
+    monkeypatch.setattr(wishlist_cache, 'enabled', False)
+    monkeypatch.setattr(circuit_breaker, 'shared', False)
+    monkeypatch.setattr(missing_products, 'redis_enabled', False)
+    principal_cache.local.clear()
+    missing_products.local.clear()
+    yield
+    principal_cache.local.clear()
+    missing_products.local.clear()
+
+
 @pytest.fixture
 def client(session):
     def get_session_override():
         return session
 
+    def get_session_factory_override():
+        return async_sessionmaker(session.bind, expire_on_commit=False)
+
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_session_factory] = get_session_factory_override
         yield client
 
     app.dependency_overrides.clear()
@@ -33,6 +60,8 @@ def client(session):
 def engine():
     with PostgresContainer('postgres:16', driver='psycopg') as postgres:
         _engine = create_async_engine(postgres.get_connection_url())
+        track_query_times(_engine)
+        apply_deadlines(_engine)
         yield _engine
 
 
@@ -68,6 +97,40 @@ def mock_db_time():
     return _mock_db_time
 
 
+@pytest.fixture
+def count_queries(engine):
+    @contextmanager
+    def _count_queries():
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, *args):
+            if not is_internal_query(context):
+                statements.append(statement)
+
+        event.listen(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield statements
+        finally:
+            event.remove(engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+
+    return _count_queries
+
+
+@pytest.fixture
+def assert_max_queries(count_queries):
+    """Falha se o bloco executar mais de `limit` consultas (orçamento por endpoint)."""
+
+    @contextmanager
+    def _assert_max_queries(limit: int):
+        with count_queries() as statements:
+            yield statements
+        assert len(statements) <= limit, (
+            f'{len(statements)} consultas, orçamento de {limit}:\n' + '\n'.join(statements)
+        )
+
+    return _assert_max_queries
+
+
 @pytest_asyncio.fixture
 async def user(session):
     password = 'testtest'
@@ -96,6 +159,16 @@ async def other_user(session):
     return user
 
 
+@pytest_asyncio.fixture
+async def user_with_large_wishlist(session, user):
+    products = [ProductFactory(id=product_id) for product_id in range(1, 201)]
+    session.add_all(products)
+    await session.commit()
+    session.add_all([WishlistFactory(user_id=user.id, product_id=p.id) for p in products])
+    await session.commit()
+    return user
+
+
 @pytest.fixture
 def token(client, user):
     response = client.post(
@@ -145,4 +218,6 @@ def product_schema(product_data):
 
 @pytest.fixture
 def product_model(product_data):
-    return ProductModel(**product_data)
+    product = ProductModel(**product_data)
+    product.refreshed_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    return product
@@ -2,6 +2,8 @@ from http import HTTPStatus
 
 from freezegun import freeze_time
 
+from src.core.security import password_executor, principal_cache
+
 
 def test_get_token(client, user):
     response = client.post(
@@ -86,3 +88,43 @@ def test_token_expired_dont_refresh(client, user):
         )
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_get_token_queries_only_user_columns(client, user_with_large_wishlist, count_queries):
+    user = user_with_large_wishlist
+
+    with count_queries() as statements:
+        response = client.post(
+            '/auth/token',
+            data={'username': user.email, 'password': user.clean_password},
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(statements) == 1
+    assert 'wishlists' not in statements[0]
+
+
+def test_read_wishlists_query_count(client, user_with_large_wishlist, token, count_queries):
+    principal_cache.local.clear()
+
+    with count_queries() as cold:
+        response = client.get('/wishlists/', headers={'Authorization': f'Bearer {token}'})
+    with count_queries() as warm:
+        cached_response = client.get('/wishlists/', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == cached_response.status_code == HTTPStatus.OK
+    assert len(warm) == 1
+    assert len(cold) == len(warm) + 1
+    assert not any('wishlists.user_id IN' in statement for statement in cold)
+
+
+def test_get_token_server_busy(client, user, monkeypatch):
+    monkeypatch.setattr(password_executor, 'max_pending', 0)
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['Retry-After'] == '1'
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from src.core.bulkhead import AIMDLimit, Bulkhead, BulkheadFullError
+
+
+async def blocked(event: asyncio.Event):
+    await event.wait()
+    return 'ok'
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_limits_in_flight_and_queues():
+    bulkhead = Bulkhead(max_concurrent=2, max_queue=2, queue_timeout=1)
+    release = asyncio.Event()
+
+    calls = [asyncio.create_task(bulkhead.call(blocked, release)) for _ in range(4)]
+    await asyncio.sleep(0)
+
+    assert bulkhead.in_flight == bulkhead.max_concurrent
+    assert bulkhead.queued == bulkhead.max_queue
+
+    release.set()
+    assert await asyncio.gather(*calls) == ['ok'] * 4
+    assert bulkhead.in_flight == 0
+    assert bulkhead.queued == 0
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_rejects_when_queue_is_full():
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=0)
+    release = asyncio.Event()
+    running = asyncio.create_task(bulkhead.call(blocked, release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(BulkheadFullError):
+        await bulkhead.call(blocked, release)
+
+    release.set()
+    await running
+    assert bulkhead.rejected == 1
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_queue_timeout():
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=1, queue_timeout=0.01)
+    release = asyncio.Event()
+    running = asyncio.create_task(bulkhead.call(blocked, release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(BulkheadFullError):
+        await bulkhead.call(blocked, release)
+
+    assert bulkhead.timeouts == 1
+    assert bulkhead.queued == 0
+    release.set()
+    await running
+    assert bulkhead.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_releases_slot_on_error():
+    bulkhead = Bulkhead(max_concurrent=1)
+
+    async def failing():
+        raise ValueError('erro')
+
+    with pytest.raises(ValueError, match='erro'):
+        await bulkhead.call(failing)
+
+    assert bulkhead.in_flight == 0
+
+
+def test_aimd_limit_decreases_on_slow_calls_and_recovers():
+    aimd = AIMDLimit(min_limit=2, latency_threshold=1.0, backoff=0.5)
+    max_limit = 10
+
+    slow = aimd.update(max_limit, max_limit, latency=5.0, in_flight=max_limit)
+    assert slow == max_limit * aimd.backoff
+    assert aimd.update(aimd.min_limit, max_limit, latency=5.0, in_flight=1) == aimd.min_limit
+
+    assert aimd.update(slow, max_limit, latency=0.1, in_flight=int(slow)) == slow + 1
+    assert aimd.update(max_limit, max_limit, latency=0.1, in_flight=max_limit) == max_limit
+    # sem uso do limite atual (poucas chamadas simultâneas), o limite não cresce
+    assert aimd.update(slow, max_limit, latency=0.1, in_flight=1) == slow
+
+
+@pytest.mark.asyncio
+async def test_bulkhead_adaptive_limit_shrinks_on_timeouts():
+    bulkhead = Bulkhead(max_concurrent=8, adaptive=AIMDLimit(min_limit=1, backoff=0.5))
+
+    async def timing_out():
+        raise asyncio.TimeoutError
+
+    with pytest.raises(asyncio.TimeoutError):
+        await bulkhead.call(timing_out)
+
+    assert bulkhead.limit == bulkhead.max_concurrent // 2
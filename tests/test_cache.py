@@ -0,0 +1,199 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from src.core.cache import (
+    CacheInvalidationListener,
+    LocalTTLCache,
+    TieredCache,
+    VersionedCache,
+)
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalTTLCache(maxsize=2)
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    cache.get('a')
+    cache.set('c', 'C')
+
+    assert cache.get('a') == 'A'
+    assert cache.get('b') is None
+    assert cache.get('c') == 'C'
+
+
+def test_local_cache_expires_items():
+    cache = LocalTTLCache(ttl=10)
+    with patch('src.core.cache.time.monotonic', return_value=100):
+        cache.set('a', 1)
+    with patch('src.core.cache.time.monotonic', return_value=111):
+        assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_hit_and_miss_counters():
+    cache = TieredCache('test')
+
+    with (
+        patch('src.core.cache.get_json', return_value=None) as get_json,
+        patch('src.core.cache.set_json') as set_json,
+    ):
+        assert await cache.get('key') is None
+        await cache.set('key', {'id': 1})
+        assert await cache.get('key') == {'id': 1}
+
+    get_json.assert_called_once_with('test:key')
+    set_json.assert_called_once_with('test:key', {'id': 1}, cache.redis_ttl)
+    assert cache.stats.misses == 1
+    assert cache.stats.local_hits == 1
+    assert cache.stats.hits == cache.stats.misses
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_fills_local_layer_from_redis():
+    cache = TieredCache('test')
+
+    with patch('src.core.cache.get_json', return_value={'id': 1}) as get_json:
+        assert await cache.get('key') == {'id': 1}
+        assert await cache.get('key') == {'id': 1}
+
+    get_json.assert_called_once()
+    assert cache.stats.redis_hits == 1
+    assert cache.stats.local_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_get_many_uses_single_mget():
+    cache = TieredCache('test')
+    cache.local.set('a', 1)
+    from_redis = 2
+
+    with patch('src.core.cache.mget_json', return_value={'test:b': from_redis}) as mget_json:
+        found = await cache.get_many(['a', 'b', 'c'])
+
+    assert found == {'a': 1, 'b': from_redis}
+    mget_json.assert_called_once_with(['test:b', 'test:c'])
+    assert cache.local.get('b') == from_redis
+    assert (cache.stats.local_hits, cache.stats.redis_hits, cache.stats.misses) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_invalidate():
+    cache = TieredCache('test')
+    cache.local.set('key', {'id': 1})
+
+    with patch('src.core.cache.delete_key') as delete_key:
+        await cache.invalidate('key')
+
+    delete_key.assert_called_once_with('test:key')
+    assert cache.local.get('key') is None
+
+
+@pytest.mark.asyncio
+async def test_tiered_cache_broadcasts_invalidation():
+    cache = TieredCache('principal')
+    cache.broadcast_invalidations = True
+
+    with patch('src.core.cache.delete_key'), patch('src.core.cache.publish') as publish:
+        await cache.invalidate('a@test.com')
+
+    publish.assert_called_once_with('cache:invalidate', '["principal", "a@test.com"]')
+
+
+@pytest.mark.asyncio
+async def test_invalidation_listener_clears_other_workers_local_layer(monkeypatch):
+    listener = CacheInvalidationListener()
+    cache = TieredCache('principal')
+    listener.register(cache)
+    cache.local.set('a@test.com', {'id': 1})
+    cache.local.set('b@test.com', {'id': 2})
+    received = asyncio.Event()
+    monkeypatch.setattr('src.core.cache.INVALIDATION_RETRY_DELAY', 0)
+
+    async def listen(channel):
+        yield '["principal", "a@test.com"]'
+        yield '["outro", "b@test.com"]'
+        received.set()
+        raise ConnectionError('conexão perdida')
+
+    with patch('src.core.cache.listen', listen):
+        listener.start()
+        await received.wait()
+        assert cache.local.get('a@test.com') is None
+        assert cache.local.get('b@test.com') == {'id': 2}
+
+        # Ao reconectar, o que foi publicado durante a queda se perdeu: esvazia a camada
+        await asyncio.sleep(0.01)
+        await listener.stop()
+
+    assert cache.local.get('b@test.com') is None
+
+
+@pytest.mark.asyncio
+async def test_versioned_cache_hit():
+    cache = VersionedCache('wishlist')
+
+    with patch('src.core.cache.run_script', return_value=['3', '{"id": 1}']) as run_script:
+        value, version = await cache.get(7, 'page')
+
+    assert (value, version) == ({'id': 1}, '3')
+    assert run_script.call_args.args[1:] == (['wishlist:ver:7', 'wishlist:7'], ['page'])
+    assert cache.stats.redis_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_versioned_cache_miss_stores_under_current_version():
+    cache = VersionedCache('wishlist', ttl=30)
+
+    with (
+        patch('src.core.cache.run_script', return_value=['0', None]),
+        patch('src.core.cache.set_json') as set_json,
+    ):
+        value, version = await cache.get(7, 'page')
+        await cache.set(7, version, 'page', {'id': 1})
+
+    assert value is None
+    set_json.assert_called_once_with('wishlist:7:v0:page', {'id': 1}, 30)
+    assert cache.stats.misses == 1
+
+
+@pytest.mark.asyncio
+async def test_versioned_cache_redis_unavailable():
+    cache = VersionedCache('wishlist')
+
+    with (
+        patch('src.core.cache.run_script', return_value=None),
+        patch('src.core.cache.set_json') as set_json,
+    ):
+        value, version = await cache.get(7, 'page')
+        await cache.set(7, version, 'page', {'id': 1})
+
+    assert (value, version) == (None, None)
+    set_json.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_versioned_cache_raw_json():
+    cache = VersionedCache('wishlist', ttl=30)
+
+    with (
+        patch('src.core.cache.run_script', return_value=['2', '{"id": 1}']),
+        patch('src.core.cache.set_key') as set_key,
+    ):
+        value, version = await cache.get_raw(7, 'page')
+        await cache.set_raw(7, version, 'page', '{"id": 2}')
+
+    assert (value, version) == ('{"id": 1}', '2')
+    set_key.assert_called_once_with('wishlist:7:v2:page', '{"id": 2}', 30)
+
+
+@pytest.mark.asyncio
+async def test_versioned_cache_bump():
+    cache = VersionedCache('wishlist')
+
+    with patch('src.core.cache.incr_key') as incr_key:
+        await cache.bump(7)
+
+    incr_key.assert_called_once_with('wishlist:ver:7')
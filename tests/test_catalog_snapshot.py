@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from src.core.catalog_snapshot import CatalogSnapshot, CatalogSnapshotStore, build_snapshot
+from src.schemas.product import Product
+
+
+@pytest.fixture
+def catalog():
+    with open('mock_products.json', encoding='UTF-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, catalog):
+    path = tmp_path / 'catalog.snapshot'
+    build_snapshot(reversed(catalog), str(path))
+    return str(path)
+
+
+def test_snapshot_lookup_matches_catalog(snapshot_path, catalog):
+    snapshot = CatalogSnapshot(snapshot_path)
+
+    assert len(snapshot) == len(catalog)
+    for product in catalog:
+        assert Product(**snapshot.get(product['id'])) == Product(**product)
+
+    snapshot.close()
+
+
+def test_snapshot_lookup_missing_id(snapshot_path):
+    snapshot = CatalogSnapshot(snapshot_path)
+
+    assert snapshot.get(0) is None
+    assert snapshot.get(10_000) is None
+
+    snapshot.close()
+
+
+def test_snapshot_optional_fields(tmp_path):
+    path = str(tmp_path / 'catalog.snapshot')
+    build_snapshot([{'id': 7, 'title': 'Título', 'price': 1.5, 'image': 'img'}], path)
+
+    assert CatalogSnapshot(path).get(7) == {
+        'id': 7,
+        'title': 'Título',
+        'price': 1.5,
+        'image': 'img',
+        'brand': None,
+        'reviewScore': None,
+    }
+
+
+def test_snapshot_invalid_file(tmp_path):
+    path = tmp_path / 'catalog.snapshot'
+    path.write_bytes(b'not a snapshot file')
+
+    with pytest.raises(ValueError, match='inválido'):
+        CatalogSnapshot(str(path))
+
+
+def test_snapshot_store_without_file(tmp_path):
+    store = CatalogSnapshotStore(str(tmp_path / 'missing.snapshot'))
+
+    assert store.get(1) is None
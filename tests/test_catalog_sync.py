@@ -0,0 +1,130 @@
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.core.http import http_client
+from src.models.product import Product as ProductModel
+from src.services.catalog_sync import sync_catalog
+
+PAGE_SIZE = 3
+
+
+def catalog_product(product_id, price=10.0):
+    return {
+        'id': product_id,
+        'title': f'Produto {product_id}',
+        'price': price,
+        'image': f'http://example.com/{product_id}.jpg',
+        'reviewScore': 4.0,
+    }
+
+
+@pytest_asyncio.fixture
+async def catalog_server():
+    catalog = [catalog_product(product_id) for product_id in range(1, 9)]
+    requested_pages = []
+    failing_pages = set()
+
+    async def list_products(request):
+        page = int(request.query['page'])
+        requested_pages.append(page)
+        if page in failing_pages:
+            return web.json_response({}, status=HTTPStatus.INTERNAL_SERVER_ERROR)
+        start = (page - 1) * PAGE_SIZE
+        return web.json_response({
+            'meta': {'page_number': page, 'page_size': PAGE_SIZE},
+            'products': catalog[start : start + PAGE_SIZE],
+        })
+
+    app = web.Application()
+    app.router.add_get('/api/product/', list_products)
+    async with TestServer(app) as server:
+        server.catalog = catalog
+        server.requested_pages = requested_pages
+        server.failing_pages = failing_pages
+        server.base_url = str(server.make_url('/api/product'))
+        yield server
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def close_http_client():
+    yield
+    await http_client.close()
+
+
+@pytest.fixture
+def session_factory(session):
+    return async_sessionmaker(session.bind, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_sync_catalog_mirrors_all_pages(session, catalog_server, session_factory):
+    result = await sync_catalog(
+        session_factory, base_url=catalog_server.base_url, concurrency=2, rate=0
+    )
+
+    products = (await session.scalars(select(ProductModel).order_by(ProductModel.id))).all()
+    assert [product.id for product in products] == [p['id'] for p in catalog_server.catalog]
+    assert all(product.refreshed_at is not None for product in products)
+    assert result.inserted == len(catalog_server.catalog)
+    assert result.pages == len(['1-3', '4-6', '7-8'])
+    assert sorted(catalog_server.requested_pages) == [1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_sync_catalog_upserts_only_changed_rows(session, catalog_server, session_factory):
+    await sync_catalog(session_factory, base_url=catalog_server.base_url, rate=0)
+    catalog_server.catalog[0]['price'] = 5.0
+
+    result = await sync_catalog(session_factory, base_url=catalog_server.base_url, rate=0)
+
+    assert result.inserted == 0
+    assert result.updated == 1
+    assert result.unchanged == len(catalog_server.catalog) - 1
+    product = await session.scalar(
+        select(ProductModel).where(ProductModel.id == 1).execution_options(populate_existing=True)
+    )
+    assert product.price == catalog_server.catalog[0]['price']
+
+
+@pytest.mark.asyncio
+async def test_sync_catalog_skips_failed_pages(session, catalog_server, session_factory):
+    catalog_server.failing_pages.add(2)
+
+    result = await sync_catalog(
+        session_factory, base_url=catalog_server.base_url, concurrency=2, rate=0
+    )
+
+    assert result.failed_pages == 1
+    ids = (await session.scalars(select(ProductModel.id))).all()
+    assert sorted(ids) == [1, 2, 3, 7, 8]
+
+
+@pytest.mark.asyncio
+async def test_sync_catalog_continues_past_invalid_page(session, catalog_server, session_factory):
+    for item in catalog_server.catalog[PAGE_SIZE : 2 * PAGE_SIZE]:
+        del item['title']
+
+    result = await sync_catalog(
+        session_factory, base_url=catalog_server.base_url, concurrency=1, rate=0
+    )
+
+    ids = (await session.scalars(select(ProductModel.id))).all()
+    assert sorted(ids) == [1, 2, 3, 7, 8]
+    assert result.pages == len(['1-3', '7-8'])
+    assert result.failed_pages == 0
+
+
+@pytest.mark.asyncio
+async def test_sync_catalog_stops_when_upstream_is_down(session_factory):
+    result = await sync_catalog(
+        session_factory, base_url='http://127.0.0.1:9/api/product', concurrency=2, rate=0
+    )
+
+    assert result.pages == 0
+    assert result.failed_pages == len([1, 2])
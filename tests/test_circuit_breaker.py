@@ -0,0 +1,244 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pybreaker
+import pytest
+from redis.exceptions import NoScriptError
+
+from src.core.circuit_breaker import (
+    ACQUIRE_SCRIPT,
+    RECORD_SCRIPT,
+    RELEASE_PROBE_SCRIPT,
+    AsyncCircuitBreaker,
+    CircuitBreakerPolicy,
+)
+from src.core.redis import run_script
+
+
+async def failing():
+    raise Exception('upstream fora do ar')
+
+
+async def fail(breaker, times=1):
+    for _ in range(times):
+        with pytest.raises(Exception, match='upstream fora do ar'):
+            await breaker.call(failing)
+
+
+def local_breaker(**policy):
+    breaker = AsyncCircuitBreaker(CircuitBreakerPolicy(**policy))
+    now = [1000.0]
+    breaker.clock = lambda: now[0]
+    return breaker, now
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_opens_after_fail_max():
+    breaker, _ = local_breaker(fail_max=2, reset_timeout=60)
+    upstream = AsyncMock()
+
+    await fail(breaker, breaker.fail_max)
+    with pytest.raises(pybreaker.CircuitBreakerError):
+        await breaker.call(upstream)
+
+    assert breaker.state == 'open'
+    assert breaker.metrics.rejected == 1
+    upstream.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_excluded_errors_are_not_failures():
+    breaker = AsyncCircuitBreaker(CircuitBreakerPolicy(fail_max=1), exclude=(KeyError,))
+
+    with pytest.raises(KeyError):
+        await breaker.call(AsyncMock(side_effect=KeyError('404')))
+
+    assert breaker.state == 'closed'
+    assert breaker.metrics.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_trips_on_failure_rate():
+    breaker, _ = local_breaker(fail_max=2, failure_rate=0.5)
+
+    for _ in range(3):
+        await breaker.call(AsyncMock())
+    await fail(breaker, 2)
+    assert breaker.state == 'closed'
+
+    await fail(breaker)
+    assert breaker.state == 'open'
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_failures_leave_the_window():
+    breaker, now = local_breaker(fail_max=2, window=10)
+
+    await fail(breaker)
+    now[0] += breaker.policy.window
+    await fail(breaker)
+
+    assert breaker.state == 'closed'
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_half_open_limits_probes():
+    breaker, now = local_breaker(fail_max=1, reset_timeout=5, half_open_probes=2)
+    await fail(breaker)
+    now[0] += breaker.reset_timeout
+
+    started = asyncio.Event()
+
+    async def probe():
+        await started.wait()
+        return 'ok'
+
+    calls = [asyncio.create_task(breaker.call(probe)) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert breaker.state == 'half_open'
+    started.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+
+    assert results[:2] == ['ok', 'ok']
+    assert isinstance(results[2], pybreaker.CircuitBreakerError)
+    assert breaker.state == 'closed'
+    assert breaker.metrics.probes == len(results[:2])
+
+
+async def cancel_probe(breaker):
+    started = asyncio.Event()
+
+    async def hang():
+        started.set()
+        await asyncio.sleep(60)
+
+    probe = asyncio.create_task(breaker.call(hang))
+    await started.wait()
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_cancelled_probe_releases_its_slot():
+    breaker, now = local_breaker(fail_max=1, reset_timeout=5)
+    await fail(breaker)
+    now[0] += breaker.reset_timeout
+
+    await cancel_probe(breaker)
+    assert breaker.state == 'half_open'
+
+    assert await breaker.call(AsyncMock(return_value='ok')) == 'ok'
+    assert breaker.state == 'closed'
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_cancelled_probe_releases_shared_slot():
+    breaker = AsyncCircuitBreaker(name='products')
+
+    with patch(
+        'src.core.circuit_breaker.run_script',
+        side_effect=[['probe', 'half_open', '0'], 1],
+    ) as run_script:
+        await cancel_probe(breaker)
+
+    scripts = [call.args[0] for call in run_script.call_args_list]
+    assert scripts == [ACQUIRE_SCRIPT, RELEASE_PROBE_SCRIPT]
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_backoff_grows_on_failed_probes():
+    breaker, now = local_breaker(fail_max=1, reset_timeout=5, max_reset_timeout=15)
+    await fail(breaker)
+    timeouts = [breaker.open_until - now[0]]
+
+    for _ in range(3):
+        now[0] = breaker.open_until
+        await fail(breaker)
+        timeouts.append(breaker.open_until - now[0])
+
+    assert timeouts == [5, 10, 15, 15]
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_emits_transitions():
+    breaker, now = local_breaker(fail_max=1, reset_timeout=5)
+    listener = MagicMock()
+    breaker.add_listener(listener)
+
+    await fail(breaker)
+    now[0] += breaker.reset_timeout
+    await breaker.call(AsyncMock())
+
+    assert [call.args for call in listener.call_args_list] == [
+        ('default', 'closed', 'open'),
+        ('default', 'open', 'half_open'),
+        ('default', 'half_open', 'closed'),
+    ]
+    assert breaker.metrics.transitions['closed->open'] == 1
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_adopts_shared_open_state():
+    breaker = AsyncCircuitBreaker(name='products')
+    upstream = AsyncMock()
+
+    with patch(
+        'src.core.circuit_breaker.run_script',
+        return_value=['reject', 'open', str(time.time() + 60)],
+    ) as run_script:
+        with pytest.raises(pybreaker.CircuitBreakerError):
+            await breaker.call(upstream)
+
+    upstream.assert_not_called()
+    assert run_script.call_args.args[:2] == (ACQUIRE_SCRIPT, ['breaker:products'])
+    assert breaker.state == 'open'
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_records_results_in_redis():
+    breaker = AsyncCircuitBreaker(name='products')
+
+    with patch(
+        'src.core.circuit_breaker.run_script',
+        side_effect=[['allow', 'closed', '0'], ['closed', '0']] * 2,
+    ) as run_script:
+        await fail(breaker)
+        await breaker.call(AsyncMock())
+
+    scripts = [call.args[0] for call in run_script.call_args_list]
+    assert scripts == [ACQUIRE_SCRIPT, RECORD_SCRIPT] * 2
+    success_flags = [run_script.call_args_list[i].args[2][1] for i in (1, 3)]
+    assert success_flags == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_circuit_breaker_falls_back_to_local_state():
+    breaker = AsyncCircuitBreaker(CircuitBreakerPolicy(fail_max=2), name='products')
+
+    with patch('src.core.circuit_breaker.run_script', return_value=None) as run_script:
+        await fail(breaker, breaker.fail_max)
+        with pytest.raises(pybreaker.CircuitBreakerError):
+            await breaker.call(AsyncMock())
+
+    run_script.assert_called_once()
+    assert breaker.state == 'open'
+
+
+@pytest.mark.asyncio
+async def test_breaker_scripts_run_by_sha():
+    client = AsyncMock()
+    client.evalsha.side_effect = [NoScriptError('NOSCRIPT'), ['closed', '0']]
+    client.eval.return_value = ['closed', '1']
+
+    with patch('src.core.redis.get_redis_client', return_value=client):
+        first = await run_script(RECORD_SCRIPT, ['breaker:products'], ['x', 1])
+        second = await run_script(RECORD_SCRIPT, ['breaker:products'], ['x', 1])
+
+    assert first == ['closed', '1']
+    assert second == ['closed', '0']
+    client.eval.assert_called_once_with(RECORD_SCRIPT, 1, 'breaker:products', 'x', 1)
+    shas = {call.args[0] for call in client.evalsha.call_args_list}
+    assert len(shas) == 1
+    assert RECORD_SCRIPT not in shas
@@ -1,8 +1,33 @@
+import logging
+from collections import Counter
 from dataclasses import asdict
+from http import HTTPStatus
+from types import SimpleNamespace
 
 import pytest
-from sqlalchemy import select
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import selectinload
 
+from src.app import app
+from src.core.db import (
+    QueryStats,
+    QueryStatsMiddleware,
+    TimedQueuePool,
+    engine_options,
+    get_session,
+    parameters_shape,
+    pool_status,
+    recent_writers,
+    settings,
+    track_queries,
+)
+from src.core.metrics import db_n_plus_one_suspects, db_queries_per_request
+from src.core.security import create_access_token
+from src.models import table_registry
 from src.models.product import Product
 from src.models.user import User
 from src.models.wishlist import Wishlist
@@ -15,7 +40,9 @@ async def test_create_user(session, mock_db_time):
         session.add(new_user)
         await session.commit()
 
-    user = await session.scalar(select(User).where(User.username == 'alice'))
+    user = await session.scalar(
+        select(User).where(User.username == 'alice').options(selectinload(User.wishlists))
+    )
 
     assert asdict(user) == {
         'id': 1,
@@ -59,6 +86,212 @@ async def test_user_wishlist_relationship(session, user: User, product: Product)
     await session.commit()
     await session.refresh(user)
 
-    user = await session.scalar(select(User).where(User.id == user.id))
+    user = await session.scalar(
+        select(User).where(User.id == user.id).options(selectinload(User.wishlists))
+    )
 
     assert user.wishlists == [wishlist]
+
+
+@pytest.mark.asyncio
+async def test_user_wishlists_are_not_loaded_implicitly(session, user: User):
+    user = await session.scalar(select(User).where(User.id == user.id))
+
+    with pytest.raises(InvalidRequestError):
+        user.wishlists
+
+
+@pytest.mark.asyncio
+async def test_track_queries_counts_statements(session, product):
+    repetitions = 3
+
+    with track_queries() as stats:
+        for _ in range(repetitions):
+            await session.execute(select(Product).where(Product.id == product.id))
+
+    assert stats.count == repetitions
+    assert stats.seconds > 0
+    [(statement, count)] = stats.repeated(repetitions)
+    assert statement.startswith('SELECT')
+    assert count == repetitions
+
+
+@pytest.mark.asyncio
+async def test_queries_outside_scope_are_not_tracked(session):
+    with track_queries() as stats:
+        pass
+    await session.execute(text('SELECT 1'))
+
+    assert stats.count == 0
+
+
+def test_parameters_shape_hides_values():
+    assert parameters_shape({'id': 1, 'email': 'a@b.com'}) == '{id: int, email: str}'
+    assert parameters_shape((1, 'secret')) == '(int, str)'
+    assert parameters_shape([{'id': 1}, {'id': 2}]) == '2 x {id: int}'
+
+
+@pytest.mark.asyncio
+async def test_slow_query_is_logged_with_parameter_shapes(session, caplog, monkeypatch):
+    monkeypatch.setattr(settings, 'DB_SLOW_QUERY_THRESHOLD', 0)
+
+    with caplog.at_level(logging.WARNING, logger='uvicorn'):
+        await session.execute(select(Product).where(Product.title == 'segredo'))
+
+    [record] = [r for r in caplog.records if 'Consulta lenta' in r.message]
+    assert 'str' in record.message
+    assert 'segredo' not in record.message
+
+
+def test_report_flags_n_plus_one(monkeypatch, caplog):
+    threshold = 3
+    monkeypatch.setattr(settings, 'DB_N_PLUS_ONE_THRESHOLD', threshold)
+    statement = 'SELECT products.id FROM products WHERE products.id = ?'
+    stats = QueryStats(
+        count=threshold + 1, statements=Counter({statement: threshold, 'SELECT 1': 1})
+    )
+    scope = {'method': 'GET', 'route': SimpleNamespace(path='/items/{item_id}')}
+    before = db_n_plus_one_suspects.get('GET', '/items/{item_id}')
+
+    with caplog.at_level(logging.WARNING, logger='uvicorn'):
+        QueryStatsMiddleware.report(scope, stats)
+
+    assert db_n_plus_one_suspects.get('GET', '/items/{item_id}') == before + 1
+    [record] = [r for r in caplog.records if 'N+1' in r.message]
+    assert f'{threshold}x: {statement}' in record.message
+
+
+def test_queries_per_request_by_route(client, user):
+    before = db_queries_per_request.count('GET', '/users/')
+
+    client.get('/users/')
+
+    assert db_queries_per_request.count('GET', '/users/') == before + 1
+
+
+def test_engine_options_for_postgres(monkeypatch):
+    pool_size = 20
+    monkeypatch.setattr(settings, 'DB_POOL_SIZE', pool_size)
+    monkeypatch.setattr(settings, 'DB_PREPARE_THRESHOLD', -1)
+
+    options = engine_options('postgresql+psycopg://app:secret@db/app')
+
+    assert options['poolclass'] is TimedQueuePool
+    assert options['pool_size'] == pool_size
+    assert options['pool_pre_ping'] is settings.DB_POOL_PRE_PING
+    assert options['connect_args'] == {'prepare_threshold': None}
+
+
+def test_engine_options_for_sqlite():
+    assert engine_options('sqlite+aiosqlite:///wishlist.db') == {}
+
+
+@pytest.mark.asyncio
+async def test_pool_status(session, product):
+    await session.execute(select(Product))
+
+    status = pool_status(session.bind)
+
+    assert status['checkedout'] >= 1
+    assert set(status) <= {'size', 'checkedout', 'overflow', 'checkedin'}
+
+
+async def _sqlite_engine(path):
+    sqlite_engine = create_async_engine(f'sqlite+aiosqlite:///{path}')
+    async with sqlite_engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    return sqlite_engine
+
+
+async def _insert(target_engine, model, rows: list[dict]):
+    async with target_engine.begin() as conn:
+        await conn.execute(model.__table__.insert(), rows)
+
+
+@pytest_asyncio.fixture
+async def replicated(tmp_path, monkeypatch):
+    """Primário e duas réplicas em arquivos SQLite; a "replicação" é feita à mão."""
+    primary = await _sqlite_engine(tmp_path / 'primary.db')
+    replicas = [await _sqlite_engine(tmp_path / f'replica{i}.db') for i in range(2)]
+    monkeypatch.setattr('src.core.db.replica_engines', replicas[:1])
+    monkeypatch.setattr(recent_writers, 'redis_enabled', False)
+    recent_writers.local.clear()
+
+    async def get_session_override():
+        async with AsyncSession(primary, expire_on_commit=False) as session:
+            yield session
+
+    with TestClient(app) as client:
+        app.dependency_overrides[get_session] = get_session_override
+        yield SimpleNamespace(client=client, primary=primary, replicas=replicas)
+
+    app.dependency_overrides.clear()
+    recent_writers.local.clear()
+    for sqlite_engine in (primary, *replicas):
+        await sqlite_engine.dispose()
+
+
+def _user_row(username: str) -> dict:
+    return {'username': username, 'email': f'{username}@test.com', 'password': 'x'}
+
+
+@pytest.mark.asyncio
+async def test_read_routes_use_replica(replicated):
+    await _insert(replicated.primary, User, [_user_row('primario')])
+    await _insert(replicated.replicas[0], User, [_user_row('replica')])
+
+    response = replicated.client.get('/users/')
+
+    assert [user['username'] for user in response.json()['users']] == ['replica']
+
+
+@pytest.mark.asyncio
+async def test_read_session_balances_across_replicas(replicated, monkeypatch):
+    monkeypatch.setattr('src.core.db.replica_engines', replicated.replicas)
+    for index, replica in enumerate(replicated.replicas):
+        await _insert(replica, User, [_user_row(f'replica{index}')])
+
+    usernames = {replicated.client.get('/users/').json()['users'][0]['username'] for _ in range(2)}
+
+    assert usernames == {'replica0', 'replica1'}
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes(replicated):
+    user = _user_row('alice')
+    product = {'id': 1, 'title': 'Produto', 'price': 10.0, 'image': 'http://img/1'}
+    for target in (replicated.primary, replicated.replicas[0]):
+        await _insert(target, User, [user])
+        await _insert(target, Product, [product])
+        await _insert(target, Wishlist, [{'user_id': 1, 'product_id': 1}])
+    headers = {'Authorization': f'Bearer {create_access_token({"sub": user["email"]})}'}
+
+    def product_ids():
+        groups = replicated.client.get('/wishlists/', headers=headers).json()['wishlists']
+        return [item['product_id'] for group in groups for item in group['products']]
+
+    assert product_ids() == [product['id']]
+
+    # Apaga no primário; a réplica ainda não recebeu a remoção
+    replicated.client.delete('/wishlists/', headers=headers)
+    assert product_ids() == []
+
+    # Passada a janela, as leituras voltam para a réplica (ainda defasada)
+    recent_writers.local.clear()
+    assert product_ids() == [product['id']]
+
+
+@pytest.mark.asyncio
+async def test_new_user_reads_from_primary(replicated):
+    password = 'secret'
+    replicated.client.post(
+        '/users/', json={'username': 'bob', 'email': 'bob@test.com', 'password': password}
+    )
+    token = replicated.client.post(
+        '/auth/token', data={'username': 'bob@test.com', 'password': password}
+    ).json()['access_token']
+
+    response = replicated.client.get('/wishlists/', headers={'Authorization': f'Bearer {token}'})
+
+    # O usuário ainda não existe na réplica, mas a consulta do principal vai ao primário
+    assert response.status_code == HTTPStatus.OK
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from http import HTTPStatus
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from src.app import deadline_exceeded_handler
+from src.core.deadline import (
+    DeadlineExceededError,
+    DeadlineMiddleware,
+    deadline_var,
+    remaining,
+)
+from src.core.redis import get_key
+from src.services.product import call_upstream, circuit_breaker
+
+
+@pytest.fixture
+def expired_deadline():
+    token = deadline_var.set(time.monotonic() - 1)
+    yield
+    deadline_var.reset(token)
+
+
+def test_remaining_without_deadline():
+    cap = 2.0
+
+    assert remaining() is None
+    assert remaining(cap) == cap
+
+
+def test_remaining_is_capped_by_deadline():
+    budget, cap = 0.5, 0.1
+    token = deadline_var.set(time.monotonic() + budget)
+    try:
+        assert remaining(cap=10) <= budget
+        assert remaining(cap) == cap
+    finally:
+        deadline_var.reset(token)
+
+
+@pytest.mark.usefixtures('expired_deadline')
+def test_remaining_raises_when_exhausted():
+    with pytest.raises(DeadlineExceededError):
+        remaining()
+
+
+@pytest.fixture
+def deadline_client():
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware, default=1.0, routes={'/stream': 0})
+
+    @app.get('/slow')
+    async def slow(seconds: float = 0):
+        await asyncio.sleep(seconds)
+        return {'remaining': remaining()}
+
+    @app.get('/stream')
+    async def stream():
+        return {'remaining': remaining()}
+
+    return TestClient(app)
+
+
+def test_deadline_middleware_uses_route_default(deadline_client):
+    response = deadline_client.get('/slow')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 0 < response.json()['remaining'] <= 1
+
+
+def test_deadline_middleware_header_shortens_budget(deadline_client):
+    budget = 0.2
+
+    response = deadline_client.get('/slow', headers={'X-Request-Timeout': str(budget)})
+
+    assert response.json()['remaining'] <= budget
+
+
+def test_deadline_middleware_header_cannot_extend_budget(deadline_client):
+    response = deadline_client.get('/slow', headers={'X-Request-Timeout': '60'})
+
+    assert response.json()['remaining'] <= 1
+
+
+def test_deadline_middleware_returns_504(deadline_client):
+    response = deadline_client.get(
+        '/slow', params={'seconds': 5}, headers={'X-Request-Timeout': '0.05'}
+    )
+
+    assert response.status_code == HTTPStatus.GATEWAY_TIMEOUT
+    assert response.json() == {'detail': 'Request deadline exceeded'}
+
+
+def test_deadline_middleware_route_without_deadline(deadline_client):
+    response = deadline_client.get('/stream')
+
+    assert response.json() == {'remaining': None}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('expired_deadline')
+async def test_redis_commands_stop_when_deadline_exhausted():
+    with patch('src.core.redis.get_redis_client') as get_redis_client:
+        assert await get_key('key') is None
+
+    get_redis_client.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_statement_timeout_stops_exhausted_requests(session):
+    token = deadline_var.set(time.monotonic() - 1)
+    try:
+        with pytest.raises(DeadlineExceededError):
+            await session.execute(text('SELECT 1'))
+    finally:
+        deadline_var.reset(token)
+        await session.rollback()
+
+
+@pytest.mark.asyncio
+async def test_statement_timeout_cancels_slow_query(session, count_queries):
+    budget = 0.2
+    token = deadline_var.set(time.monotonic() + budget)
+    start = time.monotonic()
+    try:
+        with count_queries() as statements, pytest.raises(DeadlineExceededError) as exc_info:
+            await session.execute(text('SELECT pg_sleep(5)'))
+    finally:
+        deadline_var.reset(token)
+        await session.rollback()
+
+    assert time.monotonic() - start < 1
+    assert statements == ['SELECT pg_sleep(5)']
+    response = await deadline_exceeded_handler(None, exc_info.value)
+    assert response.status_code == HTTPStatus.GATEWAY_TIMEOUT
+
+
+@pytest.mark.asyncio
+async def test_call_upstream_cancelled_at_deadline():
+    async def slow_upstream(*args):
+        await asyncio.sleep(5)
+
+    failures = circuit_breaker.metrics.failures
+    token = deadline_var.set(time.monotonic() + 0.05)
+    try:
+        with (
+            patch('src.services.product.async_fetch_product', side_effect=slow_upstream),
+            pytest.raises(DeadlineExceededError),
+        ):
+            await call_upstream(1)
+    finally:
+        deadline_var.reset(token)
+
+    assert circuit_breaker.metrics.failures == failures
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.core.executor import BoundedExecutor, ExecutorSaturatedError
+
+
+@pytest.mark.asyncio
+async def test_thread_executor_runs_off_event_loop():
+    executor = BoundedExecutor(mode='thread', max_workers=1)
+
+    thread_name = await executor.run(lambda: threading.current_thread().name)
+    executor.shutdown()
+
+    assert thread_name.startswith('bounded-executor')
+    assert executor.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_inline_executor_runs_in_caller():
+    executor = BoundedExecutor(mode='inline')
+
+    thread_name = await executor.run(lambda: threading.current_thread().name)
+
+    assert thread_name == threading.current_thread().name
+
+
+@pytest.mark.asyncio
+async def test_executor_rejects_when_saturated():
+    executor = BoundedExecutor(mode='thread', max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    blocked = asyncio.create_task(executor.run(release.wait))
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(ExecutorSaturatedError):
+        await executor.run(lambda: None)
+
+    release.set()
+    await blocked
+    executor.shutdown()
+    assert executor.rejected == 1
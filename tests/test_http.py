@@ -0,0 +1,89 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.core.http import HttpClient
+from src.services.product import async_fetch_product
+
+
+@pytest_asyncio.fixture
+async def products_server(product_data):
+    async def get_product(request):
+        if request.match_info['product_id'] != str(product_data['id']):
+            return web.json_response({}, status=HTTPStatus.NOT_FOUND)
+        return web.json_response(product_data)
+
+    app = web.Application()
+    app.router.add_get('/api/product/{product_id}/', get_product)
+    async with TestServer(app) as server:
+        yield server
+
+
+@pytest_asyncio.fixture
+async def http_client():
+    client = HttpClient(limit_per_host=2)
+    await client.start()
+    yield client
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_async_fetch_product_with_injected_session(products_server, http_client):
+    url = str(products_server.make_url('/api/product/1/'))
+
+    product = await async_fetch_product(url, http_client.session)
+
+    assert product.id == 1
+
+
+@pytest.mark.asyncio
+async def test_async_fetch_product_not_found(products_server, http_client):
+    url = str(products_server.make_url('/api/product/999/'))
+
+    with pytest.raises(Exception, match='Produto não encontrado'):
+        await async_fetch_product(url, http_client.session)
+
+
+@pytest.mark.asyncio
+async def test_http_client_reuses_session_and_connections(products_server, http_client):
+    url = str(products_server.make_url('/api/product/1/'))
+    session = http_client.session
+
+    for _ in range(3):
+        await async_fetch_product(url, http_client.session)
+
+    assert http_client.session is session
+    assert session.connector.limit_per_host == http_client.limit_per_host
+    assert len(session.connector._conns) == 1
+
+
+@pytest.mark.asyncio
+async def test_http_client_close(http_client):
+    session = http_client.session
+
+    await http_client.close()
+
+    assert session.closed
+    assert http_client.session is not session
+
+
+def test_http_client_session_is_bound_to_its_loop():
+    client = HttpClient()
+
+    async def open_session():
+        return client.session
+
+    loop = asyncio.new_event_loop()
+    try:
+        session = loop.run_until_complete(open_session())
+        with pytest.raises(RuntimeError, match='outro event loop'):
+            asyncio.run(open_session())
+        loop.run_until_complete(client.close())
+    finally:
+        loop.close()
+
+    assert session.closed
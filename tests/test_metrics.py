@@ -0,0 +1,100 @@
+from http import HTTPStatus
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.metrics import (
+    Counter,
+    Histogram,
+    MetricsRegistry,
+    db_query_seconds,
+    http_request_seconds,
+    http_requests_in_flight,
+    sql_operation,
+    upstream_request_seconds,
+)
+from src.services.product import ProductNotFoundError, fetch_product
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram('latency_seconds', 'Latência.', ('route',), (0.1, 1)))
+
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value, '/x')
+
+    lines = registry.render().splitlines()
+    assert 'latency_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="/x"} 6.05' in lines
+    assert 'latency_seconds_count{route="/x"} 4' in lines
+
+
+def test_counter_escapes_label_values():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter('errors_total', 'Erros.', ('message',)))
+
+    counter.inc('say "hi"\n')
+
+    assert 'errors_total{message="say \\"hi\\"\\n"} 1.0' in registry.render()
+
+
+def test_registry_runs_collectors_on_render():
+    registry = MetricsRegistry()
+    gauge = registry.gauge('queue_size', 'Tamanho da fila.')
+    queue = [1, 2, 3]
+    registry.on_collect(lambda: gauge.set(len(queue)))
+
+    assert 'queue_size 3.0' in registry.render()
+
+
+def test_sql_operation():
+    assert sql_operation('SELECT products.id FROM products') == 'SELECT'
+    assert sql_operation('insert into products VALUES (1)') == 'INSERT'
+    assert sql_operation('SET LOCAL statement_timeout = 100') == 'OTHER'
+
+
+def test_metrics_endpoint(client, token):
+    labels = ('GET', '/wishlists/', str(HTTPStatus.OK))
+    before = http_request_seconds.count(*labels)
+    queries = db_query_seconds.count('SELECT')
+
+    client.get('/wishlists/', headers={'Authorization': f'Bearer {token}'})
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert http_request_seconds.count(*labels) == before + 1
+    assert http_requests_in_flight.get('GET') == 0
+    assert db_query_seconds.count('SELECT') > queries
+    assert 'circuit_breaker_state{name="products"} 0' in response.text
+    assert 'cache_hit_ratio{cache="principal"}' in response.text
+    assert 'bulkhead{name="products",field="limit"}' in response.text
+
+
+def test_metrics_use_route_templates(client, token):
+    before = http_request_seconds.count('GET', '/wishlists/pending/{pending_id}', '404')
+
+    client.get('/wishlists/pending/123', headers={'Authorization': f'Bearer {token}'})
+    client.get('/does-not-exist')
+
+    assert http_request_seconds.count('GET', '/wishlists/pending/{pending_id}', '404') == before + 1
+    assert http_request_seconds.count('GET', 'unmatched', '404') >= 1
+
+
+@pytest.mark.asyncio
+async def test_upstream_outcome_is_recorded():
+    before = upstream_request_seconds.count('not_found')
+
+    with (
+        patch('src.services.product.get_product_from_db', return_value=None),
+        patch(
+            'src.services.product.async_fetch_product',
+            side_effect=ProductNotFoundError('Produto não encontrado'),
+        ),
+    ):
+        await fetch_product(1, AsyncMock(spec=AsyncSession))
+
+    assert upstream_request_seconds.count('not_found') == before + 1
@@ -0,0 +1,231 @@
+import asyncio
+from datetime import datetime
+from http import HTTPStatus
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+import pybreaker
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.models.wishlist import PendingWishlistItem, Wishlist
+from src.schemas.product import Product
+from src.services.pending_wishlist import (
+    PendingWishlistWorker,
+    resolve_pending_items,
+    retry_delay,
+    settings,
+)
+from src.services.product import ProductNotFoundError
+from src.services.wishlist import wishlist_cache
+
+ASYNC_HEADERS = {'Prefer': 'respond-async'}
+
+
+def upstream_product(product_id):
+    return Product(
+        id=product_id,
+        title=f'Produto {product_id}',
+        price=10.0,
+        image=f'http://example.com/{product_id}.jpg',
+    )
+
+
+@pytest.fixture(autouse=True)
+def async_add(monkeypatch):
+    monkeypatch.setattr('src.routers.wishlist.settings.WISHLIST_ASYNC_ADD', True)
+
+
+@pytest.fixture
+def session_factory(session):
+    return async_sessionmaker(session.bind, expire_on_commit=False)
+
+
+def post_async(client, token, product_id):
+    return client.post(
+        '/wishlists/',
+        headers={'Authorization': f'Bearer {token}'} | ASYNC_HEADERS,
+        json={'product_id': product_id},
+    )
+
+
+def test_create_wishlist_async_unknown_product_is_accepted(client, token):
+    with patch('src.services.product.circuit_breaker.call') as upstream:
+        response = post_async(client, token, 42)
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert response.headers['Preference-Applied'] == 'respond-async'
+    body = response.json()
+    assert body['status'] == 'pending'
+    assert response.headers['Location'] == f'/wishlists/pending/{body["id"]}'
+    upstream.assert_not_called()
+
+
+def test_create_wishlist_async_known_product_is_created(client, token, product):
+    response = post_async(client, token, product.id)
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['product_id'] == product.id
+
+
+def test_create_wishlist_prefer_ignored_when_disabled(client, token, product, monkeypatch):
+    monkeypatch.setattr('src.routers.wishlist.settings.WISHLIST_ASYNC_ADD', False)
+
+    with patch('src.services.product.circuit_breaker.call', return_value=upstream_product(42)):
+        response = post_async(client, token, 42)
+
+    assert response.status_code == HTTPStatus.CREATED
+
+
+@pytest.mark.asyncio
+async def test_resolve_pending_items_adds_found_products(
+    client, token, user, session, session_factory
+):
+    pending_id = post_async(client, token, 42).json()['id']
+
+    with patch(
+        'src.services.product.circuit_breaker.call', return_value=upstream_product(42)
+    ) as upstream:
+        processed = await resolve_pending_items(session_factory)
+
+    assert processed == 1
+    upstream.assert_called_once()
+    wishlist = await session.scalar(select(Wishlist).where(Wishlist.user_id == user.id))
+    assert wishlist.product_id == upstream_product(42).id
+
+    response = client.get(
+        f'/wishlists/pending/{pending_id}', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['status'] == 'added'
+
+
+@pytest.mark.asyncio
+async def test_resolve_pending_items_marks_owner_as_recent_writer(
+    client, token, user, session_factory
+):
+    post_async(client, token, 42)
+    mark_write, bump = AsyncMock(), AsyncMock()
+    calls = MagicMock()
+    calls.attach_mock(mark_write, 'mark_write')
+    calls.attach_mock(bump, 'bump')
+
+    with (
+        patch('src.services.product.circuit_breaker.call', return_value=upstream_product(42)),
+        patch('src.services.pending_wishlist.mark_write', mark_write),
+        patch.object(wishlist_cache, 'bump', bump),
+    ):
+        await resolve_pending_items(session_factory)
+
+    assert [call[0] for call in calls.mock_calls] == ['mark_write', 'bump']
+    mark_write.assert_called_once_with(user.email)
+    bump.assert_called_once_with(user.id)
+
+
+@pytest.mark.asyncio
+async def test_resolve_pending_items_rejects_missing_products(client, token, session_factory):
+    pending_id = post_async(client, token, 404).json()['id']
+
+    with patch(
+        'src.services.product.async_fetch_product',
+        side_effect=ProductNotFoundError('Produto não encontrado'),
+    ):
+        await resolve_pending_items(session_factory)
+
+    response = client.get(
+        f'/wishlists/pending/{pending_id}', headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.json()['status'] == 'not_found'
+
+
+@pytest.mark.asyncio
+async def test_resolve_pending_items_rejected_by_breaker_does_not_count(
+    client, token, session, session_factory
+):
+    pending_id = post_async(client, token, 42).json()['id']
+
+    with (
+        patch(
+            'src.services.product.circuit_breaker.call', side_effect=pybreaker.CircuitBreakerError()
+        ),
+        patch('src.services.product.get_products_from_cache', return_value={}),
+    ):
+        resolved = await resolve_pending_items(session_factory)
+
+    pending = await session.get(PendingWishlistItem, pending_id, populate_existing=True)
+    assert resolved == 0
+    assert (pending.status, pending.attempts) == ('pending', 0)
+    assert pending.next_attempt_at is not None
+
+
+@pytest.mark.asyncio
+async def test_resolve_pending_items_backs_off_between_attempts(
+    client, token, session, session_factory, monkeypatch
+):
+    max_attempts = 2
+    monkeypatch.setattr(settings, 'WISHLIST_PENDING_MAX_ATTEMPTS', max_attempts)
+    pending_id = post_async(client, token, 42).json()['id']
+
+    with patch(
+        'src.services.product.circuit_breaker.call', side_effect=aiohttp.ClientError()
+    ) as upstream:
+        await resolve_pending_items(session_factory)
+        # Ainda dentro do backoff: o item não é escolhido de novo
+        await resolve_pending_items(session_factory)
+        pending = await session.get(PendingWishlistItem, pending_id, populate_existing=True)
+        assert (pending.status, pending.attempts) == ('pending', 1)
+        upstream.assert_called_once()
+
+        pending.next_attempt_at = datetime(2000, 1, 1)
+        await session.commit()
+        await resolve_pending_items(session_factory)
+
+    pending = await session.get(PendingWishlistItem, pending_id, populate_existing=True)
+    assert (pending.status, pending.attempts) == ('failed', max_attempts)
+
+
+def test_retry_delay_grows_exponentially(monkeypatch):
+    monkeypatch.setattr(settings, 'WISHLIST_PENDING_RETRY_BASE', 2)
+    monkeypatch.setattr(settings, 'WISHLIST_PENDING_RETRY_MAX', 10)
+
+    assert [retry_delay(attempts).total_seconds() for attempts in range(5)] == [2, 2, 4, 8, 10]
+
+
+@pytest.mark.asyncio
+async def test_worker_does_not_burn_attempts_while_upstream_is_down(
+    client, token, session, session_factory
+):
+    pending_ids = [post_async(client, token, product_id).json()['id'] for product_id in (1, 2)]
+    worker = PendingWishlistWorker(session_factory, interval=0.01)
+
+    with (
+        patch('src.services.pending_wishlist.acquire_lock', return_value='token'),
+        patch('src.services.pending_wishlist.release_lock'),
+        patch(
+            'src.services.product.circuit_breaker.call', side_effect=aiohttp.ClientError()
+        ) as upstream,
+    ):
+        worker.start()
+        await asyncio.sleep(0.3)
+        await worker.stop()
+
+    # Uma tentativa por item: a próxima só depois do backoff (RETRY_BASE)
+    assert upstream.call_count == len(pending_ids)
+    for pending_id in pending_ids:
+        pending = await session.get(PendingWishlistItem, pending_id, populate_existing=True)
+        assert (pending.status, pending.attempts) == ('pending', 1)
+
+
+def test_read_pending_wishlist_of_other_user(client, token, other_user):
+    pending_id = post_async(client, token, 42).json()['id']
+    other_token = client.post(
+        '/auth/token',
+        data={'username': other_user.email, 'password': other_user.clean_password},
+    ).json()['access_token']
+
+    response = client.get(
+        f'/wishlists/pending/{pending_id}', headers={'Authorization': f'Bearer {other_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -1,17 +1,35 @@
+import asyncio
+import time
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pybreaker
 import pytest
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from src.core.bulkhead import BulkheadFullError
+from src.core.deadline import DeadlineExceededError, deadline_var
 from src.models.product import Product as ProductModel
 from src.schemas.product import Product
 from src.services.product import (
+    ProductNotFoundError,
+    circuit_breaker,
     fetch_product,
+    fetch_products,
     get_product_from_cache,
     get_product_from_db,
+    get_products_from_cache,
+    is_fresh,
+    missing_products,
+    refresh_tasks,
+    resolve_product,
     save_product_to_db,
+    save_products_to_db,
+    settings,
 )
+from tests.factories import ProductFactory
 
 
 @pytest.mark.asyncio
@@ -109,6 +127,7 @@ async def test_fetch_product_all_sources_fail():
             'src.services.product.circuit_breaker.call', side_effect=pybreaker.CircuitBreakerError()
         ),
         patch('src.services.product.get_product_from_cache', return_value=None),
+        patch('src.services.product.get_product_from_snapshot', return_value=None),
     ):
         result = await fetch_product(1, mock_session)
 
@@ -116,32 +135,71 @@ async def test_fetch_product_all_sources_fail():
 
 
 @pytest.mark.asyncio
-async def test_get_product_from_cache_found(product_data):
-    catalog = [product_data]
+async def test_fetch_product_snapshot_fallback(session, product_schema):
+    with (
+        patch(
+            'src.services.product.circuit_breaker.call', side_effect=pybreaker.CircuitBreakerError()
+        ),
+        patch('src.services.product.get_product_from_cache', return_value=None),
+        patch('src.services.product.get_product_from_snapshot', return_value=product_schema),
+    ):
+        result = await fetch_product(product_schema.id, session)
+
+    assert result == product_schema
+    refreshed_at = await session.scalar(
+        select(ProductModel.refreshed_at).where(ProductModel.id == product_schema.id)
+    )
+    assert refreshed_at is None
+
 
-    with patch('src.services.product.get_json', return_value=catalog):
+@pytest.mark.asyncio
+async def test_get_product_from_cache_found(product_data):
+    with patch('src.services.product.hget_json', return_value=product_data) as hget_json:
         result = await get_product_from_cache(1)
 
         assert isinstance(result, Product)
         assert result.id == product_data['id']
         assert result.title == product_data['title']
+        hget_json.assert_called_once_with('catalog:products', '1')
 
 
 @pytest.mark.asyncio
 async def test_get_product_from_cache_not_found():
+    with (
+        patch('src.services.product.hget_json', return_value=None),
+        patch('src.services.product.key_exists', return_value=True),
+        patch('src.services.product.get_json') as get_json,
+    ):
+        result = await get_product_from_cache(1)
+
+        assert result is None
+        get_json.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_product_from_cache_legacy_catalog(product_data):
     catalog = [
-        {'id': 2, 'title': 'Other Product', 'price': 10.0, 'image': 'http://example.com/other.jpg'}
+        {'id': 2, 'title': 'Other Product', 'price': 10.0, 'image': 'http://example.com/other.jpg'},
+        product_data,
     ]
 
-    with patch('src.services.product.get_json', return_value=catalog):
+    with (
+        patch('src.services.product.hget_json', return_value=None),
+        patch('src.services.product.key_exists', return_value=False),
+        patch('src.services.product.get_json', return_value=catalog),
+    ):
         result = await get_product_from_cache(1)
 
-        assert result is None
+        assert result.id == product_data['id']
 
 
 @pytest.mark.asyncio
 async def test_get_product_from_cache_no_catalog():
-    with patch('src.services.product.get_json', return_value=None):
+    with (
+        patch('src.services.product.hget_json', return_value=None),
+        patch('src.services.product.key_exists', return_value=False),
+        patch('src.services.product.get_json', return_value=None),
+    ):
         result = await get_product_from_cache(1)
 
         assert result is None
@@ -149,7 +207,395 @@ async def test_get_product_from_cache_no_catalog():
 
 @pytest.mark.asyncio
 async def test_get_product_from_cache_exception():
-    with patch('src.services.product.get_json', side_effect=Exception('Redis error')):
+    with patch('src.services.product.hget_json', side_effect=Exception('Redis error')):
         result = await get_product_from_cache(1)
 
         assert result is None
+
+
+@pytest.mark.asyncio
+async def test_fetch_product_coalesces_concurrent_misses(product_schema):
+    mock_session = AsyncMock(spec=AsyncSession)
+
+    async def slow_upstream(*args):
+        await asyncio.sleep(0.01)
+        return product_schema
+
+    with (
+        patch('src.services.product.get_product_from_db', return_value=None),
+        patch('src.services.product.circuit_breaker.call', side_effect=slow_upstream) as upstream,
+        patch('src.services.product.save_product_to_db') as save,
+    ):
+        results = await asyncio.gather(*(fetch_product(1, mock_session) for _ in range(10)))
+
+    assert results == [product_schema] * 10
+    upstream.assert_called_once()
+    save.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_fetch_product_leader_deadline_does_not_fail_waiters(product_schema):
+    mock_session = AsyncMock(spec=AsyncSession)
+    short_budget, long_budget = 0.05, 10
+
+    async def slow_upstream(*args):
+        await asyncio.sleep(short_budget * 2)
+        return product_schema
+
+    async def fetch_with_budget(budget):
+        deadline_var.set(time.monotonic() + budget)
+        return await fetch_product(1, mock_session)
+
+    with (
+        patch('src.services.product.get_product_from_db', return_value=None),
+        patch('src.services.product.circuit_breaker.call', side_effect=slow_upstream) as upstream,
+        patch('src.services.product.save_product_to_db'),
+    ):
+        leader = asyncio.create_task(fetch_with_budget(short_budget))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(fetch_with_budget(long_budget))
+
+        with pytest.raises(DeadlineExceededError):
+            await leader
+        assert await waiter == product_schema
+
+    assert upstream.call_count == len([leader, waiter])
+
+
+@pytest.mark.asyncio
+async def test_resolve_product_stops_waiting_when_lock_owner_gets_404(monkeypatch):
+    mock_session = AsyncMock(spec=AsyncSession)
+    monkeypatch.setattr(settings, 'PRODUCT_FETCH_LOCK_ENABLED', True)
+    monkeypatch.setattr('src.services.product.LOCK_POLL_INTERVAL', 0.001)
+
+    with (
+        patch('src.services.product.acquire_lock', return_value=None),
+        patch('src.services.product.get_product_from_db', return_value=None) as get_from_db,
+        patch('src.services.product.is_missing', side_effect=[False, True, True]),
+        patch('src.services.product.circuit_breaker.call') as upstream,
+    ):
+        result = await resolve_product(1, mock_session)
+
+    assert result is None
+    assert get_from_db.call_count == len(['poll', 'poll'])
+    upstream.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_save_product_to_db_already_saved(product_schema, product_model):
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.commit.side_effect = IntegrityError('INSERT', {}, Exception())
+
+    with patch('src.services.product.get_product_from_db', return_value=product_model):
+        result = await save_product_to_db(product_schema, mock_session)
+
+    assert result == product_model
+    mock_session.rollback.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_resolve_product_waits_for_lock_owner(product_model, monkeypatch):
+    mock_session = AsyncMock(spec=AsyncSession)
+    monkeypatch.setattr(settings, 'PRODUCT_FETCH_LOCK_ENABLED', True)
+    monkeypatch.setattr('src.services.product.LOCK_POLL_INTERVAL', 0.001)
+
+    with (
+        patch('src.services.product.acquire_lock', return_value=None),
+        patch('src.services.product.get_product_from_db', side_effect=[None, product_model]),
+        patch('src.services.product.circuit_breaker.call') as upstream,
+    ):
+        result = await resolve_product(1, mock_session)
+
+    assert result.id == product_model.id
+    upstream.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_resolve_product_releases_lock(product_schema, monkeypatch):
+    mock_session = AsyncMock(spec=AsyncSession)
+    monkeypatch.setattr(settings, 'PRODUCT_FETCH_LOCK_ENABLED', True)
+
+    with (
+        patch('src.services.product.acquire_lock', return_value='token'),
+        patch('src.services.product.release_lock') as release_lock,
+        patch('src.services.product.circuit_breaker.call', return_value=product_schema),
+        patch('src.services.product.save_product_to_db'),
+    ):
+        result = await resolve_product(1, mock_session)
+
+    assert result == product_schema
+    release_lock.assert_called_once_with('lock:product:1', 'token')
+
+
+def make_product(product_id: int) -> Product:
+    return Product(
+        id=product_id,
+        title=f'Product {product_id}',
+        price=10.0,
+        image=f'http://example.com/{product_id}.jpg',
+        reviewScore=4.0,
+    )
+
+
+@pytest.mark.asyncio
+async def test_fetch_products_batch(session, product):
+    not_found = {3}
+
+    async def upstream(func, url):
+        product_id = int(url.rstrip('/').rsplit('/', 1)[-1])
+        if product_id in not_found:
+            raise Exception('Produto não encontrado')
+        return make_product(product_id)
+
+    with patch('src.services.product.circuit_breaker.call', side_effect=upstream) as call:
+        result = await fetch_products([product.id, 2, 3, 2], session)
+
+    assert set(result) == {product.id, 2}
+    assert call.call_count == len([2, 3])
+
+    saved = await session.scalars(select(ProductModel).order_by(ProductModel.id))
+    assert [p.id for p in saved] == [product.id, 2]
+
+
+@pytest.mark.asyncio
+async def test_fetch_products_circuit_breaker_fallback(session):
+    with (
+        patch(
+            'src.services.product.circuit_breaker.call', side_effect=pybreaker.CircuitBreakerError()
+        ),
+        patch(
+            'src.services.product.get_products_from_cache',
+            return_value={4: make_product(4)},
+        ) as cache,
+    ):
+        result = await fetch_products([4, 5], session)
+
+    assert list(result) == [4]
+    cache.assert_called_once_with([4, 5])
+
+
+@pytest.mark.asyncio
+async def test_save_products_to_db_ignores_existing(session, product):
+    await save_products_to_db([make_product(product.id), make_product(2)], session)
+
+    saved = await session.scalars(select(ProductModel).order_by(ProductModel.id))
+    assert [(p.id, p.title) for p in saved] == [(product.id, product.title), (2, 'Product 2')]
+
+
+@pytest.mark.asyncio
+async def test_get_products_from_cache(product_data):
+    found = {'1': product_data, '3': {**product_data, 'id': 3}}
+
+    with patch('src.services.product.hmget_json', return_value=found) as hmget_json:
+        result = await get_products_from_cache([1, 3, 9])
+
+    assert sorted(result) == [1, 3]
+    hmget_json.assert_called_once_with('catalog:products', ['1', '3', '9'])
+
+
+@pytest.mark.asyncio
+async def test_get_products_from_cache_legacy_catalog(product_data):
+    catalog = [product_data, {**product_data, 'id': 2}, {**product_data, 'id': 3}]
+
+    with (
+        patch('src.services.product.hmget_json', return_value={}),
+        patch('src.services.product.key_exists', return_value=False),
+        patch('src.services.product.get_json', return_value=catalog),
+    ):
+        result = await get_products_from_cache([1, 3, 9])
+
+    assert sorted(result) == [1, 3]
+
+
+@pytest.mark.asyncio
+async def test_fetch_product_stale_served_while_revalidating(session, monkeypatch):
+    stale = ProductFactory(id=1, title='Old title')
+    stale.refreshed_at = datetime(2024, 1, 1)
+    session.add(stale)
+    await session.commit()
+    monkeypatch.setattr(
+        'src.services.product.session_factory',
+        async_sessionmaker(session.bind, expire_on_commit=False),
+    )
+
+    async def slow_upstream(*args):
+        await asyncio.sleep(0.01)
+        return make_product(1)
+
+    with patch('src.services.product.circuit_breaker.call', side_effect=slow_upstream) as call:
+        results = await asyncio.gather(*(fetch_product(1, session) for _ in range(5)))
+        assert {result.title for result in results} == {'Old title'}
+        await asyncio.gather(*refresh_tasks)
+
+    call.assert_called_once()
+    refreshed = await session.scalar(
+        select(ProductModel).where(ProductModel.id == 1).execution_options(populate_existing=True)
+    )
+    assert refreshed.title == make_product(1).title
+    assert is_fresh(refreshed)
+
+
+@pytest.mark.asyncio
+async def test_stale_product_deleted_upstream_is_not_refetched(session, monkeypatch):
+    stale = ProductFactory(id=1)
+    stale.refreshed_at = datetime(2024, 1, 1)
+    session.add(stale)
+    await session.commit()
+    monkeypatch.setattr(
+        'src.services.product.session_factory',
+        async_sessionmaker(session.bind, expire_on_commit=False),
+    )
+    reads = 10
+
+    with patch(
+        'src.services.product.async_fetch_product',
+        side_effect=ProductNotFoundError('Produto não encontrado'),
+    ) as upstream:
+        for _ in range(reads):
+            assert (await fetch_product(1, session)).id == 1
+            await asyncio.gather(*refresh_tasks)
+
+    upstream.assert_called_once()
+    refreshed = await session.scalar(
+        select(ProductModel).where(ProductModel.id == 1).execution_options(populate_existing=True)
+    )
+    assert is_fresh(refreshed)
+
+
+@pytest.mark.asyncio
+async def test_fetch_product_fresh_is_not_revalidated(session, product):
+    with patch('src.services.product.circuit_breaker.call') as call:
+        result = await fetch_product(product.id, session)
+
+    assert result.id == product.id
+    assert not refresh_tasks
+    call.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_fetch_products_fallback_saved_as_stale(session):
+    with (
+        patch(
+            'src.services.product.circuit_breaker.call', side_effect=pybreaker.CircuitBreakerError()
+        ),
+        patch('src.services.product.get_products_from_cache', return_value={4: make_product(4)}),
+    ):
+        result = await fetch_products([4], session)
+
+    saved = await session.scalar(select(ProductModel).where(ProductModel.id.in_(result)))
+    assert saved.refreshed_at is None
+    assert not is_fresh(saved)
+
+
+@pytest.mark.asyncio
+async def test_fetch_product_bulkhead_full_uses_fallback(session, product_schema):
+    with (
+        patch(
+            'src.services.product.upstream_bulkhead.call',
+            side_effect=BulkheadFullError('Limite de chamadas simultâneas atingido'),
+        ),
+        patch('src.services.product.get_product_from_cache', return_value=product_schema),
+    ):
+        result = await fetch_product(product_schema.id, session)
+
+    assert result == product_schema
+    saved = await session.scalar(
+        select(ProductModel).where(
+            (ProductModel.id == product_schema.id) & ProductModel.refreshed_at.is_(None)
+        )
+    )
+    assert saved is not None
+    assert not is_fresh(saved)
+
+
+@pytest.mark.asyncio
+async def test_fetch_product_not_found_is_negatively_cached():
+    mock_session = AsyncMock(spec=AsyncSession)
+
+    with (
+        patch('src.services.product.get_product_from_db', return_value=None) as get_from_db,
+        patch(
+            'src.services.product.async_fetch_product',
+            side_effect=ProductNotFoundError('Produto não encontrado'),
+        ) as upstream,
+    ):
+        first = await fetch_product(1, mock_session)
+        second = await fetch_product(1, mock_session)
+
+    # O banco é consultado antes do cache negativo; a API, só na primeira vez
+    lookups = 2
+    assert first is second is None
+    assert get_from_db.call_count == lookups
+    upstream.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_fetch_product_not_found_does_not_trip_breaker():
+    mock_session = AsyncMock(spec=AsyncSession)
+    failures = circuit_breaker.metrics.failures
+
+    with (
+        patch('src.services.product.get_product_from_db', return_value=None),
+        patch(
+            'src.services.product.async_fetch_product',
+            side_effect=ProductNotFoundError('Produto não encontrado'),
+        ),
+    ):
+        for product_id in range(circuit_breaker.fail_max + 1):
+            await fetch_product(product_id, mock_session)
+
+    assert circuit_breaker.metrics.failures == failures
+    assert circuit_breaker.state == 'closed'
+
+
+@pytest.mark.asyncio
+async def test_fetch_products_skips_known_missing(session):
+    await missing_products.set('3', True)
+
+    with patch(
+        'src.services.product.circuit_breaker.call', side_effect=lambda func, url: make_product(2)
+    ) as call:
+        result = await fetch_products([2, 3], session)
+
+    assert set(result) == {2}
+    call.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_fetch_products_checks_negative_cache_in_one_round_trip(
+    session, product, monkeypatch
+):
+    monkeypatch.setattr(missing_products, 'redis_enabled', True)
+    absent_ids = list(range(100, 110))
+
+    with (
+        patch('src.core.cache.mget_json', return_value={'product:missing:100': True}) as mget,
+        patch(
+            'src.services.product.circuit_breaker.call', side_effect=pybreaker.CircuitBreakerError()
+        ),
+        patch('src.services.product.get_products_from_cache', return_value={}),
+    ):
+        await fetch_products([product.id, *absent_ids], session)
+
+    # Só os ausentes do banco vão ao cache negativo, todos no mesmo MGET
+    mget.assert_called_once_with([f'product:missing:{product_id}' for product_id in absent_ids])
+
+
+@pytest.mark.asyncio
+async def test_fetch_product_in_db_skips_negative_cache(session, product):
+    with patch('src.services.product.is_missing') as is_missing:
+        result = await fetch_product(product.id, session)
+
+    assert result.id == product.id
+    is_missing.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_product_from_db_reuses_cached_statement(session):
+    products = [ProductFactory(id=product_id) for product_id in (7, 8)]
+    session.add_all(products)
+    await session.commit()
+
+    found = [await get_product_from_db(product.id, session) for product in products]
+
+    assert [product.id for product in found] == [7, 8]
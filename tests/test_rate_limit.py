@@ -0,0 +1,28 @@
+import asyncio
+import time
+
+import pytest
+
+from src.core.rate_limit import RateLimiter
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(rate=100)
+    calls = 5
+
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire() for _ in range(calls)))
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= (calls - 1) * limiter.interval * 0.9
+
+
+@pytest.mark.asyncio
+async def test_rate_limiter_disabled():
+    limiter = RateLimiter(rate=0)
+
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire() for _ in range(100)))
+
+    assert time.monotonic() - start < limiter.interval + 0.05
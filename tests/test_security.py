@@ -1,8 +1,17 @@
 from http import HTTPStatus
+from unittest.mock import patch
 
+import pytest
 from jwt import decode
 
-from src.core.security import create_access_token, settings
+from src.core.security import (
+    create_access_token,
+    get_current_user,
+    principal_cache,
+    principal_query,
+    settings,
+)
+from src.schemas.auth import Principal
 
 
 def test_jwt():
@@ -20,3 +29,29 @@ def test_jwt_invalid_token(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_uses_cached_principal(session, user):
+    token = create_access_token({'sub': user.email})
+
+    with patch.object(session, 'execute', wraps=session.execute) as execute:
+        first = await get_current_user(session, token)
+        second = await get_current_user(session, token)
+
+    assert first == second == Principal(id=user.id, email=user.email, username=user.username)
+    execute.assert_called_once()
+    assert principal_cache.stats.local_hits >= 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_runs_principal_query(session, user, other_user):
+    with patch.object(session, 'execute', wraps=session.execute) as execute:
+        principals = [
+            await get_current_user(session, create_access_token({'sub': u.email}))
+            for u in (user, other_user)
+        ]
+
+    assert [p.id for p in principals] == [user.id, other_user.id]
+    statement = execute.call_args.args[0]
+    assert str(statement).startswith(str(principal_query()))
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from src.core.deadline import DeadlineExceededError
+from src.core.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    flights = SingleFlight()
+    calls = []
+
+    async def work(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        return value * 2
+
+    results = await asyncio.gather(*(flights.do('key', work, 21) for _ in range(5)))
+
+    assert results == [42] * 5
+    assert calls == [21]
+    assert flights.executions == 1
+    assert flights.coalesced == len(results) - 1
+    assert not flights.in_flight('key')
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_exception():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    results = await asyncio.gather(
+        flights.do('key', work), flights.do('key', work), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flights.executions == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_waiter_takes_over_when_leader_is_cancelled():
+    flights = SingleFlight()
+    started = asyncio.Event()
+
+    async def work():
+        started.set()
+        await asyncio.sleep(0.05)
+        return 'done'
+
+    leader = asyncio.create_task(flights.do('key', work))
+    await started.wait()
+    waiter = asyncio.create_task(flights.do('key', work))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == 'done'
+    assert flights.executions == len(['leader', 'waiter'])
+
+
+@pytest.mark.asyncio
+async def test_single_flight_waiter_takes_over_when_leader_deadline_expires():
+    flights = SingleFlight()
+    started = asyncio.Event()
+    calls = []
+
+    async def work(caller):
+        calls.append(caller)
+        started.set()
+        await asyncio.sleep(0.01)
+        if caller == 'leader':
+            raise DeadlineExceededError('Prazo da requisição esgotado')
+        return 'done'
+
+    leader = asyncio.create_task(flights.do('key', work, 'leader'))
+    await started.wait()
+    waiter = asyncio.create_task(flights.do('key', work, 'waiter'))
+
+    with pytest.raises(DeadlineExceededError):
+        await leader
+    assert await waiter == 'done'
+    assert calls == ['leader', 'waiter']
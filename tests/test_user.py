@@ -1,6 +1,11 @@
 from http import HTTPStatus
+from unittest.mock import MagicMock, call, patch
 
+import pytest
+
+from src.models.user import User
 from src.schemas.user import UserPublic
+from tests.factories import UserFactory
 
 
 def test_create_user(client):
@@ -23,13 +28,13 @@ def test_create_user(client):
 def test_read_users(client):
     response = client.get('/users')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': []}
+    assert response.json() == {'users': [], 'next_cursor': None}
 
 
 def test_read_users_with_users(client, user):
     user_schema = UserPublic.model_validate(user).model_dump()
     response = client.get('/users/')
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {'users': [user_schema], 'next_cursor': None}
 
 
 def test_update_user(client, user, token):
@@ -86,6 +91,29 @@ def test_delete_user(client, user, token):
     assert response.json() == {'message': 'User deleted'}
 
 
+@pytest.mark.parametrize('method', ['put', 'delete'])
+def test_user_write_marks_replica_window_before_invalidating_principal(client, user, token, method):
+    calls = MagicMock()
+    email = user.email
+    payload = {'username': 'bob', 'email': 'bob@example.com', 'password': 'mynewpassword'}
+
+    with (
+        patch('src.services.user.mark_write', side_effect=calls.mark_write),
+        patch('src.services.user.invalidate_principal', side_effect=calls.invalidate_principal),
+    ):
+        client.request(
+            method,
+            f'/users/{user.id}',
+            headers={'Authorization': f'Bearer {token}'},
+            json=payload if method == 'put' else None,
+        )
+
+    # Sem a marca, uma leitura concorrente na réplica recolocaria o principal antigo no cache
+    assert calls.mock_calls.index(call.mark_write(email)) < calls.mock_calls.index(
+        call.invalidate_principal(email)
+    )
+
+
 def test_update_user_with_wrong_user(client, other_user, token):
     response = client.put(
         f'/users/{other_user.id}',
@@ -107,3 +135,48 @@ def test_delete_user_wrong_user(client, other_user, token):
     )
     assert response.status_code == HTTPStatus.FORBIDDEN
     assert response.json() == {'detail': 'Not enough permissions'}
+
+
+def test_update_user_invalidates_cached_principal(client, user, token):
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'bob',
+            'email': 'bob@example.com',
+            'password': 'mynewpassword',
+        },
+    )
+
+    response = client.post('/auth/refresh_token', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_delete_user_invalidates_cached_principal(client, user, token):
+    client.delete(f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'})
+
+    response = client.post('/auth/refresh_token', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_read_users_cursor_pagination(session, client, mock_db_time):
+    with mock_db_time(model=User):
+        session.add_all([UserFactory() for _ in range(3)])
+        await session.commit()
+
+    first = client.get('/users/', params={'limit': 2}).json()
+    second = client.get('/users/', params={'limit': 2, 'after': first['next_cursor']}).json()
+
+    assert [u['id'] for u in first['users']] == [1, 2]
+    assert [u['id'] for u in second['users']] == [3]
+    assert second['next_cursor'] is None
+
+
+def test_read_users_query_budget(client, user_with_large_wishlist, assert_max_queries):
+    with assert_max_queries(1):
+        response = client.get('/users/')
+
+    assert response.status_code == HTTPStatus.OK
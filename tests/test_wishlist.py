@@ -1,9 +1,16 @@
+import json
 from http import HTTPStatus
+from unittest.mock import patch
 
 import pytest
+import pytest_asyncio
+from sqlalchemy import select
 
+from src.core.metrics import cache_lookup_seconds
 from src.models.product import Product
-from tests.factories import WishlistFactory
+from src.models.wishlist import Wishlist
+from src.services.wishlist import wishlist_cache
+from tests.factories import ProductFactory, WishlistFactory
 
 
 def test_create_wishlist(client, token, product: Product):
@@ -80,7 +87,7 @@ def test_read_wishlists(client, token):
     )
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'wishlists': []}
+    assert response.json() == {'wishlists': [], 'next_cursor': None}
 
 
 @pytest.mark.asyncio
@@ -109,8 +116,206 @@ async def test_read_wishlists_with_wishlists(session, client, user, product, tok
                     }
                 ],
             }
-        ]
+        ],
+        'next_cursor': None,
     }
 
     assert response.status_code == HTTPStatus.OK
     assert response.json() == expected_response
+
+
+@pytest_asyncio.fixture
+async def products(session):
+    products = [ProductFactory(id=product_id) for product_id in range(1, 301)]
+    session.add_all(products)
+    await session.commit()
+    return products
+
+
+@pytest.mark.asyncio
+async def test_batch_wishlist(session, client, user, products, token):
+    session.add_all([
+        WishlistFactory(user_id=user.id, product_id=1),
+        WishlistFactory(user_id=user.id, product_id=2),
+    ])
+    await session.commit()
+
+    with patch(
+        'src.services.product.circuit_breaker.call', side_effect=Exception('Produto não encontrado')
+    ):
+        response = client.post(
+            '/wishlists/batch',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'add': [2, 3, 999], 'remove': [1, 4]},
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'results': [
+            {'product_id': 1, 'status': 'removed'},
+            {'product_id': 4, 'status': 'not_found'},
+            {'product_id': 2, 'status': 'already_present'},
+            {'product_id': 3, 'status': 'added'},
+            {'product_id': 999, 'status': 'not_found'},
+        ]
+    }
+
+    wishlist = await session.scalars(
+        select(Wishlist.product_id).where(Wishlist.user_id == user.id).order_by(Wishlist.id)
+    )
+    assert list(wishlist) == [2, 3]
+
+
+def test_batch_wishlist_hundreds_of_items(client, products, token, count_queries):
+    product_ids = [product.id for product in products]
+    headers = {'Authorization': f'Bearer {token}'}
+
+    with count_queries() as statements:
+        response = client.post('/wishlists/batch', headers=headers, json={'add': product_ids})
+
+    assert {item['status'] for item in response.json()['results']} == {'added'}
+    assert len(statements) <= len(['principal', 'existing', 'products', 'insert'])
+
+    with count_queries() as statements:
+        response = client.post('/wishlists/batch', headers=headers, json={'remove': product_ids})
+
+    assert {item['status'] for item in response.json()['results']} == {'removed'}
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_read_wishlists_cursor_pagination(session, client, user, token, mock_db_time):
+    products = [ProductFactory(id=product_id) for product_id in range(1, 6)]
+    session.add_all(products)
+    await session.commit()
+
+    with mock_db_time(model=Wishlist):
+        session.add_all([
+            WishlistFactory(user_id=user.id, product_id=product.id) for product in products
+        ])
+        await session.commit()
+
+    headers = {'Authorization': f'Bearer {token}'}
+    seen, params = [], {'limit': 2}
+    while True:
+        response = client.get('/wishlists/', headers=headers, params=params)
+        assert response.status_code == HTTPStatus.OK
+        data = response.json()
+        seen += [p['product_id'] for group in data['wishlists'] for p in group['products']]
+        if not data['next_cursor']:
+            break
+        params = {'limit': 2, 'after': data['next_cursor']}
+
+    assert seen == [product.id for product in products]
+
+
+def test_read_wishlists_invalid_cursor(client, token):
+    response = client.get(
+        '/wishlists/',
+        headers={'Authorization': f'Bearer {token}'},
+        params={'after': 'not-a-cursor'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_read_wishlists_served_from_cache(client, token, count_queries, monkeypatch):
+    cached = {'wishlists': [], 'next_cursor': None}
+    monkeypatch.setattr(wishlist_cache, 'enabled', True)
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+
+    hits = cache_lookup_seconds.count('wishlist', 'hit')
+    with (
+        patch.object(
+            wishlist_cache, 'get_raw', return_value=(json.dumps(cached), '1')
+        ) as cache_get,
+        count_queries() as statements,
+    ):
+        response = client.get('/wishlists/', headers=headers, params={'limit': 10})
+
+    assert response.json() == cached
+    cache_get.assert_called_once_with(1, '0:10:')
+    assert statements == []
+    assert cache_lookup_seconds.count('wishlist', 'hit') == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_read_wishlists_caches_serialized_body(client, token, wishlist, monkeypatch):
+    monkeypatch.setattr(wishlist_cache, 'enabled', True)
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+
+    misses = cache_lookup_seconds.count('wishlist', 'miss')
+    with (
+        patch.object(wishlist_cache, 'get_raw', return_value=(None, '1')),
+        patch.object(wishlist_cache, 'set_raw') as cache_set,
+    ):
+        response = client.get('/wishlists/', headers=headers, params={'limit': 10})
+
+    assert response.headers['content-type'] == 'application/json'
+    cache_set.assert_called_once_with(1, '1', '0:10:', response.text)
+    assert cache_lookup_seconds.count('wishlist', 'miss') == misses + 1
+
+
+def test_create_wishlist_bumps_cache_version(client, token, product: Product):
+    with patch.object(wishlist_cache, 'bump') as bump:
+        client.post(
+            '/wishlists/',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'product_id': product.id},
+        )
+
+    bump.assert_called_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_export_wishlist_ndjson(session, client, user, products, token):
+    session.add_all([
+        WishlistFactory(user_id=user.id, product_id=product.id) for product in products
+    ])
+    await session.commit()
+
+    with patch('src.services.wishlist.EXPORT_BATCH_SIZE', 7):
+        response = client.get('/wishlists/export', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line['product_id'] for line in lines] == [product.id for product in products]
+    assert lines[0] == {
+        'product_id': products[0].id,
+        'title': products[0].title,
+        'price': products[0].price,
+        'image': products[0].image,
+        'review_score': products[0].review_score,
+    }
+
+
+def test_export_wishlist_empty(client, token):
+    response = client.get('/wishlists/export', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert not response.text
+
+
+def test_create_wishlist_query_budget(client, token, product, assert_max_queries):
+    # principal (cache frio) + produto + INSERT + refresh
+    with assert_max_queries(4):
+        response = client.post(
+            '/wishlists/',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'product_id': product.id},
+        )
+
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def test_read_wishlists_query_budget(client, user_with_large_wishlist, token, assert_max_queries):
+    # principal (cache frio) + página; os produtos vêm no mesmo JOIN
+    with assert_max_queries(2):
+        response = client.get('/wishlists/', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK